@@ -1,13 +1,33 @@
-import io
+import gzip
+import json
 import logging
 import os
 import platform
-from typing import Any, Dict
-
-from flask import Flask, jsonify, render_template, request, send_file
+import tempfile
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    render_template,
+    request,
+    send_file,
+    stream_with_context,
+)
 
-from logging_config import setup_logging, cleanup_old_job_logs, get_job_log_path
+from logging_config import (
+    setup_logging,
+    cleanup_old_job_logs,
+    get_job_log_gz_path,
+    get_job_log_path,
+    get_job_profile_base,
+    read_job_log,
+)
 from tabs import get_default_module, get_module, get_registered_modules
+from tabs.seo_checker.artifacts import EXPORT_WAIT_SECONDS
 from tabs.seo_checker.config import (
     CHECK_LABELS,
     DEFAULT_CHECK_OPTIONS,
@@ -15,23 +35,84 @@ from tabs.seo_checker.config import (
     CheckOptions,
     RuntimeOptions,
 )
+from tabs.seo_checker.events import MAX_EVENT_STREAMS, iter_events
 from tabs.seo_checker.exporters import (
-    rows_to_csv_bytes,
-    rows_to_headings_xlsx_bytes,
-    rows_to_xlsx_bytes,
+    gzip_chunks,
+    iter_csv_chunks,
+)
+from tabs.seo_checker.jobs import FINISHED_STATUSES, JobManager
+from tabs.seo_checker.profiling import PROFILE_FORMATS
+from tabs.seo_checker.resources import HISTORY_SIZE
+from tabs.seo_checker.results import RESULTS_PAGE_DEFAULT, RESULTS_PAGE_MAX
+from tabs.seo_checker.typed_exporters import (
+    TYPED_EXPORT_FORMATS,
+    iter_ndjson_chunks,
 )
-from tabs.seo_checker.jobs import JobManager
 import tabs.seo_checker
 import tabs.ssh_tools
 
-try:
-    import psutil
-except ImportError:  # pragma: no cover - optional
-    psutil = None
-
 
 job_manager = JobManager()
 
+# Снимков истории в ответе /api/resource по умолчанию (минута)
+RESOURCE_HISTORY_DEFAULT = 30
+
+
+def attachment_header(filename: str) -> str:
+    """Content-Disposition для скачивания (с поддержкой не-ASCII имён)."""
+    try:
+        filename.encode("ascii")
+        return f'attachment; filename="{filename}"'
+    except UnicodeEncodeError:
+        fallback = filename.encode("ascii", "ignore").decode().strip()
+        if not fallback or fallback.startswith("."):
+            fallback = "download" + fallback
+        return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def merge_check_options(options_data: Dict[str, Any]) -> CheckOptions:
+    """Опции проверок из запроса поверх значений по умолчанию."""
+    merged_opts = DEFAULT_CHECK_OPTIONS.to_dict()
+    for key, value in (options_data or {}).items():
+        if key in merged_opts:
+            merged_opts[key] = bool(value)
+    return CheckOptions(**merged_opts)
+
+
+def clamp_runtime(runtime_data: Dict[str, Any]) -> RuntimeOptions:
+    """Настройки выполнения из запроса, ограниченные допустимыми значениями."""
+    merged_runtime = DEFAULT_RUNTIME_OPTIONS.__dict__.copy()
+    for key, value in (runtime_data or {}).items():
+        if key not in merged_runtime:
+            continue
+        try:
+            merged_runtime[key] = int(value)
+        except (TypeError, ValueError):
+            continue
+    runtime = RuntimeOptions(**merged_runtime)
+    runtime.concurrency = max(1, min(runtime.concurrency, 10))
+    runtime.timeout_seconds = max(3, min(runtime.timeout_seconds, 120))
+    runtime.retries = max(0, min(runtime.retries, 5))
+    runtime.crawl_depth = max(0, min(runtime.crawl_depth, 10))
+    runtime.crawl_max_pages = max(1, min(runtime.crawl_max_pages, 500000))
+    runtime.sitemap_discovery = 1 if runtime.sitemap_discovery else 0
+    runtime.profile = 1 if runtime.profile else 0
+    runtime.memory_budget_mb = max(0, min(runtime.memory_budget_mb, 65536))
+    runtime.trace_memory = 1 if runtime.trace_memory else 0
+    runtime.json_log = 1 if runtime.json_log else 0
+    runtime.snapshot = 1 if runtime.snapshot else 0
+    return runtime
+
+
+def snapshot_error(job) -> str:
+    """Почему у задачи нет снимка: не записывался или уже вытеснен."""
+    if not (job.runtime.snapshot or job.replay_from or job.warc_path):
+        return (
+            "задача запущена без опции snapshot («Сохранять снимок ответов»): "
+            "снимок не записан, повторный анализ и WARC недоступны"
+        )
+    return "снимок задачи недоступен (вытеснен)"
+
 
 def create_app() -> Flask:
     # Настройка логирования
@@ -41,6 +122,10 @@ def create_app() -> Flask:
     # Очистка старых job-логов при старте
     cleanup_old_job_logs()
 
+    # Загрузка системы снимается в фоне, /api/resource её только читает
+    if platform.system().lower() == "linux":
+        job_manager.resources.start()
+
     app = Flask(__name__)
 
     def render_tool_page(selected_tool: str):
@@ -73,29 +158,50 @@ def create_app() -> Flask:
         if not url_list:
             return jsonify({"error": "Список URL пуст"}), 400
 
-        options_data = payload.get("options", {}) or {}
-        runtime_data = payload.get("runtime", {}) or {}
+        check_options = merge_check_options(payload.get("options", {}))
+        runtime = clamp_runtime(payload.get("runtime", {}))
 
-        merged_opts = DEFAULT_CHECK_OPTIONS.to_dict()
-        for key, value in options_data.items():
-            if key in merged_opts:
-                merged_opts[key] = bool(value)
-        check_options = CheckOptions(**merged_opts)
+        job = job_manager.create_job(url_list, check_options, runtime)
+        return jsonify({"job_id": job.id})
 
-        merged_runtime = DEFAULT_RUNTIME_OPTIONS.__dict__.copy()
-        for key, value in runtime_data.items():
-            try:
-                merged_runtime[key] = int(value)
-            except (TypeError, ValueError):
-                continue
-        runtime = RuntimeOptions(**merged_runtime)
-        runtime.concurrency = max(1, min(runtime.concurrency, 10))
-        runtime.timeout_seconds = max(3, min(runtime.timeout_seconds, 120))
-        runtime.retries = max(0, min(runtime.retries, 5))
+    @app.post("/api/job/warc")
+    def import_warc():
+        """Задача по готовому WARC (.warc / .warc.gz): проверки без сети.
 
-        job = job_manager.create_job(url_list, check_options, runtime)
+        multipart/form-data: файл в поле warc, опции — JSON в полях
+        options и runtime (как в /api/job).
+        """
+        upload = request.files.get("warc")
+        if not upload:
+            return jsonify({"error": "нужен файл WARC в поле warc"}), 400
+        try:
+            options_data = json.loads(request.form.get("options") or "{}")
+            runtime_data = json.loads(request.form.get("runtime") or "{}")
+        except ValueError:
+            return jsonify({"error": "options и runtime должны быть JSON"}), 400
+        fd, path = tempfile.mkstemp(suffix=".warc")
+        with os.fdopen(fd, "wb") as fh:
+            upload.save(fh)
+        job = job_manager.import_warc(
+            path, merge_check_options(options_data), clamp_runtime(runtime_data)
+        )
         return jsonify({"job_id": job.id})
 
+    @app.post("/api/job/<job_id>/reanalyze")
+    def reanalyze_job(job_id: str):
+        """Новая задача: те же страницы с другими опциями по снимку, без сети."""
+        job = job_manager.get(job_id)
+        if not job:
+            return jsonify({"error": "not found"}), 404
+        if job.status not in FINISHED_STATUSES:
+            return jsonify({"error": "повторный анализ доступен после завершения задачи"}), 409
+        payload: Dict[str, Any] = request.get_json(force=True, silent=True) or {}
+        check_options = merge_check_options(payload.get("options", {}))
+        new_job = job_manager.reanalyze(job, check_options)
+        if not new_job:
+            return jsonify({"error": snapshot_error(job)}), 410
+        return jsonify({"job_id": new_job.id})
+
     @app.get("/api/job/<job_id>")
     def job_status(job_id: str):
         job = job_manager.get(job_id)
@@ -104,6 +210,41 @@ def create_app() -> Flask:
         snapshot = job_manager.status_snapshot(job)
         return jsonify(snapshot)
 
+    @app.get("/api/job/<job_id>/results")
+    def job_results(job_id: str):
+        """Строки, завершённые после cursor (порядок завершения), постранично."""
+        job = job_manager.get(job_id)
+        if not job:
+            return jsonify({"error": "not found"}), 404
+
+        try:
+            cursor = max(0, int(request.args.get("cursor", 0)))
+            limit = int(request.args.get("limit", RESULTS_PAGE_DEFAULT))
+        except ValueError:
+            return jsonify({"error": "cursor и limit должны быть числами"}), 400
+        limit = max(1, min(limit, RESULTS_PAGE_MAX))
+
+        chunk, next_cursor = job.results_since(cursor, limit)
+        snapshot = job_manager.status_snapshot(job)
+        return jsonify(
+            {
+                "rows": [{"index": idx, "row": row} for idx, row in chunk],
+                "cursor": next_cursor,
+                "has_more": next_cursor < snapshot["completed"],
+                "status": snapshot["status"],
+                "completed": snapshot["completed"],
+                "total": snapshot["total"],
+            }
+        )
+
+    @app.get("/api/job/<job_id>/sitemaps")
+    def job_sitemaps(job_id: str):
+        """Статистика разобранных sitemap: число URL, диапазон lastmod, время."""
+        job = job_manager.get(job_id)
+        if not job:
+            return jsonify({"error": "not found"}), 404
+        return jsonify({"status": job.status, "sitemaps": list(job.sitemap_stats)})
+
     @app.post("/api/job/<job_id>/stop")
     def stop_job(job_id: str):
         ok = job_manager.stop(job_id)
@@ -111,34 +252,150 @@ def create_app() -> Flask:
 
     @app.get("/api/job/<job_id>/log")
     def download_job_log(job_id: str):
-        """Скачивание лога конкретного job."""
+        """Лог job: целиком (скачивание) или ?offset=N — новые строки с байта N."""
         # Проверяем что job существует
         job = job_manager.get(job_id)
         if not job:
             return jsonify({"error": "job not found"}), 404
 
-        # Получаем путь к лог-файлу
-        log_path = get_job_log_path(job_id)
+        if "offset" in request.args:
+            offset = request.args.get("offset", 0, type=int)
+            chunk = read_job_log(job_id, max(0, offset))
+            if chunk is None:
+                return jsonify({"error": "log file not found (job may not have started yet)"}), 404
+            data, next_offset, size = chunk
+            return jsonify(
+                {
+                    "offset": next_offset,
+                    "size": size,
+                    "text": data.decode("utf-8", "replace"),
+                    # Больше строк не будет: job завершён и лог дочитан
+                    "complete": job.status in FINISHED_STATUSES and next_offset >= size,
+                }
+            )
 
-        # Проверяем что файл существует
-        if not log_path.exists():
+        # Получаем путь к лог-файлу: завершённые job'ы хранятся сжатыми
+        log_path = get_job_log_path(job_id)
+        gz_path = get_job_log_gz_path(job_id)
+        if not log_path.exists() and not gz_path.exists():
             return jsonify({"error": "log file not found (job may not have started yet)"}), 404
 
         # Отдаём файл как текст
         try:
-            return send_file(
-                log_path,
+            if log_path.exists():
+                return send_file(
+                    log_path,
+                    as_attachment=True,
+                    download_name=f"seo_{job_id}.log",
+                    mimetype="text/plain; charset=utf-8"
+                )
+        except FileNotFoundError:
+            pass  # лог сжали между проверкой и отправкой
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            # Сжатый файл отдаётся как есть, распаковывает клиент
+            response = send_file(
+                gz_path,
                 as_attachment=True,
                 download_name=f"seo_{job_id}.log",
-                mimetype="text/plain; charset=utf-8"
+                mimetype="text/plain; charset=utf-8",
             )
-        except Exception as e:
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+
+        def iter_plain():
+            with gzip.open(gz_path, "rb") as fh:
+                for chunk in iter(lambda: fh.read(64 * 1024), b""):
+                    yield chunk
+
+        return Response(
+            iter_plain(),
+            mimetype="text/plain; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="seo_{job_id}.log"'},
+        )
+
+    @app.get("/api/job/<job_id>/profile")
+    def download_job_profile(job_id: str):
+        """Профиль задачи (runtime.profile): ?format=pstats|collapsed."""
+        fmt = request.args.get("format", "pstats")
+        if fmt not in PROFILE_FORMATS:
+            return jsonify({"error": f"неизвестный формат: {fmt}"}), 400
+        job = job_manager.get(job_id)
+        if not job:
+            return jsonify({"error": "job not found"}), 404
+        if not job.runtime.profile:
+            return jsonify({"error": "задача запущена без профилирования"}), 404
+        if job.status not in FINISHED_STATUSES:
+            return jsonify({"error": "профиль будет готов после завершения задачи"}), 409
+        suffix, mimetype = PROFILE_FORMATS[fmt]
+        base = get_job_profile_base(job_id)
+        path = base.with_name(base.name + suffix)
+        if fmt not in job.profile_formats or not path.exists():
+            return jsonify({"error": "profile file not found"}), 404
+        return send_file(
+            path,
+            as_attachment=True,
+            download_name=path.name,
+            mimetype=mimetype,
+        )
+
+    def serve_export(
+        future: Future,
+        filename: str,
+        mimetype: str,
+        rows: Optional[int] = None,
+    ):
+        """Отдаёт готовый артефакт экспорта (ETag, Last-Modified, Range).
+
+        ?wait=0 — не ждать сборку, а сразу вернуть 202 с состоянием.
+        rows — срез работающей задачи: возвращается в 202, чтобы повторный
+        запрос с ?rows= опрашивал ту же сборку.
+        """
+        building: Dict[str, Any] = {"state": "building"}
+        if rows is not None:
+            building["rows"] = rows
+        if request.args.get("wait") == "0" and not future.done():
+            return jsonify(building), 202
+        try:
+            path = future.result(timeout=EXPORT_WAIT_SECONDS)
+        except FutureTimeoutError:
+            return jsonify({**building, "error": "экспорт ещё собирается"}), 503
+        except ImportError as e:
             return jsonify({"error": str(e)}), 500
+        except Exception as e:
+            return jsonify({"state": "error", "error": str(e)}), 500
+        return send_file(
+            path,
+            as_attachment=True,
+            download_name=filename,
+            mimetype=mimetype,
+            conditional=True,
+            etag=True,
+            max_age=0,
+        )
+
+    def running_rows(job) -> int:
+        """Число строк среза работающей задачи: ?rows= из ответа 202
+        (опрос уже начатой сборки) или сколько строк готово сейчас."""
+        done = len(job.results)
+        rows = request.args.get("rows", type=int)
+        return rows if rows is not None and 0 <= rows <= done else done
+
+    @app.get("/api/job/<job_id>/exports")
+    def job_exports(job_id: str):
+        """Состояние артефактов экспорта задачи: building / ready / error."""
+        job = job_manager.get(job_id)
+        if not job:
+            return jsonify({"error": "not found"}), 404
+        return jsonify({"id": job.id, "exports": job_manager.exports.details(job.id)})
 
     @app.get("/api/job/<job_id>/download")
     def download_csv(job_id: str):
-        results = job_manager.results(job_id)
-        if results is None:
+        job = job_manager.get(job_id)
+        if not job:
             return jsonify({"error": "not found"}), 404
 
         # Получить кастомное имя файла из query параметров
@@ -154,18 +411,33 @@ def create_app() -> Flask:
         else:
             filename = f"seo-check-{job_id}.csv"
 
-        data = rows_to_csv_bytes(results)
-        return send_file(
-            io.BytesIO(data),
-            as_attachment=True,
-            download_name=filename,
-            mimetype="text/csv; charset=utf-8",
+        compress = request.args.get("gzip") in ("1", "true")
+        mimetype = "text/csv; charset=utf-8"
+        if compress:
+            filename += ".gz"
+            mimetype = "application/gzip"
+
+        # Результаты завершённой задачи не меняются: отдаём кэшированный файл
+        if job.status in FINISHED_STATUSES:
+            return serve_export(
+                job_manager.submit_csv(job, compress=compress), filename, mimetype
+            )
+
+        # Задача ещё идёт: CSV генерируется лениво из сохранённых строк, чанками
+        chunks = iter_csv_chunks(job.results.iter_ordered(), job.results.columns())
+        if compress:
+            chunks = gzip_chunks(chunks)
+
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={"Content-Disposition": attachment_header(filename)},
         )
 
     @app.get("/api/job/<job_id>/download-xlsx")
     def download_xlsx(job_id: str):
-        results = job_manager.results(job_id)
-        if results is None:
+        job = job_manager.get(job_id)
+        if not job:
             return jsonify({"error": "not found"}), 404
 
         # Получить кастомное имя файла из query параметров
@@ -181,21 +453,23 @@ def create_app() -> Flask:
         else:
             filename = f"seo-check-{job_id}.xlsx"
 
-        try:
-            data = rows_to_xlsx_bytes(results)
-            return send_file(
-                io.BytesIO(data),
-                as_attachment=True,
-                download_name=filename,
-                mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-        except ImportError as e:
-            return jsonify({"error": str(e)}), 500
+        mimetype = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+        # Файл собирается в фоне после завершения задачи
+        if job.status in FINISHED_STATUSES:
+            return serve_export(job_manager.submit_xlsx(job), filename, mimetype)
+
+        # Задача ещё идёт: частичная выгрузка тоже собирается в фоне,
+        # артефакт — по числу готовых строк
+        rows = running_rows(job)
+        return serve_export(
+            job_manager.submit_xlsx(job, rows=rows), filename, mimetype, rows=rows
+        )
 
     @app.get("/api/job/<job_id>/download-headings-xlsx")
     def download_headings_xlsx(job_id: str):
-        results = job_manager.results(job_id)
-        if results is None:
+        job = job_manager.get(job_id)
+        if not job:
             return jsonify({"error": "not found"}), 404
 
         custom_filename = request.args.get("filename", "").strip()
@@ -219,30 +493,161 @@ def create_app() -> Flask:
                 h.strip().upper() for h in enabled_headings_str.split(",")
             ]
 
-        try:
-            data = rows_to_headings_xlsx_bytes(
-                results, enabled_headings=enabled_headings
+        # Раскладка: grouped — домены рядом (листы по 500 доменов),
+        # long — строки (домен, уровень, позиция, текст)
+        layout = request.args.get("layout", "grouped")
+        if layout not in ("grouped", "long"):
+            return jsonify({"error": f"неизвестная раскладка: {layout}"}), 400
+
+        mimetype = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+        if job.status in FINISHED_STATUSES:
+            return serve_export(
+                job_manager.submit_headings_xlsx(job, enabled_headings, layout),
+                filename,
+                mimetype,
             )
-            return send_file(
-                io.BytesIO(data),
-                as_attachment=True,
-                download_name=filename,
-                mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+
+        rows = running_rows(job)
+        return serve_export(
+            job_manager.submit_headings_xlsx(job, enabled_headings, layout, rows=rows),
+            filename,
+            mimetype,
+            rows=rows,
+        )
+
+    @app.get("/api/job/<job_id>/export/warc")
+    def download_warc(job_id: str):
+        """Все ответы задачи (снимок) в формате WARC.
+
+        Есть только у задач с опцией snapshot (и у повторного анализа
+        и импорта WARC, которые работают по снимку).
+        """
+        job = job_manager.get(job_id)
+        if not job:
+            return jsonify({"error": "not found"}), 404
+        if job.status not in FINISHED_STATUSES:
+            return jsonify({"error": "WARC будет готов после завершения задачи"}), 409
+        if not job_manager.snapshots.has(job.replay_from or job.id):
+            return jsonify({"error": snapshot_error(job)}), 410
+        return serve_export(
+            job_manager.submit_warc(job),
+            f"seo-check-{job_id}.warc.gz",
+            "application/warc",
+        )
+
+    @app.get("/api/job/<job_id>/export/<fmt>")
+    def download_typed(job_id: str, fmt: str):
+        """Типизированные форматы для аналитики: ndjson, sqlite, parquet."""
+        if fmt not in TYPED_EXPORT_FORMATS:
+            return jsonify({"error": f"неизвестный формат: {fmt}"}), 400
+        job = job_manager.get(job_id)
+        if not job:
+            return jsonify({"error": "not found"}), 404
+
+        ext, mimetype = TYPED_EXPORT_FORMATS[fmt]
+        custom_filename = request.args.get("filename", "").strip()
+        safe_filename = "".join(
+            c for c in custom_filename if c.isalnum() or c in ("-", "_", " ")
+        )
+        filename = f"{safe_filename or f'seo-check-{job_id}'}.{ext}"
+
+        if job.status in FINISHED_STATUSES:
+            return serve_export(job_manager.submit_typed(job, fmt), filename, mimetype)
+
+        # Задача ещё идёт
+        if fmt == "ndjson":
+            return Response(
+                stream_with_context(
+                    iter_ndjson_chunks(job.results.iter_ordered(), job.results.columns())
+                ),
+                mimetype=mimetype,
+                headers={"Content-Disposition": attachment_header(filename)},
             )
-        except ImportError as e:
-            return jsonify({"error": str(e)}), 500
+        rows = running_rows(job)
+        return serve_export(
+            job_manager.submit_typed(job, fmt, rows=rows), filename, mimetype, rows=rows
+        )
+
+    @app.get("/api/job/<job_id>/report/<name>")
+    def download_report(job_id: str, name: str):
+        """CSV-отчёт анализа по всем страницам задачи (например, duplicates)."""
+        job = job_manager.get(job_id)
+        if not job:
+            return jsonify({"error": "not found"}), 404
+        if job.status not in FINISHED_STATUSES:
+            return jsonify({"error": "отчёт будет готов после завершения задачи"}), 409
+        if name not in job.reports:
+            return jsonify({"error": f"отчёт не найден: {name}"}), 404
+        return serve_export(
+            job_manager.submit_report(job, name),
+            f"seo-check-{job_id}-{name}.csv",
+            "text/csv; charset=utf-8",
+        )
+
+    @app.post("/api/job/<job_id>/history")
+    def save_history(job_id: str):
+        """Сохраняет результаты завершённой задачи в историю под именем."""
+        job = job_manager.get(job_id)
+        if not job:
+            return jsonify({"error": "not found"}), 404
+        if job.status not in FINISHED_STATUSES:
+            return jsonify({"error": "сохранить можно после завершения задачи"}), 409
+        payload: Dict[str, Any] = request.get_json(force=True, silent=True) or {}
+        name = str(payload.get("name", "")).strip()
+        if not job_manager.history.valid_name(name):
+            return jsonify({"error": "имя: буквы, цифры, пробел, точка, дефис (до 100 символов)"}), 400
+        meta = job_manager.history.save(name, job.results.iter_ordered(), job_id=job.id)
+        return jsonify(meta)
+
+    @app.get("/api/history")
+    def list_history():
+        return jsonify({"items": job_manager.history.list()})
+
+    @app.delete("/api/history/<name>")
+    def delete_history(name: str):
+        ok = job_manager.history.delete(name)
+        return jsonify({"deleted": ok}), (200 if ok else 404)
+
+    @app.get("/api/history/diff")
+    def history_diff():
+        """CSV с изменившимися URL и колонками между двумя сохранениями."""
+        old = job_manager.history.get(request.args.get("old", ""))
+        new = job_manager.history.get(request.args.get("new", ""))
+        if not old or not new:
+            return jsonify({"error": "сохранение не найдено"}), 404
+        return serve_export(
+            job_manager.submit_history_diff(old, new),
+            f"seo-diff-{old['name']}-{new['name']}.csv",
+            "text/csv; charset=utf-8",
+        )
+
+    @app.get("/metrics")
+    def prometheus_metrics():
+        """Метрики в текстовом формате Prometheus."""
+        return Response(
+            job_manager.render_metrics(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
 
     @app.get("/api/resource")
     def resource_usage():
-        if platform.system().lower() != "linux" or not psutil:
+        """Последний снимок загрузки и короткая история (собирает фоновый поток)."""
+        sampler = job_manager.resources
+        if platform.system().lower() != "linux" or not sampler.available:
             return jsonify({"available": False})
-        cpu = psutil.cpu_percent(interval=0.2)
-        mem = psutil.virtual_memory()
+        sample = sampler.latest()
+        if sample is None:  # первый снимок ещё не готов
+            return jsonify({"available": True, "pending": True})
+        limit = request.args.get("history", RESOURCE_HISTORY_DEFAULT, type=int)
+        limit = max(0, min(limit, HISTORY_SIZE))
         return jsonify(
             {
                 "available": True,
-                "cpu": cpu,
-                "memory_percent": mem.percent,
+                "cpu": sample["cpu"],
+                "memory_percent": sample["memory_percent"],
+                "sample": sample,
+                "history": sampler.history(limit),
             }
         )
 
@@ -252,6 +657,36 @@ def create_app() -> Flask:
         stats = job_manager.get_stats()
         return jsonify(stats)
 
+    @app.get("/api/events")
+    def events_stream():
+        """SSE-поток: прогресс задачи, очередь, новые строки; заменяет heartbeat."""
+        session_id = request.args.get("session_id") or None
+        job_id = request.args.get("job_id") or None
+        if not job_manager.try_open_stream(session_id, MAX_EVENT_STREAMS):
+            # Клиент откатится на периодический опрос
+            return jsonify({"error": "too many event streams"}), 503
+
+        # Позиция строк: ?cursor= или Last-Event-ID при переподключении
+        raw_cursor = request.headers.get("Last-Event-ID") or request.args.get("cursor")
+        cursor = None
+        if raw_cursor is not None:
+            try:
+                cursor = max(0, int(raw_cursor))
+            except ValueError:
+                cursor = 0
+
+        response = Response(
+            stream_with_context(iter_events(job_manager, job_id, cursor)),
+            mimetype="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",  # nginx: не буферизовать поток
+            },
+        )
+        # Сервер закрывает ответ и при отключении клиента до первого события
+        response.call_on_close(lambda: job_manager.close_stream(session_id))
+        return response
+
     @app.post("/api/heartbeat")
     def heartbeat():
         """Регистрирует heartbeat от активной вкладки."""
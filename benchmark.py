@@ -0,0 +1,367 @@
+"""
+Бенчмарк пропускной способности: задачи JobManager против локального
+синтетического сайта.
+
+Сайт поднимается в отдельном процессе (ThreadingHTTPServer, HTTP/1.1
+keep-alive), чтобы его работа не делила GIL с проверкой. Поведение каждой
+страницы детерминировано её номером и --seed: задержка, размер, редирект,
+ошибка (500 или обрыв соединения), признаки WordPress. URL распределяются
+по --sites адресам 127.0.0.1..127.0.0.N (весь 127.0.0.0/8 — loopback), так
+что проверки уровня сайта (robots.txt, sitemap, 404) идут на каждый сайт.
+
+Отчёт по каждому размеру задачи: URL/с, p50/p95/p99 времени проверки URL,
+CPU процесса, пик RSS, коды ответов. --json сохраняет результат,
+--compare печатает разницу с сохранённым прогоном.
+
+    python benchmark.py --urls 1000 10000 --latency-ms 20 --json base.json
+    python benchmark.py --urls 1000 10000 --latency-ms 20 --compare base.json
+
+Данные и логи задач пишутся во временный каталог и удаляются после
+прогона: logs/ и его индекс хранения не затрагиваются.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import logging_config
+from tabs.seo_checker.config import (
+    DEFAULT_CHECK_OPTIONS,
+    DEFAULT_RUNTIME_OPTIONS,
+    CheckOptions,
+    RuntimeOptions,
+)
+from tabs.seo_checker.exporters import HAS_OPENPYXL
+from tabs.seo_checker.jobs import FINISHED_STATUSES, JobManager
+
+# Метрики, которые сравнивает --compare: (ключ, больше — лучше)
+COMPARED_METRICS = [
+    ("urls_per_sec", True),
+    ("latency_p50_ms", False),
+    ("latency_p95_ms", False),
+    ("latency_p99_ms", False),
+    ("cpu_seconds", False),
+    ("peak_rss_mb", False),
+]
+
+_FILLER = (
+    "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua.</p>\n"
+)
+
+
+@dataclass
+class SiteParams:
+    """Поведение синтетического сайта."""
+
+    latency_ms: float = 20.0
+    jitter_ms: float = 10.0
+    page_kb: int = 30
+    redirect_ratio: float = 0.1
+    failure_ratio: float = 0.01
+    wp_ratio: float = 0.3
+    soft_404: bool = False  # несуществующие страницы отвечают 200
+    links_per_page: int = 20
+    seed: int = 1
+
+
+def _fraction(n: int, salt: int, seed: int) -> float:
+    """Детерминированное псевдослучайное число [0, 1) для страницы n."""
+    value = (n * 2654435761 + salt * 40503 + seed * 97) & 0xFFFFFFFF
+    value ^= value >> 15
+    value = (value * 2246822519) & 0xFFFFFFFF
+    value ^= value >> 13
+    return value / 2**32
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    params = SiteParams()
+
+    def log_message(self, format, *args):  # noqa: A002 - сигнатура базового класса
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8",
+              headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _sleep(self, n: int):
+        params = self.params
+        delay = params.latency_ms + params.jitter_ms * _fraction(n, 1, params.seed)
+        time.sleep(delay / 1000)
+
+    def do_GET(self):
+        params = self.params
+        path = self.path.split("?", 1)[0]
+        host = self.headers.get("Host", "127.0.0.1")
+        if path == "/robots.txt":
+            body = f"User-agent: *\nAllow: /\nSitemap: http://{host}/sitemap.xml\n"
+            self._send(200, body.encode(), "text/plain")
+            return
+        if path == "/sitemap.xml":
+            urls = "".join(f"<url><loc>http://{host}/p/{n}</loc></url>" for n in range(50))
+            body = (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+            )
+            self._send(200, body.encode(), "application/xml")
+            return
+
+        parts = path.strip("/").split("/")
+        if len(parts) >= 2 and parts[0] == "p" and parts[1].isdigit():
+            n = int(parts[1])
+            final = len(parts) == 3 and parts[2] == "final"
+            self._sleep(n)
+            if not final and _fraction(n, 2, params.seed) < params.redirect_ratio:
+                self._send(301, b"", headers={"Location": f"/p/{n}/final"})
+                return
+            failure = _fraction(n, 3, params.seed)
+            if failure < params.failure_ratio / 2:
+                self._send(500, b"<h1>Internal Server Error</h1>")
+                return
+            if failure < params.failure_ratio:
+                self.close_connection = True  # обрыв без ответа
+                return
+            self._send(200, self._page(n, host))
+            return
+
+        if params.soft_404:
+            self._send(200, self._page(0, host))
+        else:
+            self._send(404, b"<html><body><h1>Not found</h1></body></html>")
+
+    def _page(self, n: int, host: str) -> bytes:
+        params = self.params
+        wordpress = _fraction(n, 4, params.seed) < params.wp_ratio
+        head = [
+            f"<title>Page {n} title</title>",
+            f'<meta name="description" content="Description of page {n}">',
+            f'<link rel="canonical" href="http://{host}/p/{n}">',
+        ]
+        if wordpress:
+            head.append('<meta name="generator" content="WordPress 6.4">')
+            head.append('<link rel="stylesheet" href="/wp-content/themes/site/style.css">')
+        links = "".join(
+            f'<li><a href="/p/{(n * 31 + i * 7919) % 100000}">Link {i}</a></li>'
+            for i in range(params.links_per_page)
+        )
+        body = (
+            "<!DOCTYPE html><html lang=\"ru\"><head><meta charset=\"utf-8\">"
+            + "".join(head)
+            + f"</head><body><header><nav><ul>{links}</ul></nav></header>"
+            f"<main><h1>Heading {n}</h1><h2>Section A</h2>"
+            f'<img src="/img/{n}.jpg" alt="Image {n}"><h2>Section B</h2>'
+        )
+        filler_count = max(0, (params.page_kb * 1024 - len(body)) // len(_FILLER))
+        return (body + _FILLER * filler_count + "</main><footer></footer></body></html>").encode()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def _serve(params: SiteParams, conn):
+    _SiteHandler.params = params
+    # Пустой адрес: принимаются соединения на любой 127.0.0.N
+    server = _Server(("", 0), _SiteHandler)
+    conn.send(server.server_address[1])
+    server.serve_forever()
+
+
+def start_site(params: SiteParams):
+    """Запускает сайт в отдельном процессе; возвращает (процесс, порт)."""
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe()
+    process = ctx.Process(target=_serve, args=(params, child), daemon=True)
+    process.start()
+    port = parent.recv()
+    return process, port
+
+
+def build_urls(count: int, sites: int, port: int) -> List[str]:
+    return [f"http://127.0.0.{i % sites + 1}:{port}/p/{i}" for i in range(count)]
+
+
+def run_job(
+    manager: JobManager,
+    urls: List[str],
+    check_options: CheckOptions,
+    runtime: RuntimeOptions,
+) -> Dict:
+    """Выполняет одну задачу и возвращает её метрики."""
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    job = manager.create_job(urls, check_options, runtime)
+    while job.status not in FINISHED_STATUSES:
+        time.sleep(0.1)
+    elapsed = time.perf_counter() - started
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+    # XLSX по завершении собирается заранее (как в сервисе): ждём его
+    # отдельно, чтобы следующий прогон не делил с ним CPU
+    export_seconds = None
+    if HAS_OPENPYXL and len(job.results):
+        export_started = time.perf_counter()
+        manager.submit_xlsx(job).result()
+        export_seconds = round(time.perf_counter() - export_started, 2)
+
+    total = job.timings.histogram("total")
+    codes = Counter(row.get("Код ответа", "") for row in job.results.iter_ordered())
+    errors = sum(count for code, count in codes.items() if code.startswith("ошибка"))
+    cpu_seconds = (usage_after.ru_utime - usage_before.ru_utime) + (
+        usage_after.ru_stime - usage_before.ru_stime
+    )
+    return {
+        "urls": len(urls),
+        "status": job.status,
+        "completed": job.completed,
+        "elapsed_seconds": round(elapsed, 2),
+        "urls_per_sec": round(job.completed / elapsed, 1) if elapsed else 0.0,
+        "latency_p50_ms": round(total.percentile(50), 1) if total else None,
+        "latency_p95_ms": round(total.percentile(95), 1) if total else None,
+        "latency_p99_ms": round(total.percentile(99), 1) if total else None,
+        "cpu_seconds": round(cpu_seconds, 2),
+        # ru_maxrss на Linux — КБ; пик процесса с начала бенчмарка
+        "peak_rss_mb": round(usage_after.ru_maxrss / 1024, 1),
+        "errors": errors,
+        "xlsx_wait_seconds": export_seconds,
+        "status_codes": {
+            code: count
+            for code, count in codes.most_common(10)
+            if not code.startswith("ошибка")
+        },
+        "fetch": job.counters.to_dict(),
+    }
+
+
+def compare(runs: List[Dict], baseline_path: str):
+    """Печатает изменение метрик относительно сохранённого прогона."""
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    previous = {run["urls"]: run for run in baseline.get("runs", [])}
+    for run in runs:
+        before = previous.get(run["urls"])
+        if not before:
+            print(f"{run['urls']} URL: нет в {baseline_path}")
+            continue
+        print(f"{run['urls']} URL:")
+        for key, higher_is_better in COMPARED_METRICS:
+            old, new = before.get(key), run.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if higher_is_better else change < 0
+            mark = "лучше" if better else "хуже" if change else ""
+            print(f"  {key:<16} {old:>10} -> {new:>10}  {change:+6.1f}% {mark}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--urls", type=int, nargs="+", default=[1000],
+                        help="размеры задач (по задаче на каждый), например 1000 10000 100000")
+    parser.add_argument("--sites", type=int, default=10, help="число сайтов (адресов 127.0.0.N)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_RUNTIME_OPTIONS.concurrency)
+    parser.add_argument("--timeout", type=int, default=DEFAULT_RUNTIME_OPTIONS.timeout_seconds)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RUNTIME_OPTIONS.retries)
+    parser.add_argument("--all-checks", action="store_true",
+                        help="включить все проверки и анализы (по умолчанию — как в интерфейсе)")
+    parser.add_argument("--latency-ms", type=float, default=SiteParams.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=SiteParams.jitter_ms)
+    parser.add_argument("--page-kb", type=int, default=SiteParams.page_kb)
+    parser.add_argument("--redirect-ratio", type=float, default=SiteParams.redirect_ratio)
+    parser.add_argument("--failure-ratio", type=float, default=SiteParams.failure_ratio)
+    parser.add_argument("--wp-ratio", type=float, default=SiteParams.wp_ratio)
+    parser.add_argument("--soft-404", action="store_true",
+                        help="несуществующие страницы отвечают 200")
+    parser.add_argument("--seed", type=int, default=SiteParams.seed)
+    parser.add_argument("--json", help="сохранить результат в файл")
+    parser.add_argument("--compare", help="сравнить с результатом из файла")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    params = SiteParams(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        page_kb=args.page_kb,
+        redirect_ratio=args.redirect_ratio,
+        failure_ratio=args.failure_ratio,
+        wp_ratio=args.wp_ratio,
+        soft_404=args.soft_404,
+        seed=args.seed,
+    )
+    check_options = DEFAULT_CHECK_OPTIONS
+    if args.all_checks:
+        check_options = CheckOptions(**{key: True for key in DEFAULT_CHECK_OPTIONS.to_dict()})
+    runtime = replace(
+        DEFAULT_RUNTIME_OPTIONS,
+        concurrency=args.concurrency,
+        timeout_seconds=args.timeout,
+        retries=args.retries,
+    )
+    # Предупреждения о сбоях запросов ожидаемы (failure_ratio) — не в консоль
+    logging.getLogger("lime_frog").addHandler(logging.NullHandler())
+    logging.getLogger("lime_frog").propagate = False
+
+    process, port = start_site(params)
+    runs = []
+    default_log_dir = logging_config.LOG_DIR
+    try:
+        with tempfile.TemporaryDirectory(prefix="lime-frog-bench-") as tmp:
+            data_dir = Path(tmp)
+            logging_config.set_log_dir(data_dir / "logs")
+            try:
+                manager = JobManager(data_dir=data_dir)
+                for count in args.urls:
+                    urls = build_urls(count, args.sites, port)
+                    result = run_job(manager, urls, check_options, runtime)
+                    runs.append(result)
+                    print(
+                        f"{count} URL: {result['urls_per_sec']} URL/s, "
+                        f"p50/p95/p99 {result['latency_p50_ms']}/{result['latency_p95_ms']}/"
+                        f"{result['latency_p99_ms']} ms, CPU {result['cpu_seconds']}s, "
+                        f"RSS {result['peak_rss_mb']} MB, errors {result['errors']}",
+                        flush=True,
+                    )
+            finally:
+                # Дописывает логи прогона во временный каталог до его удаления
+                logging_config.set_log_dir(default_log_dir)
+    finally:
+        process.terminate()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "site": asdict(params),
+        "runtime": asdict(runtime),
+        "all_checks": args.all_checks,
+        "runs": runs,
+    }
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.compare:
+        compare(runs, args.compare)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,7 +1,14 @@
 bind = "127.0.0.1:8000"
 workers = 1
 worker_class = "gthread"
-threads = 8
+# Каждый открытый SSE-поток (/api/events) занимает поток воркера на всё
+# время подключения, но почти всё время спит в ожидании изменений: сообщения
+# строятся один раз на изменение (JobManager.shared_event), поток вкладки
+# только отправляет готовые. Потоков MAX_EVENT_STREAMS (48) + 16 под обычные
+# запросы; сверх лимита /api/events отвечает 503 и вкладка переходит на
+# опрос. gevent/eventlet не подходят: monkey-patching превратил бы потоки
+# задач (свой asyncio-цикл и разбор HTML на CPU) в гринлеты одного потока
+threads = 64
 timeout = 120
 accesslog = "-"
 errorlog = "-"
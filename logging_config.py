@@ -3,32 +3,83 @@
 
 Структура логов:
 - logs/app.log - общий application лог (с ротацией)
-- logs/seo_<job_id>.log - логи конкретных job'ов (TTL 14 дней или max 100 файлов)
+- logs/seo_<job_id>.log - логи конкретных job'ов (TTL 14 дней или max 100 файлов),
+  текстом или JSON lines; после завершения job сжимаются в .log.gz
+
+Логгеры только кладут записи в очередь (QueueHandler); форматирует,
+маскирует и пишет на диск отдельный поток (LogPipeline) пачками, поэтому
+медленный диск и регулярки маскировки не тормозят event loop задач.
 """
 
-import glob
+import atexit
+import copy
+import gzip
+import io
+import json
 import logging
 import os
+import queue
 import re
+import threading
 import time
-from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, RotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 # Директория для логов (абсолютный путь от корня проекта)
 PROJECT_ROOT = Path(__file__).resolve().parent
 LOG_DIR = PROJECT_ROOT / "logs"
 APP_LOG_FILE = LOG_DIR / "app.log"
-SEO_JOB_LOG_PATTERN = "seo_*.log"
+# Файлы job'а: лог (завершённые сжимаются в .log.gz) и профили рядом с ним
+_JOB_FILE_RE = re.compile(r'^seo_([0-9a-f]{32})\.(?:log|log\.gz|prof|collapsed)$')
+# Индекс хранения: строка "время_создания job_id" на job, в порядке создания;
+# у сжатого лога дописано "размер смещение,смещение,..." (индекс поиска)
+JOB_LOG_INDEX = LOG_DIR / "jobs.index"
+_index_lock = threading.Lock()
+# Максимум байт за один запрос хвоста лога
+LOG_TAIL_MAX_BYTES = 256 * 1024
+# Сжатый лог — цепочка gzip-членов по столько байт несжатого текста:
+# чтение с любого смещения распаковывает не больше одного члена
+LOG_GZ_MEMBER_BYTES = 1024 * 1024
+# job_id -> (несжатый размер, смещения членов в .gz); None — индекса нет
+_gz_seek_cache: Dict[str, Optional[Tuple[int, List[int]]]] = {}
 
 # Политика хранения job-логов
 MAX_JOB_LOG_AGE_DAYS = 14
 MAX_JOB_LOG_COUNT = 100
 
+# Записей за один проход потока конвейера (один flush на файл)
+LOG_BATCH_SIZE = 512
+_STOP = object()  # команда остановки потока конвейера
+
 # Убедиться что директория существует
 LOG_DIR.mkdir(exist_ok=True)
 
 
+# Чувствительные query-параметры (как и раньше — без границы слова слева:
+# access_token=, my_api_key= тоже маскируются)
+SENSITIVE_PARAMS = (
+    'access_token', 'refresh_token', 'authorization', 'api_key', 'apikey',
+    'signature', 'password', 'passwd', 'secret', 'token', 'auth', 'key',
+    'pwd', 'sig',
+)
+
+# Один проход вместо отдельного re.sub на каждый параметр:
+# 1 — basic auth (user:pass@), 2 — имя чувствительного параметра с "="
+_SENSITIVE_RE = re.compile(
+    r'(://)[^\s/:@]+:[^\s/@]+@'
+    r'|((?:' + '|'.join(SENSITIVE_PARAMS) + r')=)[^&\s]+',
+    re.IGNORECASE,
+)
+
+
+def _mask_match(match: re.Match) -> str:
+    if match.group(1):
+        return '://***:***@'
+    return match.group(2) + '***'
+
+
 def mask_sensitive_url(url: str) -> str:
     """
     Маскирует чувствительные данные в URL для безопасного логирования.
@@ -37,39 +88,192 @@ def mask_sensitive_url(url: str) -> str:
     - user:pass@ → ***:***@
     - token=xxx, key=xxx, signature=xxx, api_key=xxx → param=***
 
+    Годится и для целого сообщения лога: значения заканчиваются на
+    пробеле. Так маскирует все записи конвейер логирования.
+
     Args:
-        url: URL который нужно замаскировать
+        url: URL (или текст) который нужно замаскировать
 
     Returns:
         URL с замаскированными чувствительными данными
     """
-    if not url:
+    # Без "@" и "=" маскировать нечего: регулярка не запускается
+    if not url or ('=' not in url and '@' not in url):
         return url
+    return _SENSITIVE_RE.sub(_mask_match, url)
 
-    # Маскировка basic auth (user:pass@)
-    masked = re.sub(
-        r'://(([^:@]+):([^@]+)@)',
-        r'://***:***@',
-        url
-    )
 
-    # Маскировка чувствительных query параметров
-    sensitive_params = [
-        'token', 'key', 'api_key', 'apikey', 'signature', 'sig',
-        'secret', 'password', 'passwd', 'pwd', 'access_token',
-        'refresh_token', 'auth', 'authorization'
-    ]
+class MaskingFormatter(logging.Formatter):
+    """Текстовый формат с маскировкой чувствительных данных."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return mask_sensitive_url(super().format(record))
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Одна JSON-строка на запись (для машинного разбора job-логов)."""
+
+    def __init__(self, job_id: Optional[str] = None):
+        super().__init__()
+        self._job_id = job_id
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': mask_sensitive_url(record.getMessage()),
+        }
+        if self._job_id:
+            entry['job_id'] = self._job_id
+        if record.exc_text:
+            entry['exc'] = mask_sensitive_url(record.exc_text)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _BatchFlushMixin:
+    """flush() откладывается, пока слушатель пишет пачку записей."""
+
+    in_batch = False
+
+    def flush(self):
+        if not self.in_batch:
+            super().flush()
 
-    for param in sensitive_params:
-        # Маскируем param=value (до & или конца строки)
-        masked = re.sub(
-            rf'({param}=)[^&\s]+',
-            r'\1***',
-            masked,
-            flags=re.IGNORECASE
-        )
 
-    return masked
+class _BatchFileHandler(_BatchFlushMixin, logging.FileHandler):
+    pass
+
+
+class _BatchRotatingFileHandler(_BatchFlushMixin, RotatingFileHandler):
+    pass
+
+
+class _BatchStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    pass
+
+
+class _JobQueueHandler(QueueHandler):
+    """Кладёт запись в очередь; форматирование и запись — в потоке слушателя."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Аргументы подставляются сразу (объекты могут измениться), трейсбек
+        # превращается в текст — кадры стека не держатся в очереди
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogPipeline:
+    """
+    Очередь записей и поток-слушатель.
+
+    Вызовы логгеров из event loop только кладут запись в очередь; поток
+    забирает записи пачками (до LOG_BATCH_SIZE), маскирует и пишет, а
+    flush файлов делает один раз на пачку. Записи job-логгеров
+    (lime_frog.job.<id>) идут в файл задачи, остальные — в обработчики
+    приложения. Файлы задач открываются и закрываются командами в той же
+    очереди, поэтому закрытие не теряет записи, стоящие перед ним.
+    """
+
+    def __init__(self):
+        self.queue: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._app_handlers: List[logging.Handler] = []
+        self._job_handlers: Dict[str, logging.Handler] = {}  # имя логгера -> файл
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name='log-writer', daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def stop(self):
+        """Дописывает очередь и останавливает поток."""
+        if self._thread is not None:
+            self.queue.put(_STOP)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def set_app_handlers(self, handlers: List[logging.Handler]):
+        self.queue.put(('app', handlers))
+
+    def open_job(self, logger_name: str, handler: logging.Handler):
+        self.queue.put(('open', logger_name, handler))
+
+    def close_job(self, logger_name: str, job_id: str):
+        self.queue.put(('close', logger_name, job_id))
+
+    def _loop(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not self._write_batch(batch):
+                return
+
+    def _write_batch(self, batch: list) -> bool:
+        touched: Dict[int, logging.Handler] = {}
+        flushed: List[threading.Event] = []  # ожидающие flush_logs
+        running = True
+        for item in batch:
+            if item is _STOP:
+                running = False
+                continue
+            if isinstance(item, tuple):
+                if item[0] == 'flush':
+                    flushed.append(item[1])
+                else:
+                    self._control(item, touched)
+                continue
+            handler = self._job_handlers.get(item.name)
+            handlers = [handler] if handler else self._app_handlers
+            for handler in handlers:
+                if item.levelno < handler.level:
+                    continue
+                handler.in_batch = True
+                touched[id(handler)] = handler
+                handler.handle(item)
+        for handler in touched.values():
+            handler.in_batch = False
+            try:
+                handler.flush()
+            except (OSError, ValueError):
+                pass
+        for event in flushed:
+            event.set()
+        return running
+
+    def _control(self, item: tuple, touched: Dict[int, logging.Handler]):
+        command = item[0]
+        if command == 'app':
+            self._app_handlers = item[1]
+        elif command == 'open':
+            self._job_handlers[item[1]] = item[2]
+        elif command == 'close':
+            handler = self._job_handlers.pop(item[1], None)
+            if handler is not None:
+                touched.pop(id(handler), None)
+                handler.in_batch = False
+                handler.close()
+                # Сжатие и очистка — в своём потоке, чтобы не держать запись логов
+                _compress_executor.submit(_finish_job_log, item[2])
+
+
+_pipeline = LogPipeline()
+_compress_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='log-gzip')
 
 
 def setup_logging():
@@ -79,6 +283,9 @@ def setup_logging():
     Создаёт:
     - RotatingFileHandler для logs/app.log (10MB × 5 файлов)
     - StreamHandler для stdout (для journalctl)
+
+    Оба пишет поток конвейера (LogPipeline); в логгере остаётся только
+    QueueHandler, поэтому вызов лога не ждёт диска.
     """
     logger = logging.getLogger("lime_frog")
     logger.setLevel(logging.INFO)
@@ -87,7 +294,7 @@ def setup_logging():
     logger.handlers.clear()
 
     # Ротируемый файл для application логов
-    file_handler = RotatingFileHandler(
+    file_handler = _BatchRotatingFileHandler(
         APP_LOG_FILE,
         maxBytes=10 * 1024 * 1024,  # 10 MB
         backupCount=5,
@@ -95,19 +302,21 @@ def setup_logging():
     )
 
     # Формат: timestamp | level | module | message
-    file_formatter = logging.Formatter(
+    file_formatter = MaskingFormatter(
         '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
 
     # Дублируем в stdout для journalctl
-    console_handler = logging.StreamHandler()
+    console_handler = _BatchStreamHandler()
     console_handler.setFormatter(file_formatter)
-    logger.addHandler(console_handler)
 
-    logger.info("Logging configured: app.log + stdout")
+    _pipeline.set_app_handlers([file_handler, console_handler])
+    _pipeline.start()
+    logger.addHandler(_JobQueueHandler(_pipeline.queue))
+
+    logger.info("Logging configured: app.log + stdout (queued)")
 
     return logger
 
@@ -117,18 +326,32 @@ def get_job_log_path(job_id: str) -> Path:
     return LOG_DIR / f"seo_{job_id}.log"
 
 
-def create_job_logger(job_id: str) -> logging.Logger:
+def get_job_log_gz_path(job_id: str) -> Path:
+    """Путь к сжатому логу завершённого job."""
+    return LOG_DIR / f"seo_{job_id}.log.gz"
+
+
+def get_job_profile_base(job_id: str) -> Path:
+    """Путь профилей job без суффикса формата (logs/seo_<job_id>)."""
+    return LOG_DIR / f"seo_{job_id}"
+
+
+def create_job_logger(job_id: str, json_lines: bool = False) -> logging.Logger:
     """
-    Создаёт отдельный logger для конкретного job с FileHandler.
+    Создаёт отдельный logger для конкретного job.
+
+    Запись в файл идёт через очередь конвейера: логгер только кладёт
+    записи в очередь, файл пишет поток LogPipeline.
 
     ВАЖНО: После завершения job нужно вызвать cleanup_job_logger(job_id)
     чтобы закрыть handler и избежать утечки дескрипторов.
 
     Args:
         job_id: Уникальный идентификатор job
+        json_lines: писать лог в формате JSON lines (строка = JSON-объект)
 
     Returns:
-        Logger с настроенным FileHandler для logs/seo_<job_id>.log
+        Logger, пишущий в logs/seo_<job_id>.log
     """
     logger_name = f"lime_frog.job.{job_id}"
     logger = logging.getLogger(logger_name)
@@ -138,24 +361,30 @@ def create_job_logger(job_id: str) -> logging.Logger:
     # Очистить старые handlers если есть
     logger.handlers.clear()
 
-    # FileHandler для job-specific лога
+    # Файл задачи открывает и пишет поток конвейера
     job_log_path = get_job_log_path(job_id)
-    file_handler = logging.FileHandler(job_log_path, mode='w', encoding='utf-8')
-
-    # Формат: timestamp | level | job_id | message
-    formatter = logging.Formatter(
-        f'%(asctime)s | %(levelname)-8s | {job_id} | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    file_handler = _BatchFileHandler(job_log_path, mode='w', encoding='utf-8', delay=True)
+
+    if json_lines:
+        formatter = JsonLinesFormatter(job_id)
+    else:
+        # Формат: timestamp | level | job_id | message
+        formatter = MaskingFormatter(
+            f'%(asctime)s | %(levelname)-8s | {job_id} | %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    _register_job_log(job_id)
+    _pipeline.open_job(logger_name, file_handler)
+    _pipeline.start()
+    logger.addHandler(_JobQueueHandler(_pipeline.queue))
 
     return logger
 
 
 def cleanup_job_logger(job_id: str):
     """
-    Отцепляет и закрывает все handlers для job logger.
+    Отцепляет handlers job logger и закрывает файл после записей в очереди.
 
     ОБЯЗАТЕЛЬНО вызывать после завершения job (success/error/stopped)
     чтобы не было утечки file descriptors.
@@ -166,10 +395,118 @@ def cleanup_job_logger(job_id: str):
     logger_name = f"lime_frog.job.{job_id}"
     logger = logging.getLogger(logger_name)
 
-    # Закрыть и удалить все handlers
+    # Отцепить QueueHandler; файл закроет поток конвейера
     for handler in logger.handlers[:]:
-        handler.close()
         logger.removeHandler(handler)
+    _pipeline.close_job(logger_name, job_id)
+
+
+def flush_logs(timeout: float = 5.0) -> bool:
+    """Ждёт, пока поток конвейера запишет всё, что уже в очереди."""
+    done = threading.Event()
+    _pipeline.queue.put(('flush', done))
+    return done.wait(timeout)
+
+
+def set_log_dir(path: Path, timeout: float = 5.0):
+    """Переключает каталог логов job'ов (бенчмарк пишет во временный).
+
+    Сначала дописывает очередь и ждёт сжатия завершённых логов, чтобы они
+    остались в прежнем каталоге. Уже открытый обработчик app.log не
+    переносится.
+    """
+    global LOG_DIR, APP_LOG_FILE, JOB_LOG_INDEX
+    flush_logs(timeout)
+    _compress_executor.submit(lambda: None).result(timeout)
+    with _index_lock:
+        LOG_DIR = Path(path)
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        APP_LOG_FILE = LOG_DIR / "app.log"
+        JOB_LOG_INDEX = LOG_DIR / "jobs.index"
+        _gz_seek_cache.clear()
+
+
+def _job_files(job_id: str) -> List[Path]:
+    """Все файлы job: лог (текущий и сжатый) и профили."""
+    base = get_job_profile_base(job_id)
+    return [
+        base.with_name(base.name + suffix)
+        for suffix in ('.log', '.log.gz', '.prof', '.collapsed')
+    ]
+
+
+def _read_index() -> List[Tuple[float, str, str]]:
+    """Строки индекса: (время создания, job_id, строка целиком). Под _index_lock."""
+    if not JOB_LOG_INDEX.exists():
+        _rebuild_index()
+    entries = []
+    for line in JOB_LOG_INDEX.read_text(encoding='utf-8').splitlines():
+        parts = line.split(' ')
+        if len(parts) < 2:
+            continue
+        try:
+            entries.append((float(parts[0]), parts[1], line))
+        except ValueError:
+            continue
+    return entries
+
+
+def _write_index(lines: List[str]):
+    """Атомарно перезаписывает индекс. Под _index_lock."""
+    tmp_path = JOB_LOG_INDEX.with_suffix('.part')
+    tmp_path.write_text(''.join(f"{line}\n" for line in lines), encoding='utf-8')
+    os.replace(tmp_path, JOB_LOG_INDEX)
+
+
+def _parse_gz_seek(line: str) -> Optional[Tuple[int, List[int]]]:
+    parts = line.split(' ')
+    if len(parts) < 4:
+        return None
+    try:
+        return int(parts[2]), [int(value) for value in parts[3].split(',')]
+    except ValueError:
+        return None
+
+
+def _gz_seek_index(job_id: str) -> Optional[Tuple[int, List[int]]]:
+    """Размер и смещения членов сжатого лога (из памяти или индекса)."""
+    if job_id in _gz_seek_cache:
+        return _gz_seek_cache[job_id]
+    with _index_lock:
+        seek = None
+        for _, entry_id, line in _read_index():
+            if entry_id == job_id:
+                seek = _parse_gz_seek(line)
+        _gz_seek_cache[job_id] = seek
+    return seek
+
+
+def _register_job_log(job_id: str):
+    """Дописывает job в индекс хранения (по нему идёт очистка)."""
+    with _index_lock:
+        if not JOB_LOG_INDEX.exists():
+            _rebuild_index()
+        with open(JOB_LOG_INDEX, 'a', encoding='utf-8') as fh:
+            fh.write(f"{time.time():.0f} {job_id}\n")
+
+
+def _rebuild_index():
+    """Индекс по файлам каталога (один раз: при переходе со старой версии)."""
+    created: Dict[str, float] = {}
+    for entry in os.scandir(LOG_DIR):
+        match = _JOB_FILE_RE.match(entry.name)
+        if not match:
+            continue
+        try:
+            mtime = entry.stat().st_mtime
+        except OSError:
+            continue
+        job_id = match.group(1)
+        created[job_id] = min(created.get(job_id, mtime), mtime)
+    lines = [f"{ts:.0f} {job_id}\n" for job_id, ts in sorted(created.items(), key=lambda i: i[1])]
+    tmp_path = JOB_LOG_INDEX.with_suffix('.part')
+    tmp_path.write_text(''.join(lines), encoding='utf-8')
+    os.replace(tmp_path, JOB_LOG_INDEX)
 
 
 def cleanup_old_job_logs(max_age_days: int = MAX_JOB_LOG_AGE_DAYS,
@@ -179,45 +516,148 @@ def cleanup_old_job_logs(max_age_days: int = MAX_JOB_LOG_AGE_DAYS,
     1. Удаляются файлы старше max_age_days (по умолчанию 14 дней)
     2. Если файлов больше max_count, удаляются самые старые
 
+    Каталог не обходится: job'ы перечислены в индексе logs/jobs.index
+    в порядке создания, поэтому очистка читает один файл и удаляет
+    файлы только вытесняемых job'ов (лог, сжатый лог, профили). Вызывается
+    при старте и после сжатия каждого завершённого лога.
+
     Args:
         max_age_days: Максимальный возраст файла в днях
         max_count: Максимальное количество файлов
     """
-    log_files = list(LOG_DIR.glob(SEO_JOB_LOG_PATTERN))
+    with _index_lock:
+        entries = _read_index()
+
+        cutoff_time = time.time() - (max_age_days * 86400)
+        by_age = sum(1 for ts, _, _ in entries if ts < cutoff_time)
+        excess = max(0, len(entries) - by_age - max_count)
+        expired = entries[:by_age + excess]
+        if not expired:
+            return
+        _write_index([line for _, _, line in entries[by_age + excess:]])
+
+    for _, job_id, _ in expired:
+        _gz_seek_cache.pop(job_id, None)
+        for path in _job_files(job_id):
+            try:
+                path.unlink()
+            except OSError:
+                pass  # Файла нет (например, лог уже сжат)
 
-    if not log_files:
-        return
+    # Логируем результат очистки
+    logger = logging.getLogger("lime_frog")
+    logger.info(
+        f"Cleanup job logs: removed {by_age} old jobs (>{max_age_days}d), "
+        f"{excess} excess jobs (max={max_count})"
+    )
 
-    # Сортируем по времени модификации (старые первыми)
-    log_files_sorted = sorted(log_files, key=lambda f: f.stat().st_mtime)
 
-    # 1. Удаляем файлы старше max_age_days
-    cutoff_time = time.time() - (max_age_days * 86400)
-    deleted_by_age = 0
+def compress_job_log(job_id: str):
+    """
+    Сжимает лог завершённого job в .log.gz (несжатый удаляется).
 
-    for log_file in log_files_sorted[:]:
+    Файл — цепочка gzip-членов по LOG_GZ_MEMBER_BYTES несжатого текста
+    (обычный gzip для zcat и браузера); несжатый размер и смещения членов
+    записываются в строку job в индексе, чтобы хвост читался без
+    распаковки файла с начала.
+    """
+    log_path = get_job_log_path(job_id)
+    gz_path = get_job_log_gz_path(job_id)
+    tmp_path = gz_path.with_name(gz_path.name + '.part')
+    size = 0
+    members: List[int] = []
+    try:
+        with open(log_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            while True:
+                chunk = src.read(LOG_GZ_MEMBER_BYTES)
+                if not chunk and members:
+                    break
+                members.append(dst.tell())
+                dst.write(gzip.compress(chunk, compresslevel=6, mtime=0))
+                size += len(chunk)
+                if len(chunk) < LOG_GZ_MEMBER_BYTES:
+                    break
+        os.replace(tmp_path, gz_path)
+        _set_gz_seek_index(job_id, size, members)
+        log_path.unlink()
+    except OSError:
+        # Нет лога (job не писал) или диск: остаётся несжатый лог
         try:
-            if log_file.stat().st_mtime < cutoff_time:
-                log_file.unlink()
-                log_files_sorted.remove(log_file)
-                deleted_by_age += 1
+            tmp_path.unlink()
         except OSError:
-            pass  # Файл уже удалён или недоступен
+            pass
 
-    # 2. Если осталось больше max_count, удаляем самые старые
-    deleted_by_count = 0
-    if len(log_files_sorted) > max_count:
-        for old_file in log_files_sorted[:-max_count]:
-            try:
-                old_file.unlink()
-                deleted_by_count += 1
-            except OSError:
-                pass
 
-    # Логируем результат очистки
-    if deleted_by_age > 0 or deleted_by_count > 0:
-        logger = logging.getLogger("lime_frog")
-        logger.info(
-            f"Cleanup job logs: removed {deleted_by_age} old files (>{max_age_days}d), "
-            f"{deleted_by_count} excess files (max={max_count})"
-        )
+def _set_gz_seek_index(job_id: str, size: int, members: List[int]):
+    """Дописывает в строку job индекса размер и смещения членов .gz."""
+    seek = (size, members)
+    with _index_lock:
+        lines = []
+        for _, entry_id, line in _read_index():
+            if entry_id == job_id:
+                ts = line.split(' ', 1)[0]
+                line = f"{ts} {job_id} {size} {','.join(map(str, members))}"
+            lines.append(line)
+        _write_index(lines)
+        _gz_seek_cache[job_id] = seek
+
+
+def _finish_job_log(job_id: str):
+    compress_job_log(job_id)
+    cleanup_old_job_logs()
+
+
+def read_job_log(job_id: str, offset: int, limit: int = LOG_TAIL_MAX_BYTES) -> Optional[Tuple[bytes, int, int]]:
+    """
+    Байты лога job начиная с offset (смещение в несжатом тексте).
+
+    Возвращаются только целые строки, не больше limit байт. Сжатый лог
+    читается так же (смещения совпадают): по индексу поиска распаковывается
+    только член с offset и следующие, а дочитанный до конца лог вообще не
+    открывается.
+
+    Returns:
+        (данные, новое смещение, размер лога) или None, если лога нет
+    """
+    log_path = get_job_log_path(job_id)
+    gz_path = get_job_log_gz_path(job_id)
+    try:
+        with open(log_path, 'rb') as fh:
+            size = os.fstat(fh.fileno()).st_size
+            offset = max(0, min(offset, size))
+            fh.seek(offset)
+            data = fh.read(limit)
+    except FileNotFoundError:
+        # Лог сжат (возможно, между попытками)
+        if not gz_path.exists():
+            return None
+        seek = _gz_seek_index(job_id)
+        try:
+            if seek is None:
+                # Лог сжат до появления индекса поиска: распаковка с начала
+                with gzip.open(gz_path, 'rb') as fh:
+                    size = fh.seek(0, io.SEEK_END)
+                    offset = max(0, min(offset, size))
+                    fh.seek(offset)
+                    data = fh.read(limit)
+            else:
+                size, members = seek
+                offset = max(0, min(offset, size))
+                if offset >= size:
+                    return b'', offset, size
+                member = min(offset // LOG_GZ_MEMBER_BYTES, len(members) - 1)
+                with open(gz_path, 'rb') as raw:
+                    raw.seek(members[member])
+                    with gzip.GzipFile(fileobj=raw, mode='rb') as fh:
+                        fh.seek(offset - member * LOG_GZ_MEMBER_BYTES)
+                        data = fh.read(limit)
+        except FileNotFoundError:
+            return None  # вытеснен очисткой
+    # Только целые строки: последняя может ещё дописываться. Строку
+    # длиннее limit отдаём кусками, иначе хвост на ней застрянет
+    cut = data.rfind(b'\n')
+    if cut >= 0:
+        data = data[:cut + 1]
+    elif len(data) < limit:
+        data = b''
+    return data, offset + len(data), size
@@ -2,11 +2,26 @@ const startBtn = document.getElementById('start-btn');
 const stopBtn = document.getElementById('stop-btn');
 const downloadBtn = document.getElementById('download-btn');
 const downloadXlsxBtn = document.getElementById('download-xlsx-btn');
+const reanalyzeBtn = document.getElementById('reanalyze-btn');
+const warcBtn = document.getElementById('warc-btn');
+const reportsBox = document.getElementById('reports');
+
+// Названия отчётов анализа по всем страницам задачи
+const REPORT_LABELS = {
+  duplicates: 'Отчёт: почти-дубли',
+  links: 'Отчёт: битые ссылки',
+  images: 'Отчёт: изображения',
+  graph: 'Отчёт: граф ссылок',
+};
 const headingDownloadBtn = document.getElementById('heading-download-btn');
 const clearBtn = document.getElementById('clear-btn');
 const statusEl = document.getElementById('status');
 const progressFill = document.getElementById('progress-fill');
 const resourceEl = document.getElementById('resource');
+const resultsLive = document.getElementById('results-live');
+const resultsLiveBody = document.getElementById('results-live-body');
+const jobLogEl = document.getElementById('job-log');
+const jobLogText = document.getElementById('job-log-text');
 const badge = document.getElementById('job-badge');
 const settingsBlock = document.getElementById('settings');
 const toggleSettings = document.getElementById('toggle-settings');
@@ -19,6 +34,16 @@ const toolViews = document.querySelectorAll('[data-tool-view]');
 const TOOL_STORAGE_KEY = 'active-tool';
 
 let pollTimer = null;
+let eventSource = null;
+let fallbackTimers = [];
+let resultsCursor = 0;
+let resultsLoading = false;
+let resultsTarget = 0;
+const LIVE_ROWS_LIMIT = 100; // Сколько последних строк держать в таблице
+let logJobId = null;
+let logOffset = 0;
+let logLoading = false;
+let logFinished = false;
 let jobId = localStorage.getItem('seo-job-id');
 
 // Генерация уникального ID сессии для данной вкладки
@@ -88,6 +113,9 @@ function saveAllData() {
     concurrency: document.getElementById('concurrency').value,
     timeout: document.getElementById('timeout').value,
     retries: document.getElementById('retries').value,
+    crawl_depth: document.getElementById('crawl-depth').value,
+    crawl_max_pages: document.getElementById('crawl-max-pages').value,
+    sitemap_discovery: document.getElementById('sitemap-discovery').checked,
     filename: document.getElementById('filename').value
   };
   localStorage.setItem(STORAGE_KEYS.RUNTIME, JSON.stringify(runtime));
@@ -124,6 +152,9 @@ function loadAllData() {
       if (runtime.concurrency) document.getElementById('concurrency').value = runtime.concurrency;
       if (runtime.timeout) document.getElementById('timeout').value = runtime.timeout;
       if (runtime.retries) document.getElementById('retries').value = runtime.retries;
+      if (runtime.crawl_depth) document.getElementById('crawl-depth').value = runtime.crawl_depth;
+      if (runtime.crawl_max_pages) document.getElementById('crawl-max-pages').value = runtime.crawl_max_pages;
+      if ('sitemap_discovery' in runtime) document.getElementById('sitemap-discovery').checked = runtime.sitemap_discovery;
       if (runtime.filename) document.getElementById('filename').value = runtime.filename;
     } catch (e) {
       console.error('Ошибка загрузки параметров:', e);
@@ -219,15 +250,20 @@ document.querySelectorAll('input[type="checkbox"]').forEach(checkbox => {
   });
 });
 
+function collectOptions() {
+  const options = {};
+  document.querySelectorAll('input[type="checkbox"][data-option]').forEach(cb => {
+    options[cb.dataset.option] = cb.checked;
+  });
+  return options;
+}
+
 async function startJob() {
   const urls = document.getElementById('urls').value.trim();
   if (!urls) { setStatus('Добавьте хотя бы один домен'); return; }
   // Сохранить данные перед запуском
   saveAllData();
-  const options = {};
-  document.querySelectorAll('input[type="checkbox"][data-option]').forEach(cb => {
-    options[cb.dataset.option] = cb.checked;
-  });
+  const options = collectOptions();
   const payload = {
     urls,
     options,
@@ -235,6 +271,14 @@ async function startJob() {
       concurrency: Number(document.getElementById('concurrency').value || 3),
       timeout_seconds: Number(document.getElementById('timeout').value || 15),
       retries: Number(document.getElementById('retries').value || 2),
+      crawl_depth: Number(document.getElementById('crawl-depth').value || 0),
+      crawl_max_pages: Number(document.getElementById('crawl-max-pages').value || 100),
+      sitemap_discovery: document.getElementById('sitemap-discovery').checked ? 1 : 0,
+      profile: document.getElementById('profile-job').checked ? 1 : 0,
+      memory_budget_mb: Number(document.getElementById('memory-budget').value || 0),
+      trace_memory: document.getElementById('trace-memory').checked ? 1 : 0,
+      json_log: document.getElementById('json-log').checked ? 1 : 0,
+      snapshot: document.getElementById('snapshot-job').checked ? 1 : 0,
     }
   };
   startBtn.disabled = true;
@@ -247,8 +291,33 @@ async function startJob() {
     if (!res.ok) throw new Error(data.error || 'Ошибка запуска');
     jobId = data.job_id;
     localStorage.setItem('seo-job-id', jobId);
+    resetLiveResults();
+    badge.style.display = 'inline-flex';
+    watchJob();
+  } catch (err) {
+    setStatus(err.message);
+    startBtn.disabled = false;
+    stopBtn.disabled = true;
+  }
+}
+
+// Повторный анализ завершённой задачи по снимку ответов (без запросов к сайтам)
+async function reanalyzeJob() {
+  if (!jobId) return;
+  saveAllData();
+  startBtn.disabled = true;
+  reanalyzeBtn.disabled = true;
+  stopBtn.disabled = false;
+  setStatus('Запуск повторного анализа...');
+  try {
+    const res = await fetch(`/api/job/${jobId}/reanalyze`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ options: collectOptions() }) });
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.error || 'Ошибка запуска');
+    jobId = data.job_id;
+    localStorage.setItem('seo-job-id', jobId);
+    resetLiveResults();
     badge.style.display = 'inline-flex';
-    pollStatus();
+    watchJob();
   } catch (err) {
     setStatus(err.message);
     startBtn.disabled = false;
@@ -256,6 +325,206 @@ async function startJob() {
   }
 }
 
+function resetMissingJob() {
+  localStorage.removeItem('seo-job-id');
+  jobId = null;
+  badge.style.display = 'none';
+  setStatus('Задача не найдена');
+  startBtn.disabled = false;
+  stopBtn.disabled = true;
+  downloadBtn.disabled = true;
+}
+
+function applyStats(data) {
+  activeUsersEl.textContent = data.active_users || 0;
+  queueCountEl.textContent = data.queued || 0;
+}
+
+// ========== Живая таблица результатов ==========
+function resetLiveResults() {
+  resultsCursor = 0;
+  resultsTarget = 0;
+  resultsLiveBody.replaceChildren();
+  resultsLive.style.display = 'none';
+}
+
+function appendLiveRow(index, row) {
+  const tr = document.createElement('tr');
+  [String(index + 1), row['URL'] || '', row['Код ответа'] || '', row['Title'] || ''].forEach(value => {
+    const td = document.createElement('td');
+    td.textContent = value;
+    td.title = value;
+    tr.appendChild(td);
+  });
+  resultsLiveBody.prepend(tr);
+  while (resultsLiveBody.children.length > LIVE_ROWS_LIMIT) {
+    resultsLiveBody.lastChild.remove();
+  }
+}
+
+// Догружает строки, завершённые после resultsCursor
+async function fetchNewResults(completed) {
+  resultsTarget = Math.max(resultsTarget, completed);
+  if (!jobId || resultsLoading || completed <= resultsCursor) return;
+  resultsLoading = true;
+  // Старые строки всё равно не поместятся в таблицу — перескакиваем
+  resultsCursor = Math.max(resultsCursor, completed - LIVE_ROWS_LIMIT);
+  try {
+    let hasMore = true;
+    while (hasMore && jobId) {
+      const res = await fetch(`/api/job/${jobId}/results?cursor=${resultsCursor}&limit=${LIVE_ROWS_LIMIT}`);
+      if (!res.ok) break;
+      const data = await res.json();
+      data.rows.forEach(item => appendLiveRow(item.index, item.row));
+      resultsCursor = data.cursor;
+      hasMore = data.has_more;
+    }
+    if (resultsLiveBody.children.length) resultsLive.style.display = 'block';
+  } catch (e) {
+    /* ignore */
+  } finally {
+    resultsLoading = false;
+  }
+  // Пока грузили, могли завершиться новые строки
+  if (resultsTarget > resultsCursor) fetchNewResults(resultsTarget);
+}
+
+// Хвост лога задачи: только новые строки с последнего смещения
+async function tailLog() {
+  if (!jobId || !jobLogEl.open || logLoading) return;
+  if (logJobId !== jobId) {
+    logJobId = jobId;
+    logOffset = 0;
+    jobLogText.textContent = '';
+  }
+  logLoading = true;
+  let complete = true;
+  try {
+    const res = await fetch(`/api/job/${jobId}/log?offset=${logOffset}`);
+    if (res.ok) {
+      const data = await res.json();
+      if (data.text) {
+        jobLogText.textContent += data.text;
+        jobLogText.scrollTop = jobLogText.scrollHeight;
+      }
+      logOffset = data.offset;
+      complete = data.complete;
+    }
+  } catch (e) {
+    /* ignore */
+  } finally {
+    logLoading = false;
+  }
+  // Последние строки завершённой задачи дописываются чуть позже статуса
+  if (!complete && logFinished) setTimeout(tailLog, 1000);
+}
+
+// Возвращает true, если задача завершена
+// Кнопки скачивания отчётов (появляются после завершения задачи)
+function renderReports(reports, profiles) {
+  reportsBox.innerHTML = '';
+  const addButton = (label, href) => {
+    const btn = document.createElement('button');
+    btn.className = 'secondary';
+    btn.textContent = label;
+    btn.addEventListener('click', () => { window.location.href = href; });
+    reportsBox.appendChild(btn);
+  };
+  (reports || []).forEach(name => {
+    addButton(
+      REPORT_LABELS[name] || `Отчёт: ${name}`,
+      `/api/job/${jobId}/report/${encodeURIComponent(name)}`,
+    );
+  });
+  (profiles || []).forEach(fmt => {
+    addButton(`Профиль (${fmt})`, `/api/job/${jobId}/profile?format=${fmt}`);
+  });
+  reportsBox.style.display = reportsBox.children.length ? 'flex' : 'none';
+}
+
+function applyStatus(data) {
+  const { status, completed, total, error, queue_position } = data;
+  fetchNewResults(completed);
+  renderReports(data.reports, data.profile);
+  logFinished = ['completed', 'stopped', 'error'].includes(status);
+  tailLog();
+  const pct = total ? Math.round((completed / total) * 100) : 0;
+  progressFill.style.width = pct + '%';
+
+  // Отобразить позицию в очереди
+  let statusText = '';
+  if (status === 'queued' && queue_position > 0) {
+    statusText = `В очереди: позиция ${queue_position}`;
+    badge.style.display = 'inline-flex';
+    badge.textContent = `В очереди #${queue_position}`;
+  } else if (status === 'running') {
+    statusText = `Статус: выполняется. ${completed}/${total}`;
+    badge.style.display = 'inline-flex';
+    badge.textContent = 'Задача активна';
+  } else {
+    statusText = `Статус: ${status}. Выполнено ${completed}/${total}`;
+    badge.style.display = 'none';
+  }
+
+  if (error) statusText += `, ошибка: ${error}`;
+  setStatus(statusText);
+
+  stopBtn.disabled = status !== 'running' && status !== 'queued';
+  reanalyzeBtn.disabled = true;
+  warcBtn.disabled = true;
+  if (status === 'completed' || status === 'stopped' || status === 'error') {
+    startBtn.disabled = false;
+    downloadBtn.disabled = !data.has_results;
+    downloadXlsxBtn.disabled = !data.has_results;
+    // Снимок есть только у задач с флажком «Сохранять снимок ответов»
+    const hasSnapshot = Boolean(data.snapshot && data.snapshot.urls && !data.snapshot.recording);
+    reanalyzeBtn.disabled = !hasSnapshot;
+    warcBtn.disabled = !hasSnapshot;
+    warcBtn.title = hasSnapshot
+      ? 'Все ответы задачи в формате WARC'
+      : 'Нужен флажок «Сохранять снимок ответов» при запуске задачи (или снимок уже вытеснен)';
+    if (headingDownloadBtn) headingDownloadBtn.disabled = !data.has_results;
+    if (!data.has_results) localStorage.removeItem('seo-job-id');
+    return true;
+  }
+  return false;
+}
+
+// ========== Поток событий (SSE) ==========
+// Один поток на вкладку: прогресс задачи, очередь и регистрация вкладки
+// как активной (вместо heartbeat). Если сервер отказал в потоке —
+// откатываемся на периодический опрос.
+function openEvents() {
+  if (!window.EventSource) { startFallbackPolling(); return; }
+  if (eventSource) eventSource.close();
+
+  const params = new URLSearchParams({ session_id: sessionId });
+  if (jobId) params.append('job_id', jobId);
+  eventSource = new EventSource(`/api/events?${params.toString()}`);
+
+  eventSource.addEventListener('stats', (e) => applyStats(JSON.parse(e.data)));
+  eventSource.addEventListener('status', (e) => applyStatus(JSON.parse(e.data)));
+  eventSource.addEventListener('job_missing', () => resetMissingJob());
+  eventSource.onerror = () => {
+    // CLOSED — сервер ответил ошибкой (например, 503 при лимите потоков)
+    if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+      eventSource = null;
+      startFallbackPolling();
+    }
+  };
+}
+
+function startFallbackPolling() {
+  if (fallbackTimers.length) return;
+  fallbackTimers = [
+    setInterval(fetchStats, 3000),
+    setInterval(sendHeartbeat, 5000),
+  ];
+  fetchStats();
+  sendHeartbeat();
+  if (jobId) pollStatus();
+}
+
 async function pollStatus() {
   if (!jobId) return;
   clearInterval(pollTimer);
@@ -263,52 +532,21 @@ async function pollStatus() {
     const res = await fetch(`/api/job/${jobId}`);
     if (res.status === 404) {
       clearInterval(pollTimer);
-      localStorage.removeItem('seo-job-id');
-      jobId = null;
-      badge.style.display = 'none';
-      setStatus('Задача не найдена');
-      startBtn.disabled = false;
-      stopBtn.disabled = true;
-      downloadBtn.disabled = true;
+      resetMissingJob();
       return;
     }
     const data = await res.json();
-    const { status, completed, total, error, queue_position } = data;
-    const pct = total ? Math.round((completed / total) * 100) : 0;
-    progressFill.style.width = pct + '%';
-
-    // Отобразить позицию в очереди
-    let statusText = '';
-    if (status === 'queued' && queue_position > 0) {
-      statusText = `В очереди: позиция ${queue_position}`;
-      badge.style.display = 'inline-flex';
-      badge.textContent = `В очереди #${queue_position}`;
-    } else if (status === 'running') {
-      statusText = `Статус: выполняется. ${completed}/${total}`;
-      badge.style.display = 'inline-flex';
-      badge.textContent = 'Задача активна';
-    } else {
-      statusText = `Статус: ${status}. Выполнено ${completed}/${total}`;
-      badge.style.display = 'none';
-    }
-
-    if (error) statusText += `, ошибка: ${error}`;
-    setStatus(statusText);
-
-    stopBtn.disabled = status !== 'running' && status !== 'queued';
-    if (status === 'completed' || status === 'stopped' || status === 'error') {
-      clearInterval(pollTimer);
-      startBtn.disabled = false;
-      downloadBtn.disabled = !data.has_results;
-      downloadXlsxBtn.disabled = !data.has_results;
-      if (headingDownloadBtn) headingDownloadBtn.disabled = !data.has_results;
-      if (!data.has_results) localStorage.removeItem('seo-job-id');
-    }
+    if (applyStatus(data)) clearInterval(pollTimer);
   };
   await fetchStatus();
   pollTimer = setInterval(fetchStatus, 2000);
 }
 
+function watchJob() {
+  if (fallbackTimers.length) pollStatus();
+  else openEvents();
+}
+
 async function stopJob() {
   if (!jobId) return;
   await fetch(`/api/job/${jobId}/stop`, { method: 'POST' });
@@ -333,6 +571,11 @@ async function downloadXlsx() {
   window.location.href = url;
 }
 
+function downloadWarc() {
+  if (!jobId) return;
+  window.location.href = `/api/job/${jobId}/export/warc`;
+}
+
 async function downloadHeadingsXlsx() {
   if (!jobId) return;
   const customName = document.getElementById('filename').value.trim();
@@ -351,6 +594,8 @@ async function downloadHeadingsXlsx() {
   const params = new URLSearchParams();
   if (customName) params.append('filename', customName);
   if (enabledHeadings.length > 0) params.append('headings', enabledHeadings.join(','));
+  const layoutSelect = document.getElementById('heading-layout');
+  if (layoutSelect && layoutSelect.value !== 'grouped') params.append('layout', layoutSelect.value);
 
   if (params.toString()) {
     url += '?' + params.toString();
@@ -360,11 +605,13 @@ async function downloadHeadingsXlsx() {
 
 async function fetchResource() {
   try {
-    const res = await fetch('/api/resource');
+    // История не нужна: строка показывает только последний снимок
+    const res = await fetch('/api/resource?history=0');
     const data = await res.json();
-    if (data.available) {
+    if (data.available && data.sample) {
+      const netKb = Math.round(data.sample.net_recv_per_sec / 1024);
       resourceEl.style.display = 'block';
-      resourceEl.textContent = `CPU: ${data.cpu}% | RAM: ${data.memory_percent}%`;
+      resourceEl.textContent = `CPU: ${data.cpu}% | RAM: ${data.memory_percent}% | Сеть: ${netKb} КБ/с`;
     }
   } catch (e) {
     /* ignore */
@@ -374,19 +621,19 @@ async function fetchResource() {
 async function fetchStats() {
   try {
     const res = await fetch('/api/stats');
-    const data = await res.json();
-    // Всегда показывать статистику
-    activeUsersEl.textContent = data.active_users || 0;
-    queueCountEl.textContent = data.queued || 0;
+    applyStats(await res.json());
   } catch (e) {
     /* ignore */
   }
 }
 
 startBtn.addEventListener('click', startJob);
+jobLogEl.addEventListener('toggle', tailLog);
 stopBtn.addEventListener('click', stopJob);
 downloadBtn.addEventListener('click', downloadCsv);
 downloadXlsxBtn.addEventListener('click', downloadXlsx);
+reanalyzeBtn.addEventListener('click', reanalyzeJob);
+warcBtn.addEventListener('click', downloadWarc);
 if (headingDownloadBtn) headingDownloadBtn.addEventListener('click', downloadHeadingsXlsx);
 clearBtn.addEventListener('click', clearAllData);
 
@@ -395,14 +642,13 @@ document.getElementById('urls').addEventListener('change', saveAllData);
 document.getElementById('concurrency').addEventListener('change', saveAllData);
 document.getElementById('timeout').addEventListener('change', saveAllData);
 document.getElementById('retries').addEventListener('change', saveAllData);
+document.getElementById('crawl-depth').addEventListener('change', saveAllData);
+document.getElementById('crawl-max-pages').addEventListener('change', saveAllData);
+document.getElementById('sitemap-discovery').addEventListener('change', saveAllData);
 document.getElementById('filename').addEventListener('change', saveAllData);
 document.querySelectorAll('input[type="checkbox"][data-option]').forEach(cb => {
   cb.addEventListener('change', saveAllData);
 });
 
-if (jobId) { pollStatus(); }
+openEvents(); // Поток событий заменяет опрос статуса, статистики и heartbeat
 setInterval(fetchResource, 5000);
-setInterval(fetchStats, 3000);
-setInterval(sendHeartbeat, 5000); // Отправлять heartbeat каждые 5 секунд
-fetchStats(); // Загрузить сразу
-sendHeartbeat(); // Отправить сразу при загрузке
@@ -0,0 +1,206 @@
+"""
+Фоновая сборка и кэш файлов экспорта.
+
+Файлы собираются в отдельном потоке (не в потоке запроса gunicorn),
+пишутся во временный файл в exports/ и атомарно переименовываются.
+Каждый артефакт собирается один раз на (job, формат, опции) и отдаётся
+скачиванием с ETag/Last-Modified/Range; давно не запрошенные артефакты
+вытесняются при превышении лимитов кэша.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+EXPORT_DIR = PROJECT_ROOT / "exports"
+
+# Сколько запрос скачивания ждёт сборку (меньше timeout gunicorn = 120s)
+EXPORT_WAIT_SECONDS = 100
+
+# Лимиты кэша артефактов
+EXPORT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB
+EXPORT_CACHE_MAX_FILES = 200
+# Артефакты, запрошенные недавно, не вытесняются (могут отдаваться прямо сейчас)
+EXPORT_EVICT_GRACE_SECONDS = 120
+
+logger = logging.getLogger("lime_frog")
+
+
+@dataclass
+class Artifact:
+    """Один файл экспорта: сборка (future), путь и время последнего запроса."""
+
+    job_id: str
+    key: str
+    path: Path
+    future: Future
+    last_access: float
+
+    @property
+    def state(self) -> str:
+        if not self.future.done():
+            return "building"
+        return "error" if self.future.exception() else "ready"
+
+
+class ExportStore:
+    """Собирает и кэширует файлы экспорта по ключу (job_id, формат, опции)."""
+
+    def __init__(
+        self,
+        export_dir: Path = EXPORT_DIR,
+        max_workers: int = 1,
+        max_bytes: int = EXPORT_CACHE_MAX_BYTES,
+        max_files: int = EXPORT_CACHE_MAX_FILES,
+        on_change: Optional[Callable[[], None]] = None,
+    ):
+        self._dir = export_dir
+        self._dir.mkdir(exist_ok=True)
+        # Задачи живут только в памяти: файлы прошлого запуска недостижимы
+        for leftover in self._dir.iterdir():
+            try:
+                leftover.unlink()
+            except OSError:
+                pass
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="export"
+        )
+        self._artifacts: Dict[Tuple[str, str], Artifact] = {}
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+        self._max_files = max_files
+        self._on_change = on_change
+
+    @staticmethod
+    def artifact_key(fmt: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """Ключ артефакта: формат + короткий хэш опций."""
+        if not options:
+            return fmt
+        digest = hashlib.sha1(
+            json.dumps(options, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:10]
+        return f"{fmt}-{digest}"
+
+    def submit(
+        self,
+        job_id: str,
+        fmt: str,
+        build: Callable[[str], None],
+        options: Optional[Dict[str, Any]] = None,
+        ext: Optional[str] = None,
+    ) -> Future:
+        """Возвращает сборку артефакта, ставя её в очередь при необходимости.
+
+        build(path) должен записать файл по переданному пути.
+        Повторный вызов с тем же ключом не пересобирает готовый файл.
+        """
+        key = self.artifact_key(fmt, options)
+        now = time.time()
+        with self._lock:
+            artifact = self._artifacts.get((job_id, key))
+            if artifact and artifact.state != "error" and (
+                artifact.state == "building" or artifact.path.exists()
+            ):
+                artifact.last_access = now
+                return artifact.future
+
+            path = self._dir / f"{job_id}-{key}.{ext or fmt}"
+            future = self._executor.submit(self._build, job_id, key, path, build)
+            self._artifacts[(job_id, key)] = Artifact(
+                job_id=job_id, key=key, path=path, future=future, last_access=now
+            )
+        future.add_done_callback(lambda _: self._after_build())
+        return future
+
+    def _build(
+        self, job_id: str, key: str, path: Path, build: Callable[[str], None]
+    ) -> Path:
+        started = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir, suffix=".part")
+        os.close(fd)
+        try:
+            build(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            logger.exception(f"Export build failed: job={job_id} key={key}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        logger.info(
+            f"Export built: job={job_id} key={key} "
+            f"size={path.stat().st_size} in {time.time() - started:.1f}s"
+        )
+        return path
+
+    def _after_build(self):
+        self._evict()
+        if self._on_change:
+            self._on_change()
+
+    def _evict(self):
+        """Вытесняет давно не запрошенные готовые артефакты сверх лимитов."""
+        with self._lock:
+            ready: List[Tuple[Artifact, int]] = []
+            for artifact in self._artifacts.values():
+                if artifact.state != "ready":
+                    continue
+                try:
+                    ready.append((artifact, artifact.path.stat().st_size))
+                except OSError:
+                    continue
+
+            total_bytes = sum(size for _, size in ready)
+            total_files = len(ready)
+            grace_cutoff = time.time() - EXPORT_EVICT_GRACE_SECONDS
+
+            for artifact, size in sorted(ready, key=lambda item: item[0].last_access):
+                if total_bytes <= self._max_bytes and total_files <= self._max_files:
+                    break
+                if artifact.last_access > grace_cutoff:
+                    break
+                try:
+                    artifact.path.unlink()
+                except OSError:
+                    pass
+                del self._artifacts[(artifact.job_id, artifact.key)]
+                total_bytes -= size
+                total_files -= 1
+
+    def describe(self, job_id: str) -> Dict[str, str]:
+        """Состояния артефактов задачи: ключ -> building / ready / error."""
+        with self._lock:
+            return {
+                artifact.key: artifact.state
+                for artifact in self._artifacts.values()
+                if artifact.job_id == job_id
+            }
+
+    def details(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """Подробности по артефактам задачи (для /api/job/<id>/exports)."""
+        with self._lock:
+            artifacts = [a for a in self._artifacts.values() if a.job_id == job_id]
+        result: Dict[str, Dict[str, Any]] = {}
+        for artifact in artifacts:
+            info: Dict[str, Any] = {"state": artifact.state}
+            if info["state"] == "ready":
+                try:
+                    stat = artifact.path.stat()
+                    info["size"] = stat.st_size
+                    info["updated_at"] = stat.st_mtime
+                except OSError:
+                    info["state"] = "evicted"
+            elif info["state"] == "error":
+                info["error"] = str(artifact.future.exception())
+            result[artifact.key] = info
+        return result
@@ -1,4 +1,4 @@
-import secrets
+import hashlib
 from typing import Tuple
 
 import httpx
@@ -13,7 +13,9 @@ async def check_404(ctx: CheckContext) -> Tuple[str, str, str]:
     Возвращает кортеж: (URL, код_ответа, корректность)
     """
     base_url = ctx.final_url if ctx.final_url else ctx.normalized_url
-    token = secrets.token_hex(5)
+    # Несуществующий путь детерминирован по URL страницы: так ответ
+    # попадает в снимок задачи и воспроизводится при повторном анализе
+    token = hashlib.sha1(base_url.encode("utf-8")).hexdigest()[:10]
     test_url = base_url.rstrip("/") + f"/{token}"
     resp = await fetch_with_retries(ctx.client, test_url, ctx.runtime)
     if not resp:
@@ -1,29 +1,79 @@
-from typing import Dict
+import asyncio
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
 
 import httpx
 
-from ...context import CheckContext
+from ...config import RuntimeOptions
+from ...context import CheckContext, JobCache
 from ...network.fetcher import fetch_with_retries
+from ...parsers.robots import GOOGLEBOT_USER_AGENT, ROBOTS_USER_AGENT, RobotsTxt
+
+
+async def _load_robots(
+    client: httpx.AsyncClient, runtime: RuntimeOptions, origin: str
+) -> Tuple[str, Optional[RobotsTxt]]:
+    """Скачивает и разбирает robots.txt: (код ответа, RobotsTxt или None)."""
+    resp = await fetch_with_retries(client, origin + "/robots.txt", runtime)
+    if not resp:
+        return "", None
+    status = str(resp.status_code)
+    if resp.status_code == 200:
+        return status, RobotsTxt(resp.text)
+    return status, None
+
+
+async def fetch_robots(
+    client: httpx.AsyncClient,
+    runtime: RuntimeOptions,
+    origin: str,
+    cache: Optional[JobCache] = None,
+) -> Tuple[str, Optional[RobotsTxt]]:
+    """robots.txt origin-а: один запрос и один разбор на задачу (cache)."""
+    if cache is None:
+        return await _load_robots(client, runtime, origin)
+    task = cache.robots.get(origin)
+    if task is None:
+        task = asyncio.ensure_future(_load_robots(client, runtime, origin))
+        cache.robots[origin] = task
+    return await task
+
+
+async def get_robots(ctx: CheckContext, origin: str) -> Tuple[str, Optional[RobotsTxt]]:
+    """robots.txt origin-а для проверки страницы (общий кэш задачи)."""
+    return await fetch_robots(ctx.client, ctx.runtime, origin, ctx.cache)
+
+
+def _verdict_text(status: str, robots: Optional[RobotsTxt], url: str, user_agent: str) -> str:
+    if robots is not None:
+        return "да" if robots.allowed(url, user_agent) else "нет"
+    if status.startswith("4"):
+        return "да"  # нет robots.txt — ограничений нет
+    if status.startswith("5"):
+        return "нет"  # сервер недоступен — Google считает всё запрещённым
+    return ""
 
 
 async def check_robots(ctx: CheckContext) -> Dict[str, str]:
     base_url = ctx.final_url if ctx.final_url else ctx.normalized_url
-    robots_url = base_url.rstrip("/") + "/robots.txt"
-    resp = await fetch_with_retries(ctx.client, robots_url, ctx.runtime)
-    result = {"Robots 200": "", "Robots Disallow": "", "Robots Sitemap": ""}
-    if not resp:
+    parsed = urlparse(base_url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    status, robots = await get_robots(ctx, origin)
+    result = {
+        "Robots 200": "",
+        "Robots Disallow": "",
+        "Robots Sitemap": "",
+        "Robots доступ": "",
+        "Robots Googlebot": "",
+    }
+    if not status:
         return result
-    result["Robots 200"] = "200" if resp.status_code == 200 else str(resp.status_code)
-    if resp.status_code == 200:
-        body = resp.text.lower()
-        # Собираем все Disallow директивы
-        disallows = []
-        for line in resp.text.split("\n"):
-            line_lower = line.lower().strip()
-            if line_lower.startswith("disallow:"):
-                path = line[9:].strip()  # Берем после "disallow:"
-                if path:
-                    disallows.append(path)
-        result["Robots Disallow"] = " | ".join(disallows) if disallows else ""
-        result["Robots Sitemap"] = "да" if "sitemap: " in body else "нет"
+    result["Robots 200"] = status
+    if robots is not None:
+        result["Robots Disallow"] = " | ".join(robots.disallows)
+        result["Robots Sitemap"] = "да" if robots.sitemaps else "нет"
+    result["Robots доступ"] = _verdict_text(status, robots, base_url, ROBOTS_USER_AGENT)
+    result["Robots Googlebot"] = _verdict_text(
+        status, robots, base_url, GOOGLEBOT_USER_AGENT
+    )
     return result
@@ -1,13 +1,16 @@
 import asyncio
+import inspect
+import logging
 import secrets
 import string
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import httpx
 from bs4 import BeautifulSoup
 
+from . import metrics
 from .config import CheckOptions, RuntimeOptions
-from .context import CheckContext
+from .context import CheckContext, JobCache
 from .network.fetcher import fetch_with_retries, BROWSER_HEADERS
 from .network.url import normalize_url
 from .parsers.meta import extract_title, extract_description, extract_html_lang, extract_canonical, parse_robots_meta
@@ -18,6 +21,9 @@ from .checkers.seo.headings import check_h1, collect_headings, find_heading_dupl
 from .checkers.seo.images import check_images_alt
 from .checkers.seo.structure import build_html_structure
 from .checkers.cms.detect import check_cms
+from .timings import TIMING_COLUMNS, PageTimings
+
+logger = logging.getLogger("lime_frog")
 
 CSV_COLUMNS_BASE = [
     "URL",
@@ -35,6 +41,8 @@ CSV_COLUMNS_BASE = [
     "Robots 200",
     "Robots Disallow",
     "Robots Sitemap",
+    "Robots доступ",
+    "Robots Googlebot",
     "Ссылка на стр.404",
     "Код стр.404",
     "Корректность 404",
@@ -76,7 +84,15 @@ def get_active_columns(check_options: CheckOptions, max_alts: int = 0) -> List[s
         cols.append("Sitemap 200")
 
     if check_options.check_robots:
-        cols.extend(["Robots 200", "Robots Disallow", "Robots Sitemap"])
+        cols.extend(
+            [
+                "Robots 200",
+                "Robots Disallow",
+                "Robots Sitemap",
+                "Robots доступ",
+                "Robots Googlebot",
+            ]
+        )
 
     if check_options.check_404:
         cols.extend(["Ссылка на стр.404", "Код стр.404", "Корректность 404"])
@@ -113,9 +129,33 @@ def get_active_columns(check_options: CheckOptions, max_alts: int = 0) -> List[s
     if check_options.check_cms:
         cols.append("CMS")
 
+    if check_options.measure_timings:
+        cols.extend(TIMING_COLUMNS)
+
     return cols
 
 
+# Хук получает контекст проверенной страницы и может вернуть дополнительные
+# колонки строки результата (синхронно или корутиной)
+CheckHook = Callable[[CheckContext], Any]
+
+
+async def _run_hooks(
+    hooks: Optional[List[CheckHook]], ctx: CheckContext, result: Dict[str, str]
+):
+    for hook in hooks or ():
+        try:
+            extra = hook(ctx)
+            if inspect.isawaitable(extra):
+                extra = await extra
+        except Exception:
+            # Ошибка дополнительного анализа не должна ломать проверку страницы
+            logger.exception(f"Check hook failed for {ctx.normalized_url}")
+            continue
+        if extra:
+            result.update(extra)
+
+
 def get_csv_columns(max_alts: int = 0) -> List[str]:
     cols = CSV_COLUMNS_BASE.copy()
     for i in range(1, max_alts + 1):
@@ -128,15 +168,20 @@ async def run_all_checks(
     client: httpx.AsyncClient,
     check_options: CheckOptions,
     runtime: RuntimeOptions,
+    hooks: Optional[List[CheckHook]] = None,
+    cache: Optional[JobCache] = None,
+    timings: Optional[PageTimings] = None,
 ) -> Dict[str, str]:
     normalized_url = normalize_url(raw_url)
+    if timings is None:
+        timings = PageTimings()
 
     if not normalized_url:
         return {"URL": raw_url, "Код ответа": "некорректный адрес"}
 
     # Получить первоначальный ответ (без следования редиректам)
     response_no_follow = await fetch_with_retries(
-        client, normalized_url, runtime, follow_redirects=False
+        client, normalized_url, runtime, follow_redirects=False, timings=timings
     )
     if not response_no_follow:
         return {"URL": normalized_url or raw_url, "Код ответа": "нет ответа"}
@@ -153,16 +198,36 @@ async def run_all_checks(
             result["Код ответа"] = str(response_no_follow.status_code)
         if check_options.check_redirects:
             result["Редирект"] = redirect_url
+        if hooks:
+            ctx = CheckContext(
+                raw_url=raw_url,
+                normalized_url=normalized_url,
+                response_no_follow=response_no_follow,
+                response=None,
+                soup=None,
+                client=client,
+                check_options=check_options,
+                runtime=runtime,
+                final_url=normalized_url,
+                is_redirect=True,
+                cache=cache,
+            )
+            with timings.measure("hooks"):
+                await _run_hooks(hooks, ctx, result)
+        if check_options.measure_timings:
+            result.update(timings.columns())
         return result
 
     # Получить финальный ответ (после всех редиректов) для контента
-    response = await fetch_with_retries(client, normalized_url, runtime)
+    response = await fetch_with_retries(client, normalized_url, runtime, timings=timings)
     if not response:
         response = response_no_follow
 
     soup = None
     if "text/html" in response.headers.get("content-type", ""):
-        soup = BeautifulSoup(response.text, "lxml")
+        with timings.measure("parse"):
+            soup = BeautifulSoup(response.text, "lxml")
+        metrics.PARSE_SECONDS.observe(timings.steps["parse"] / 1000)
 
     # Определить финальный URL для использования в проверках
     final_url = (
@@ -183,6 +248,7 @@ async def run_all_checks(
         runtime=runtime,
         final_url=final_url,
         is_redirect=is_redirect,
+        cache=cache,
     )
 
     # Собрать все значения
@@ -190,7 +256,8 @@ async def run_all_checks(
     img_count = "0"
     alt_count = "0"
     if check_options.check_images:
-        alts, img_count, alt_count = check_images_alt(ctx)
+        with timings.measure("images"):
+            alts, img_count, alt_count = check_images_alt(ctx)
 
     # Определить максимальное количество альтов для создания колонок
     max_alts = len(alts)
@@ -208,51 +275,59 @@ async def run_all_checks(
             redirect_url = response_no_follow.headers.get("location", "")
             result["Редирект"] = redirect_url
 
-    if check_options.check_html_lang:
-        result["Язык сайта"] = extract_html_lang(soup)
+    with timings.measure("meta"):
+        if check_options.check_html_lang:
+            result["Язык сайта"] = extract_html_lang(soup)
 
-    if check_options.check_indexability:
-        noindex, nofollow = parse_robots_meta(response, soup)
-        result["Noindex"] = "да" if noindex else "нет"
-        result["Nofollow"] = "да" if nofollow else "нет"
-        result["Canonical"] = extract_canonical(soup) if soup else ""
+        if check_options.check_indexability:
+            noindex, nofollow = parse_robots_meta(response, soup)
+            result["Noindex"] = "да" if noindex else "нет"
+            result["Nofollow"] = "да" if nofollow else "нет"
+            result["Canonical"] = extract_canonical(soup) if soup else ""
 
-    if check_options.check_titles:
-        title, t_len = extract_title(soup)
-        result["Title"] = title
-        result["Title Длина"] = str(t_len) if t_len > 0 else ""
-        desc, d_len = extract_description(soup)
-        result["Description"] = desc
-        result["Description Длина"] = str(d_len) if d_len > 0 else ""
+        if check_options.check_titles:
+            title, t_len = extract_title(soup)
+            result["Title"] = title
+            result["Title Длина"] = str(t_len) if t_len > 0 else ""
+            desc, d_len = extract_description(soup)
+            result["Description"] = desc
+            result["Description Длина"] = str(d_len) if d_len > 0 else ""
 
     # Выполнить проверки с передачей контекста
     if check_options.check_sitemap:
-        result["Sitemap 200"] = await check_sitemap(ctx)
+        with timings.measure("sitemap"):
+            result["Sitemap 200"] = await check_sitemap(ctx)
 
     if check_options.check_robots:
-        robots_result = await check_robots(ctx)
+        with timings.measure("robots"):
+            robots_result = await check_robots(ctx)
         result.update(robots_result)
 
     if check_options.check_404:
-        page_404_url, page_404_code, page_404_correct = await check_404(ctx)
+        with timings.measure("404"):
+            page_404_url, page_404_code, page_404_correct = await check_404(ctx)
         result["Ссылка на стр.404"] = page_404_url
         result["Код стр.404"] = page_404_code
         result["Корректность 404"] = page_404_correct
 
     if check_options.check_h1:
-        h1_count, h1_empty = check_h1(ctx)
+        with timings.measure("h1"):
+            h1_count, h1_empty = check_h1(ctx)
         result["Кол-во H1"] = h1_count
 
     # Сбор содержимого заголовков H1-H6
-    headings = collect_headings(ctx)
+    with timings.measure("headings"):
+        headings = collect_headings(ctx)
     for heading_key, heading_text in headings.items():
         result[heading_key] = heading_text
 
     if check_options.check_html_structure:
-        result["HTML структура"] = build_html_structure(ctx)
+        with timings.measure("structure"):
+            result["HTML структура"] = build_html_structure(ctx)
 
     if check_options.check_heading_duplicates:
-        result["Дубли H1/H2/H3"] = find_heading_duplicates(ctx)
+        with timings.measure("heading_duplicates"):
+            result["Дубли H1/H2/H3"] = find_heading_duplicates(ctx)
 
     if check_options.check_images:
         result["Кол-во img"] = img_count
@@ -263,6 +338,14 @@ async def run_all_checks(
 
     # Проверка CMS
     if check_options.check_cms:
-        result["CMS"] = await check_cms(ctx)
+        with timings.measure("cms"):
+            result["CMS"] = await check_cms(ctx)
+
+    if hooks:
+        with timings.measure("hooks"):
+            await _run_hooks(hooks, ctx, result)
+
+    if check_options.measure_timings:
+        result.update(timings.columns())
 
     return result
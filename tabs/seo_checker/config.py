@@ -38,6 +38,15 @@ class CheckOptions:
     # Проверка CMS
     check_cms: bool = True
 
+    # Анализ по всем страницам задачи (по умолчанию выключен)
+    check_near_duplicates: bool = False
+    check_links: bool = False
+    check_image_weight: bool = False
+    check_link_graph: bool = False
+
+    # Замеры времени запросов и проверок в колонках результата
+    measure_timings: bool = False
+
     def to_dict(self) -> Dict[str, bool]:
         return self.__dict__.copy()
 
@@ -47,6 +56,23 @@ class RuntimeOptions:
     timeout_seconds: int = 15
     retries: int = 2
     concurrency: int = 3
+    # Режим обхода сайта: 0 — проверять только введённые URL,
+    # N — переходить по внутренним ссылкам на глубину до N
+    crawl_depth: int = 0
+    crawl_max_pages: int = 100  # лимит страниц на один сайт
+    # 1 — добавить в обход страницы из sitemap (robots.txt → индексы → .xml/.xml.gz)
+    sitemap_discovery: int = 0
+    # 1 — профилировать поток задачи (cProfile + стеки), заметно медленнее
+    profile: int = 0
+    # Бюджет памяти задачи, МБ (0 — без лимита): при превышении новые
+    # страницы ждут завершения начатых
+    memory_budget_mb: int = 0
+    # 1 — замерять пик аллокаций через tracemalloc (общий на процесс)
+    trace_memory: int = 0
+    # 1 — лог задачи в формате JSON lines (для машинного разбора)
+    json_log: int = 0
+    # 1 — сохранять ответы в снимок (повторный анализ без сети, экспорт WARC)
+    snapshot: int = 0
 
 
 CHECK_LABELS = {
@@ -78,6 +104,12 @@ CHECK_LABELS = {
     "html_track_other": "Другое (address, time)",
     # Проверка CMS
     "check_cms": "Проверка CMS",
+    # Анализ по всем страницам задачи
+    "check_near_duplicates": "Почти-дубли между страницами (Title, Description, текст)",
+    "check_links": "Битые ссылки на страницах",
+    "check_image_weight": "Вес и размеры изображений",
+    "check_link_graph": "Граф внутренних ссылок (PageRank, сироты)",
+    "measure_timings": "Замеры времени (соединение, TTFB, загрузка, проверки)",
 }
 
 DEFAULT_CHECK_OPTIONS = CheckOptions()
@@ -1,5 +1,6 @@
-from dataclasses import dataclass
-from typing import Optional
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Optional
 
 import httpx
 from bs4 import BeautifulSoup
@@ -7,6 +8,17 @@ from bs4 import BeautifulSoup
 from .config import CheckOptions, RuntimeOptions
 
 
+@dataclass
+class JobCache:
+    """Данные, общие для всех URL одной задачи (живут в её event loop).
+
+    Значения — задачи asyncio: параллельные проверки одного origin
+    ждут один и тот же запрос, а не дублируют его.
+    """
+
+    robots: Dict[str, asyncio.Task] = field(default_factory=dict)
+
+
 @dataclass
 class CheckContext:
     """Унифицированный контекст для проверки одного URL."""
@@ -21,3 +33,4 @@ class CheckContext:
     runtime: RuntimeOptions
     final_url: Optional[str] = None
     is_redirect: bool = False
+    cache: Optional[JobCache] = None
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from ..context import CheckContext
+from ..network.url import normalize_url
+from ..parsers.links import extract_links, is_page_link, normalize_link, site_key
+from .frontier import DiskFrontier
+from .seen import BloomFilter
+
+# Ёмкость множества просмотренных URL (10M ≈ 18 МБ)
+SEEN_MIN_CAPACITY = 1000
+SEEN_MAX_CAPACITY = 10_000_000
+
+class Crawler:
+    """
+    Состояние обхода сайтов в ширину (BFS).
+
+    - очередь на диске (DiskFrontier), в памяти только счётчики
+    - множество просмотренных URL — фильтр Блума
+    - лимит страниц считается отдельно для каждого сайта (хост без www)
+    """
+
+    def __init__(self, seeds: List[str], max_depth: int, max_pages: int):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self._dir = tempfile.mkdtemp(prefix="lime-frog-crawl-")
+        self._frontier = DiskFrontier(os.path.join(self._dir, "frontier.tsv"))
+        capacity = min(
+            max(len(seeds) * max_pages, SEEN_MIN_CAPACITY), SEEN_MAX_CAPACITY
+        )
+        self._seen = BloomFilter(capacity)
+        self._site_pages: Dict[str, int] = {}
+        self._site_roots: Dict[str, str] = {}
+        self.enqueued = 0
+
+        for raw in seeds:
+            normalized = normalize_url(raw)
+            url = normalize_link(normalized) if normalized else None
+            if url is None:
+                # Некорректный адрес всё равно попадает в результат с ошибкой
+                self._push(raw, 0)
+            else:
+                self._site_roots.setdefault(site_key(url), url)
+                self.enqueue(url, 0)
+
+    def _push(self, url: str, depth: int):
+        self._frontier.push(self.enqueued, depth, url)
+        self.enqueued += 1
+
+    def is_full(self, site: str) -> bool:
+        """Исчерпан ли лимит страниц сайта."""
+        return self._site_pages.get(site, 0) >= self.max_pages
+
+    def enqueue(self, url: str, depth: int, site: Optional[str] = None) -> bool:
+        """Ставит канонизированный URL в очередь, если он новый и лимит сайта
+        не исчерпан. Возвращает True, если URL добавлен."""
+        site = site or site_key(url)
+        if self.is_full(site):
+            return False
+        if not self._seen.add(url):
+            return False
+        self._site_pages[site] = self._site_pages.get(site, 0) + 1
+        self._push(url, depth)
+        return True
+
+    def pop(self) -> Optional[Tuple[int, int, str]]:
+        """Следующая страница: (индекс, глубина, url) или None."""
+        return self._frontier.pop()
+
+    def __len__(self) -> int:
+        return len(self._frontier)
+
+    def discover(self, page_url: str, links: List[str], depth: int) -> int:
+        """Ставит в очередь внутренние ссылки страницы. Возвращает их число."""
+        if depth >= self.max_depth:
+            return 0
+        site = site_key(page_url)
+        added = 0
+        for link in links:
+            if site_key(link) != site:
+                continue
+            if not is_page_link(link):
+                continue
+            if self.enqueue(link, depth + 1, site):
+                added += 1
+        return added
+
+    def sites(self) -> List[str]:
+        """Стартовые страницы сайтов (по одной на сайт, в порядке ввода)."""
+        return list(self._site_roots.values())
+
+    def close(self):
+        self._frontier.close()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+def link_collector(links: List[str]):
+    """Хук для run_all_checks: собирает ссылки проверенной страницы в links."""
+
+    def hook(ctx: CheckContext):
+        if ctx.soup is not None:
+            links.extend(extract_links(ctx.soup, ctx.final_url or ctx.normalized_url))
+        elif ctx.is_redirect and ctx.response is None and ctx.response_no_follow:
+            # Редирект без перехода: цель редиректа — тоже страница сайта
+            location = ctx.response_no_follow.headers.get("location")
+            if location:
+                link = normalize_link(urljoin(ctx.normalized_url, location))
+                if link:
+                    links.append(link)
+
+    return hook
@@ -0,0 +1,43 @@
+import os
+from typing import Optional, Tuple
+
+
+class DiskFrontier:
+    """
+    FIFO-очередь обхода на диске.
+
+    Записи дописываются в конец файла, чтение идёт по смещению с начала,
+    поэтому в памяти хранится только счётчик, а не сами URL.
+    Формат строки: <index>\\t<depth>\\t<url>
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._writer = open(path, "w", encoding="utf-8")
+        self._reader = open(path, "r", encoding="utf-8")
+        self._pending = 0
+
+    def push(self, index: int, depth: int, url: str):
+        self._writer.write(f"{index}\t{depth}\t{url}\n")
+        self._pending += 1
+
+    def pop(self) -> Optional[Tuple[int, int, str]]:
+        """Возвращает (index, depth, url) или None, если очередь пуста."""
+        if not self._pending:
+            return None
+        self._writer.flush()
+        line = self._reader.readline()
+        self._pending -= 1
+        index, depth, url = line.rstrip("\n").split("\t", 2)
+        return int(index), int(depth), url
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def close(self):
+        self._writer.close()
+        self._reader.close()
+        try:
+            os.unlink(self._path)
+        except OSError:
+            pass
@@ -0,0 +1,279 @@
+"""
+Поиск страниц сайта через sitemap.
+
+robots.txt (строки Sitemap:) -> sitemap index -> sitemap (в т.ч. .xml.gz).
+XML разбирается потоково (XMLPullParser) прямо по мере скачивания:
+обработанные элементы сразу удаляются из дерева, поэтому sitemap
+на 50 000 URL не хранится в памяти целиком. .xml.gz распаковывается
+кусками ограниченного размера: сжатый файл-бомба обрывается на лимите,
+не раздуваясь в памяти.
+"""
+
+import asyncio
+import logging
+import time
+import zlib
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import httpx
+from lxml import etree
+
+from .. import metrics
+from ..config import RuntimeOptions
+from ..network.fetcher import fetch_with_retries, stream_attempt
+from ..parsers.robots import RobotsTxt
+
+logger = logging.getLogger("lime_frog")
+
+# Лимиты протокола sitemaps.org: 50 000 URL и 50 МБ без сжатия на файл
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+# Сколько файлов sitemap (включая индексы) обходить на один сайт
+SITEMAP_MAX_FILES = 1000
+# Максимум распакованных байт за один вызов decompress
+SITEMAP_INFLATE_CHUNK = 1024 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclass
+class SitemapStats:
+    """Статистика по одному файлу sitemap."""
+
+    url: str
+    kind: str = ""  # urlset / sitemapindex
+    status: str = ""
+    url_count: int = 0
+    sitemap_count: int = 0
+    lastmod_min: str = ""
+    lastmod_max: str = ""
+    parse_seconds: float = 0.0
+    truncated: bool = False
+    error: str = ""
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def add_lastmod(self, lastmod: str):
+        # W3C Datetime сравнивается как строка (YYYY-MM-DD...)
+        if not lastmod:
+            return
+        if not self.lastmod_min or lastmod < self.lastmod_min:
+            self.lastmod_min = lastmod
+        if not self.lastmod_max or lastmod > self.lastmod_max:
+            self.lastmod_max = lastmod
+
+
+class SitemapParser:
+    """Инкрементальный разбор urlset / sitemapindex.
+
+    feed() принимает очередной кусок XML и возвращает готовые записи
+    (тип, loc, lastmod), где тип — "url" или "sitemap".
+    """
+
+    def __init__(self):
+        self.kind = ""
+        self._parser = etree.XMLPullParser(
+            events=("start", "end"), resolve_entities=False, no_network=True
+        )
+
+    def feed(self, data: bytes) -> Iterator[Tuple[str, str, str]]:
+        self._parser.feed(data)
+        return self._read()
+
+    def close(self) -> Iterator[Tuple[str, str, str]]:
+        self._parser.close()
+        return self._read()
+
+    def _read(self) -> Iterator[Tuple[str, str, str]]:
+        for event, elem in self._parser.read_events():
+            name = etree.QName(elem).localname
+            if event == "start":
+                if not self.kind:
+                    self.kind = name
+                continue
+            if name not in ("url", "sitemap"):
+                continue
+            loc = lastmod = ""
+            for child in elem:
+                if not isinstance(child.tag, str):
+                    continue
+                child_name = etree.QName(child).localname
+                if child_name == "loc":
+                    loc = (child.text or "").strip()
+                elif child_name == "lastmod":
+                    lastmod = (child.text or "").strip()
+            # Освобождаем обработанный элемент и предыдущих соседей
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+            if loc:
+                yield name, loc, lastmod
+
+
+def parse_robots_sitemaps(robots_text: str, robots_url: str) -> List[str]:
+    """Адреса из строк "Sitemap:" в robots.txt (в порядке появления)."""
+    sitemaps: Dict[str, None] = {}
+    for line in robots_text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line.lower().startswith("sitemap:"):
+            value = line[8:].strip()
+            if value:
+                sitemaps.setdefault(urljoin(robots_url, value))
+    return list(sitemaps)
+
+
+def _inflate(decompressor, data: bytes) -> Iterator[bytes]:
+    """Распакованные куски data, каждый не больше SITEMAP_INFLATE_CHUNK."""
+    while data:
+        piece = decompressor.decompress(data, SITEMAP_INFLATE_CHUNK)
+        if piece:
+            yield piece
+        data = decompressor.unconsumed_tail
+
+
+async def _stream_sitemap(
+    client: httpx.AsyncClient,
+    url: str,
+    runtime: RuntimeOptions,
+    stats: SitemapStats,
+    on_entry: Callable[[str, str, str], bool],
+):
+    """Скачивает и разбирает один sitemap, передавая записи в on_entry.
+
+    on_entry возвращает False, если дальше читать не нужно. Запросы и
+    повторы (runtime.retries) учитываются в метриках и счётчиках задачи,
+    как запросы страниц; повтор начинает разбор файла заново.
+    """
+    for attempt in range(runtime.retries + 1):
+        parser = SitemapParser()
+        stats.url_count = stats.sitemap_count = 0
+        decompressor = None
+        received = 0
+        try:
+            async with stream_attempt(client, url) as resp:
+                stats.status = str(resp.status_code)
+                if resp.status_code != 200:
+                    return
+                first = True
+                async for chunk in resp.aiter_bytes():
+                    if first:
+                        # .xml.gz: файл сжат сам по себе (не Content-Encoding)
+                        if chunk.startswith(GZIP_MAGIC):
+                            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                        first = False
+                    pieces = _inflate(decompressor, chunk) if decompressor else (chunk,)
+                    for piece in pieces:
+                        received += len(piece)
+                        if received > SITEMAP_MAX_BYTES:
+                            stats.truncated = True
+                            stats.error = "превышен размер 50 МБ"
+                            return
+                        for entry in parser.feed(piece):
+                            if not on_entry(*entry):
+                                stats.truncated = True
+                                return
+                if decompressor:
+                    tail = decompressor.flush()
+                    if received + len(tail) > SITEMAP_MAX_BYTES:
+                        stats.truncated = True
+                        stats.error = "превышен размер 50 МБ"
+                        return
+                    for entry in parser.feed(tail):
+                        if not on_entry(*entry):
+                            stats.truncated = True
+                            return
+                for entry in parser.close():
+                    if not on_entry(*entry):
+                        stats.truncated = True
+                        return
+            return
+        except (etree.XMLSyntaxError, zlib.error) as exc:
+            stats.error = f"ошибка разбора: {exc}"[:200]
+            return
+        except httpx.HTTPError as exc:
+            timeout = isinstance(exc, httpx.TimeoutException)
+            if attempt == runtime.retries:
+                if timeout:
+                    metrics.request_timed_out()
+                stats.error = f"{type(exc).__name__}: {exc}"[:200]
+                return
+            metrics.request_retried(timeout=timeout)
+            await asyncio.sleep(0.25)
+        finally:
+            stats.kind = stats.kind or parser.kind
+
+
+async def discover_sitemap_urls(
+    client: httpx.AsyncClient,
+    site_url: str,
+    runtime: RuntimeOptions,
+    on_url: Callable[[str], bool],
+    on_stats: Optional[Callable[[SitemapStats], None]] = None,
+    max_files: int = SITEMAP_MAX_FILES,
+    load_robots: Optional[Callable[[str], Awaitable[Tuple[str, Optional[RobotsTxt]]]]] = None,
+):
+    """Находит страницы сайта через robots.txt и sitemap.
+
+    on_url вызывается для каждого URL страницы; если он вернул False,
+    обход прекращается (например, исчерпан лимит страниц сайта).
+    load_robots(origin) — robots.txt из кэша задачи (тот же ответ, что у
+    проверки Robots.txt); без него robots.txt скачивается здесь.
+    Если в robots.txt нет строк Sitemap:, пробуется /sitemap.xml.
+    """
+    parsed = urlparse(site_url)
+    root = f"{parsed.scheme}://{parsed.netloc}"
+    robots_url = root + "/robots.txt"
+
+    start: List[str] = []
+    if load_robots is not None:
+        _, robots = await load_robots(root)
+        if robots is not None:
+            start = list(dict.fromkeys(urljoin(robots_url, url) for url in robots.sitemaps))
+    else:
+        resp = await fetch_with_retries(client, robots_url, runtime)
+        if resp is not None and resp.status_code == 200:
+            start = parse_robots_sitemaps(resp.text, robots_url)
+    if not start:
+        start = [root + "/sitemap.xml"]
+
+    queue = deque(start)
+    queued = set(start)
+    files = 0
+    stopped = False
+
+    while queue and files < max_files and not stopped:
+        sitemap_url = queue.popleft()
+        files += 1
+        stats = SitemapStats(url=sitemap_url)
+        started = time.perf_counter()
+
+        def on_entry(kind: str, loc: str, lastmod: str) -> bool:
+            nonlocal stopped
+            loc = urljoin(sitemap_url, loc)
+            stats.add_lastmod(lastmod)
+            if kind == "sitemap":
+                stats.sitemap_count += 1
+                if loc not in queued:
+                    queued.add(loc)
+                    queue.append(loc)
+                return True
+            stats.url_count += 1
+            if not on_url(loc):
+                stopped = True
+                return False
+            return True
+
+        await _stream_sitemap(client, sitemap_url, runtime, stats, on_entry)
+        stats.parse_seconds = round(time.perf_counter() - started, 3)
+        logger.debug(
+            f"Sitemap {sitemap_url}: {stats.kind or '-'} status={stats.status} "
+            f"urls={stats.url_count} sitemaps={stats.sitemap_count} "
+            f"in {stats.parse_seconds:.2f}s"
+        )
+        if on_stats:
+            on_stats(stats)
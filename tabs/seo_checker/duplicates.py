@@ -0,0 +1,188 @@
+"""
+Поиск почти-дублей между страницами задачи: SimHash + LSH.
+
+Для каждой страницы во время разбора считаются 64-битные отпечатки SimHash
+для Title, Description и видимого текста; в памяти хранятся только числа.
+После обхода отпечатки раскладываются по LSH-корзинам: 64 бита делятся на
+(max_distance + 1) полос, и у двух отпечатков на расстоянии Хэмминга
+<= max_distance хотя бы одна полоса совпадает (принцип Дирихле). Сравниваются
+только пары из одной корзины, поэтому поиск не квадратичный.
+"""
+
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bs4 import Comment
+
+from .checks import CheckHook
+from .context import CheckContext
+from .reports import JobAnalysis, Report
+from .results import ResultStore
+
+SIMHASH_BITS = 64
+# Максимальное расстояние Хэмминга для почти-дублей
+NEAR_DUPLICATE_DISTANCE = 3
+# Текст страницы длиннее этого числа слов не учитывается в отпечатке
+MAX_TEXT_WORDS = 20000
+
+INVISIBLE_TAGS = ("script", "style", "noscript", "template", "svg")
+
+# Поле -> (колонка результата, префикс id кластера, размер шингла в словах)
+DUPLICATE_FIELDS = {
+    "title": ("Дубли Title", "T", 1),
+    "description": ("Дубли Description", "D", 1),
+    "text": ("Дубли контента", "C", 3),
+}
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+def simhash(text: str, shingle: int = 3) -> Optional[int]:
+    """SimHash текста по словесным шинглам. None для пустого текста."""
+    words = _WORD_RE.findall(text.lower())[:MAX_TEXT_WORDS]
+    if not words:
+        return None
+    if len(words) <= shingle:
+        features = {" ".join(words)}
+    else:
+        features = {
+            " ".join(words[i : i + shingle]) for i in range(len(words) - shingle + 1)
+        }
+    # Поразрядное большинство: столбцы битов считаются через zip строк
+    bits = [format(_feature_hash(f), "064b") for f in features]
+    half = len(bits) / 2
+    fingerprint = 0
+    for column in zip(*bits):
+        fingerprint = (fingerprint << 1) | (column.count("1") > half)
+    return fingerprint
+
+
+def visible_text(ctx: CheckContext) -> str:
+    """Видимый текст body без скриптов, стилей и т.п. (soup не изменяется)."""
+    body = ctx.soup.body if ctx.soup else None
+    if body is None:
+        return ""
+    parts: List[str] = []
+    for string in body.find_all(string=True):
+        if isinstance(string, Comment):
+            continue
+        parent = string.parent
+        if parent is not None and parent.name in INVISIBLE_TAGS:
+            continue
+        parts.append(string)
+    return " ".join(parts)
+
+
+class SimHashIndex:
+    """LSH-индекс отпечатков SimHash с кластеризацией через union-find."""
+
+    def __init__(self, max_distance: int = NEAR_DUPLICATE_DISTANCE):
+        self.max_distance = max_distance
+        self._bands = max_distance + 1
+        self._band_bits = SIMHASH_BITS // self._bands
+        self._items: List[Tuple[int, int]] = []  # (id, отпечаток)
+
+    def add(self, item_id: int, fingerprint: int):
+        self._items.append((item_id, fingerprint))
+
+    def _band_keys(self, fingerprint: int) -> Iterable[Tuple[int, int]]:
+        mask = (1 << self._band_bits) - 1
+        for band in range(self._bands):
+            shift = band * self._band_bits
+            if band == self._bands - 1:
+                # последняя полоса забирает оставшиеся биты
+                yield band, fingerprint >> shift
+            else:
+                yield band, (fingerprint >> shift) & mask
+
+    def clusters(self) -> List[List[int]]:
+        """Кластеры почти-дублей (>= 2 элементов), id в порядке добавления."""
+        # Одинаковые отпечатки объединяются сразу, сравниваются только различные
+        by_value: Dict[int, List[int]] = defaultdict(list)
+        for item_id, fingerprint in self._items:
+            by_value[fingerprint].append(item_id)
+        values = list(by_value)
+
+        parent = list(range(len(values)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for pos, value in enumerate(values):
+            for key in self._band_keys(value):
+                buckets[key].append(pos)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for i, a in enumerate(members):
+                for b in members[i + 1 :]:
+                    if find(a) == find(b):
+                        continue
+                    if bin(values[a] ^ values[b]).count("1") <= self.max_distance:
+                        parent[find(b)] = find(a)
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for pos, value in enumerate(values):
+            groups[find(pos)].extend(by_value[value])
+        clusters = [sorted(ids) for ids in groups.values() if len(ids) > 1]
+        clusters.sort(key=lambda ids: ids[0])
+        return clusters
+
+
+class DuplicateAnalysis(JobAnalysis):
+    """Почти-дубли Title, Description и текста между страницами задачи."""
+
+    name = "duplicates"
+
+    def __init__(self, max_distance: int = NEAR_DUPLICATE_DISTANCE):
+        self._indexes = {f: SimHashIndex(max_distance) for f in DUPLICATE_FIELDS}
+
+    def page_hook(self, idx: int) -> CheckHook:
+        def hook(ctx: CheckContext):
+            if ctx.soup is None:
+                return None
+            title_tag = ctx.soup.title
+            description_tag = ctx.soup.find("meta", attrs={"name": "description"})
+            texts = {
+                "title": title_tag.get_text(" ") if title_tag else "",
+                "description": (description_tag.get("content") or "")
+                if description_tag
+                else "",
+                "text": visible_text(ctx),
+            }
+            for field, text in texts.items():
+                fingerprint = simhash(text, DUPLICATE_FIELDS[field][2])
+                if fingerprint is not None:
+                    self._indexes[field].add(idx, fingerprint)
+            return None
+
+        return hook
+
+    def finish(self, results: ResultStore) -> Report:
+        report = Report(["Поле", "Кластер", "Страниц в кластере", "URL", "Title"])
+        results.add_columns(column for column, _, _ in DUPLICATE_FIELDS.values())
+        for field, (column, prefix, _) in DUPLICATE_FIELDS.items():
+            for number, ids in enumerate(self._indexes[field].clusters(), start=1):
+                cluster = f"{prefix}{number}"
+                for idx in ids:
+                    row = results.get(idx)
+                    if row is None:
+                        continue
+                    results.update(idx, {column: cluster})
+                    report.rows.append(
+                        (column, cluster, len(ids), row.get("URL", ""), row.get("Title", ""))
+                    )
+        return report
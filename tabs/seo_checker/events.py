@@ -0,0 +1,132 @@
+"""
+Поток событий (Server-Sent Events) для UI.
+
+Один поток на вкладку заменяет опрос /api/job/<id>, /api/stats и heartbeat:
+сервер будит подписчиков только при изменении состояния JobManager,
+а не по таймеру каждой вкладки. Готовые сообщения (stats, status, пачки
+строк) строятся один раз на версию состояния (JobManager.shared_event),
+потоки вкладок только отправляют их.
+"""
+
+import json
+import time
+from typing import Any, Iterator, Optional, Tuple
+
+from .jobs import Job, JobManager
+
+# Интервал keepalive-комментариев (держит соединение через nginx и
+# позволяет заметить отключение клиента)
+EVENT_KEEPALIVE_SECONDS = 15
+# Минимальный интервал между пачками событий одного потока
+EVENT_MIN_INTERVAL_SECONDS = 0.5
+# Максимальная длительность потока; браузер переподключится сам
+EVENT_STREAM_MAX_SECONDS = 300
+# Сколько строк результатов отдавать в одном событии "rows"
+EVENT_ROWS_BATCH = 200
+# Лимит одновременно открытых потоков: каждый занимает поток gthread-воркера
+# gunicorn на всё время подключения (threads в gunicorn.conf.py — с запасом
+# под этот лимит и обычные запросы)
+MAX_EVENT_STREAMS = 48
+# Задержка переподключения EventSource (мс)
+EVENT_RETRY_MS = 3000
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """Форматирует одно SSE-сообщение."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _rows_event(job: Job, cursor: int) -> Tuple[Optional[str], int]:
+    """Сообщение rows со строками после cursor (None — новых нет) и курсор."""
+    chunk, next_cursor = job.results_since(cursor, EVENT_ROWS_BATCH)
+    if not chunk:
+        return None, cursor
+    rows = [{"index": idx, "row": row} for idx, row in chunk]
+    return (
+        format_sse("rows", {"cursor": next_cursor, "rows": rows}, event_id=next_cursor),
+        next_cursor,
+    )
+
+
+def iter_events(
+    manager: JobManager,
+    job_id: Optional[str],
+    cursor: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Генератор SSE-потока.
+
+    Слот потока занимает и освобождает вызывающий (try_open_stream /
+    close_stream): генератор, который так и не начал выполняться, не
+    дойдёт до своего finally.
+
+    События:
+    - stats  — активные пользователи и очередь (как /api/stats)
+    - status — снимок задачи job_id (как /api/job/<id>)
+    - rows   — новые завершённые строки; отправляются, только если задан cursor
+    - job_missing — задача не найдена
+
+    Args:
+        manager: Менеджер задач
+        job_id: Задача, прогресс которой нужно отслеживать
+        cursor: Позиция в списке завершённых строк; None — строки не нужны
+    """
+    yield f"retry: {EVENT_RETRY_MS}\n\n"
+
+    started = time.monotonic()
+    version = -1
+    last_stats: Optional[str] = None
+    last_status: Optional[str] = None
+
+    while time.monotonic() - started < EVENT_STREAM_MAX_SECONDS:
+        new_version = manager.wait_for_change(version, EVENT_KEEPALIVE_SECONDS)
+        if new_version == version:
+            yield ": keepalive\n\n"
+
+        version = new_version
+
+        stats = manager.shared_event(
+            version, ("stats",), lambda: format_sse("stats", manager.get_stats())
+        )
+        if stats != last_stats:
+            last_stats = stats
+            yield stats
+
+        if job_id:
+            job = manager.get(job_id)
+            if not job:
+                yield format_sse("job_missing", {"id": job_id})
+                job_id = None
+                continue
+
+            # Снимок строится раньше пачек строк той же версии
+            status = manager.shared_event(
+                version,
+                ("status", job_id),
+                lambda: format_sse("status", manager.status_snapshot(job)),
+            )
+
+            if cursor is not None:
+                while True:
+                    message, cursor = manager.shared_event(
+                        version,
+                        ("rows", job_id, cursor),
+                        lambda: _rows_event(job, cursor),
+                    )
+                    if message is None:
+                        break
+                    yield message
+
+            # status отправляется после строк: клиент, увидев
+            # завершённую задачу, уже имеет все её строки
+            if status != last_status:
+                last_status = status
+                yield status
+
+        # Склеиваем частые изменения в одну пачку событий
+        time.sleep(EVENT_MIN_INTERVAL_SECONDS)
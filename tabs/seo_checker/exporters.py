@@ -1,42 +1,150 @@
 import csv
 import io
-from typing import Iterable, List
+import tempfile
+import zlib
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Union
 
 try:
     from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
     from openpyxl.utils import get_column_letter
+    from openpyxl.worksheet.cell_range import CellRange
 
     HAS_OPENPYXL = True
 except ImportError:
     HAS_OPENPYXL = False
 
 
+# Сколько строк CSV накапливать перед выдачей очередного чанка
+CSV_CHUNK_ROWS = 500
+
+
+def order_columns(keys: Iterable[str]) -> List[str]:
+    """Упорядочивает колонки: URL первым, Alt-N подряд по номеру.
+
+    Alt-колонки встают на место первой встреченной Alt-колонки.
+    """
+    ordered: List[str] = []
+    alt_keys: List[str] = []
+    alt_pos = -1
+    for key in dict.fromkeys(keys):
+        if key.startswith("Alt-") and key[4:].isdigit():
+            if alt_pos < 0:
+                alt_pos = len(ordered)
+            alt_keys.append(key)
+        else:
+            ordered.append(key)
+    if alt_keys:
+        alt_keys.sort(key=lambda key: int(key[4:]))
+        ordered[alt_pos:alt_pos] = alt_keys
+    if "URL" in ordered:
+        ordered.remove("URL")
+        ordered.insert(0, "URL")
+    return ordered
+
+
+def collect_columns(rows: Iterable[dict]) -> List[str]:
+    """Собирает объединение ключей всех рядов (динамические колонки)."""
+    seen: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            seen.setdefault(key)
+    return order_columns(seen)
+
+
+def iter_csv_chunks(
+    rows: Iterable[dict], fieldnames: List[str], chunk_rows: int = CSV_CHUNK_ROWS
+) -> Iterator[bytes]:
+    """Лениво генерирует CSV (UTF-8 с BOM) чанками по chunk_rows строк."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+    buffer.write("\ufeff")
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Сжимает поток чанков в формат gzip без накопления в памяти."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
 def rows_to_csv_bytes(rows: Iterable[dict]) -> bytes:
     rows_list = list(rows)
     if not rows_list:
         return b""
+    return b"".join(iter_csv_chunks(rows_list, collect_columns(rows_list)))
 
-    # Собираем все ключи из всех рядов (динамические колонки)
-    all_keys = []
-    for row in rows_list:
-        for key in row.keys():
-            if key not in all_keys:
-                all_keys.append(key)
 
-    # URL всегда первым, остальные в порядке появления
-    if "URL" in all_keys:
-        all_keys.remove("URL")
-        all_keys.insert(0, "URL")
+XLSX_HEADER_STYLE = "lf_header"
 
-    fieldnames = all_keys
 
-    buffer = io.StringIO()
-    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
-    writer.writeheader()
-    for row in rows_list:
-        writer.writerow(row)
-    return buffer.getvalue().encode("utf-8-sig")
+def _add_header_style(wb: "Workbook") -> None:
+    """Регистрирует общий именованный стиль заголовка (один на книгу)."""
+    wb.add_named_style(
+        NamedStyle(
+            name=XLSX_HEADER_STYLE,
+            fill=PatternFill(
+                start_color="4472C4", end_color="4472C4", fill_type="solid"
+            ),
+            font=Font(bold=True, color="FFFFFF"),
+            alignment=Alignment(
+                horizontal="center", vertical="center", wrap_text=False
+            ),
+        )
+    )
+
+
+def write_rows_xlsx(
+    rows: Iterable[dict],
+    fieldnames: List[str],
+    target: Union[str, IO[bytes]],
+) -> None:
+    """Потоково пишет строки в .xlsx (write-only режим openpyxl).
+
+    Строки сериализуются по мере добавления, книга целиком в памяти не
+    держится. Стиль задаётся только строке заголовка через именованный
+    стиль; ячейки данных пишутся без стилей — это в разы быстрее.
+    """
+    if not HAS_OPENPYXL:
+        raise ImportError("openpyxl не установлена. Установите: pip install openpyxl")
+
+    wb = Workbook(write_only=True)
+    _add_header_style(wb)
+    ws = wb.create_sheet("SEO Check Results")
+
+    for col_idx in range(1, len(fieldnames) + 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = 18
+    # Закрепляем заголовок и первый столбец
+    ws.freeze_panes = "B2"
+
+    header = []
+    for fieldname in fieldnames:
+        cell = WriteOnlyCell(ws, value=fieldname)
+        cell.style = XLSX_HEADER_STYLE
+        header.append(cell)
+    ws.append(header)
+
+    for row in rows:
+        ws.append([row.get(fieldname, "") for fieldname in fieldnames])
+
+    wb.save(target)
 
 
 def rows_to_xlsx_bytes(rows: Iterable[dict]) -> bytes:
@@ -48,168 +156,257 @@ def rows_to_xlsx_bytes(rows: Iterable[dict]) -> bytes:
     if not rows_list:
         return b""
 
-    # Собираем все ключи из всех рядов (динамические колонки)
-    all_keys = []
-    for row in rows_list:
-        for key in row.keys():
-            if key not in all_keys:
-                all_keys.append(key)
+    with tempfile.TemporaryFile() as fh:
+        write_rows_xlsx(rows_list, collect_columns(rows_list), fh)
+        fh.seek(0)
+        return fh.read()
 
-    # URL всегда первым
-    if "URL" in all_keys:
-        all_keys.remove("URL")
-        all_keys.insert(0, "URL")
 
-    fieldnames = all_keys
+HEADING_KEYS = ["H1", "H2", "H3", "H4", "H5", "H6"]
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "SEO Check Results"
+# Лимиты формата XLSX
+XLSX_MAX_COLUMNS = 16384
+XLSX_MAX_ROWS = 1048576
 
-    # Стили для заголовка
-    header_fill = PatternFill(
-        start_color="4472C4", end_color="4472C4", fill_type="solid"
-    )
-    header_font = Font(bold=True, color="FFFFFF")
+# Сколько доменов класть на один лист в раскладке "по доменам"
+HEADINGS_DOMAINS_PER_SHEET = 500
+
+HEADINGS_DOMAIN_STYLE = "lf_headings_domain"
+HEADINGS_KEY_STYLE = "lf_headings_key"
+
+HEADINGS_LONG_COLUMNS = ["Домен", "Уровень", "Позиция", "Текст"]
+HEADINGS_LONG_WIDTHS = [40, 10, 10, 80]
+
+
+def _add_headings_styles(wb: "Workbook") -> None:
+    """Регистрирует именованные стили шапки выгрузки заголовков."""
     header_alignment = Alignment(
         horizontal="center", vertical="center", wrap_text=False
     )
+    wb.add_named_style(
+        NamedStyle(
+            name=HEADINGS_DOMAIN_STYLE,
+            fill=PatternFill(
+                start_color="3B6EDC", end_color="3B6EDC", fill_type="solid"
+            ),
+            font=Font(bold=True, color="FFFFFF"),
+            alignment=header_alignment,
+        )
+    )
+    wb.add_named_style(
+        NamedStyle(
+            name=HEADINGS_KEY_STYLE,
+            fill=PatternFill(
+                start_color="DCE6F8", end_color="DCE6F8", fill_type="solid"
+            ),
+            font=Font(bold=True, color="1F2A44"),
+            alignment=header_alignment,
+        )
+    )
+
 
-    # Добавляем заголовки
-    for col_idx, fieldname in enumerate(fieldnames, start=1):
-        cell = ws.cell(row=1, column=col_idx, value=fieldname)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-        ws.column_dimensions[cell.column_letter].width = 18
-
-    # Добавляем данные
-    for row_idx, row_data in enumerate(rows_list, start=2):
-        for col_idx, fieldname in enumerate(fieldnames, start=1):
-            value = row_data.get(fieldname, "")
-            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-            cell.alignment = Alignment(
-                horizontal="left", vertical="center", wrap_text=False
+def _styled_cell(ws, value, style: str) -> "WriteOnlyCell":
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def _split_headings(
+    row: dict, heading_keys: List[str], separator: str
+) -> Dict[str, List[str]]:
+    headings = {}
+    for key in heading_keys:
+        raw_value = row.get(key, "")
+        if raw_value:
+            parts = [p.strip() for p in raw_value.split(separator)]
+            parts = [p for p in parts if p]
+        else:
+            parts = []
+        headings[key] = parts
+    return headings
+
+
+def _sheet_title(base: str, number: int) -> str:
+    return base if number == 1 else f"{base} {number}"
+
+
+def _write_headings_grouped_sheet(
+    wb: "Workbook",
+    title: str,
+    domains_data: List[tuple],
+    heading_keys: List[str],
+) -> None:
+    """Лист "по доменам": домен — объединённая шапка над колонками H1..H6."""
+    ws = wb.create_sheet(title)
+    width = len(heading_keys)
+    total_cols = len(domains_data) * width
+    for col in range(1, total_cols + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 22
+    ws.freeze_panes = "B3"
+
+    # Заголовки доменов (строка 1) и H2/H3/... (строка 2)
+    domain_row = []
+    key_row = []
+    for idx, (domain, _) in enumerate(domains_data):
+        start_col = idx * width + 1
+        if width > 1:
+            end_col = start_col + width - 1
+            ws.merged_cells.add(
+                CellRange(min_col=start_col, min_row=1, max_col=end_col, max_row=1)
             )
+        domain_row.append(_styled_cell(ws, domain, HEADINGS_DOMAIN_STYLE))
+        domain_row.extend([None] * (width - 1))
+        key_row.extend(
+            _styled_cell(ws, key.lower(), HEADINGS_KEY_STYLE) for key in heading_keys
+        )
+    ws.append(domain_row)
+    ws.append(key_row)
 
-    # Закрепляем заголовок и первый столбец
-    ws.freeze_panes = "B2"
+    # Данные
+    max_rows = max(
+        (len(values) for _, headings in domains_data for values in headings.values()),
+        default=0,
+    )
+    for row_offset in range(max_rows):
+        values_row = []
+        for _, headings in domains_data:
+            for key in heading_keys:
+                values = headings[key]
+                values_row.append(
+                    values[row_offset] if row_offset < len(values) else None
+                )
+        ws.append(values_row)
+
+
+def _write_headings_grouped(
+    wb: "Workbook", rows: Iterable[dict], heading_keys: List[str], separator: str
+) -> None:
+    """Раскладка "по доменам", с разбиением на листы по лимиту колонок."""
+    per_sheet = min(HEADINGS_DOMAINS_PER_SHEET, XLSX_MAX_COLUMNS // len(heading_keys))
+    sheet_number = 0
+    domains_data: List[tuple] = []
+    for row in rows:
+        domains_data.append(
+            (row.get("URL", ""), _split_headings(row, heading_keys, separator))
+        )
+        if len(domains_data) >= per_sheet:
+            sheet_number += 1
+            _write_headings_grouped_sheet(
+                wb, _sheet_title("Headings", sheet_number), domains_data, heading_keys
+            )
+            domains_data = []
 
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer.getvalue()
+    if domains_data:
+        sheet_number += 1
+        _write_headings_grouped_sheet(
+            wb, _sheet_title("Headings", sheet_number), domains_data, heading_keys
+        )
+    elif sheet_number == 0:
+        # Нет данных: только шапка с ключами
+        ws = wb.create_sheet("Headings")
+        for col_idx in range(1, len(heading_keys) + 1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = 22
+        ws.append([_styled_cell(ws, key, HEADINGS_KEY_STYLE) for key in heading_keys])
 
 
-def rows_to_headings_xlsx_bytes(
+def _new_headings_long_sheet(wb: "Workbook", title: str):
+    ws = wb.create_sheet(title)
+    for col_idx, width in enumerate(HEADINGS_LONG_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+    ws.freeze_panes = "A2"
+    ws.append(
+        [_styled_cell(ws, name, HEADINGS_KEY_STYLE) for name in HEADINGS_LONG_COLUMNS]
+    )
+    return ws
+
+
+def _write_headings_long(
+    wb: "Workbook", rows: Iterable[dict], heading_keys: List[str], separator: str
+) -> None:
+    """Длинная (tidy) раскладка: одна строка на заголовок.
+
+    Колонки: Домен, Уровень, Позиция, Текст. При достижении лимита строк
+    XLSX продолжает на следующем листе.
+    """
+    sheet_number = 0
+    ws = None
+    written = XLSX_MAX_ROWS
+
+    for row in rows:
+        domain = row.get("URL", "")
+        headings = _split_headings(row, heading_keys, separator)
+        for key in heading_keys:
+            for position, text in enumerate(headings[key], start=1):
+                if written >= XLSX_MAX_ROWS:
+                    sheet_number += 1
+                    title = _sheet_title("Headings", sheet_number)
+                    ws = _new_headings_long_sheet(wb, title)
+                    written = 1
+                ws.append([domain, key, position, text])
+                written += 1
+
+    if ws is None:
+        _new_headings_long_sheet(wb, "Headings")
+
+
+def write_headings_xlsx(
     rows: Iterable[dict],
+    target: Union[str, IO[bytes]],
+    enabled_headings: Optional[List[str]] = None,
+    layout: str = "grouped",
     separator: str = " => ",
-    enabled_headings: List[str] | None = None,
-) -> bytes:
-    """Экспортирует только выбранные заголовки H1-H6 в группировке по доменам.
+) -> None:
+    """Потоково пишет выбранные заголовки H1-H6 в .xlsx.
 
     Args:
         rows: Итерируемые данные результатов
-        separator: Разделитель между несколькими заголовками в одной ячейке
+        target: Путь или файловый объект
         enabled_headings: Список выбранных заголовков (например, ['H2', 'H3']).
                          Если None, используются все.
+        layout: "grouped" — домены рядом, колонки H1..H6 под каждым доменом
+                (по HEADINGS_DOMAINS_PER_SHEET доменов на лист);
+                "long" — строки (домен, уровень, позиция, текст)
+        separator: Разделитель между несколькими заголовками в одной ячейке
     """
     if not HAS_OPENPYXL:
         raise ImportError("openpyxl не установлена. Установите: pip install openpyxl")
 
-    rows_list = list(rows)
-    all_heading_keys = ["H1", "H2", "H3", "H4", "H5", "H6"]
-
     # Если enabled_headings не указан, используем все доступные
     if enabled_headings is None:
-        heading_keys = all_heading_keys
+        heading_keys = HEADING_KEYS
     else:
         # Фильтруем и сохраняем порядок
-        heading_keys = [h for h in all_heading_keys if h in enabled_headings]
+        heading_keys = [h for h in HEADING_KEYS if h in enabled_headings]
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Headings"
-
-    header_fill = PatternFill(
-        start_color="3B6EDC", end_color="3B6EDC", fill_type="solid"
-    )
-    subheader_fill = PatternFill(
-        start_color="DCE6F8", end_color="DCE6F8", fill_type="solid"
-    )
-    header_font = Font(bold=True, color="FFFFFF")
-    subheader_font = Font(bold=True, color="1F2A44")
-    header_alignment = Alignment(
-        horizontal="center", vertical="center", wrap_text=False
-    )
+    wb = Workbook(write_only=True)
+    _add_headings_styles(wb)
 
-    if not rows_list:
-        for col_idx, key in enumerate(heading_keys, start=1):
-            cell = ws.cell(row=1, column=col_idx, value=key)
-            cell.fill = subheader_fill
-            cell.font = subheader_font
-            cell.alignment = header_alignment
-            ws.column_dimensions[get_column_letter(col_idx)].width = 22
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        return buffer.getvalue()
-
-    domains_data = []
-    max_rows = 0
-    for row in rows_list:
-        domain = row.get("URL", "")
-        headings = {}
-        for key in heading_keys:
-            raw_value = row.get(key, "")
-            if raw_value:
-                parts = [p.strip() for p in raw_value.split(separator)]
-                parts = [p for p in parts if p]
-            else:
-                parts = []
-            headings[key] = parts
-        domain_max = max((len(values) for values in headings.values()), default=0)
-        max_rows = max(max_rows, domain_max)
-        domains_data.append((domain, headings))
+    if not heading_keys:
+        wb.create_sheet("Headings")
+    elif layout == "long":
+        _write_headings_long(wb, rows, heading_keys, separator)
+    else:
+        _write_headings_grouped(wb, rows, heading_keys, separator)
 
-    # Заголовки доменов (строка 1) и H2/H3/... (строка 2)
-    for idx, (domain, headings) in enumerate(domains_data):
-        start_col = idx * len(heading_keys) + 1
-        end_col = start_col + len(heading_keys) - 1
+    wb.save(target)
 
-        ws.merge_cells(
-            start_row=1, start_column=start_col, end_row=1, end_column=end_col
-        )
-        cell = ws.cell(row=1, column=start_col, value=domain)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-
-        for offset, key in enumerate(heading_keys):
-            col = start_col + offset
-            subcell = ws.cell(row=2, column=col, value=key.lower())
-            subcell.fill = subheader_fill
-            subcell.font = subheader_font
-            subcell.alignment = header_alignment
-            ws.column_dimensions[get_column_letter(col)].width = 22
 
-    # Данные
-    for row_offset in range(max_rows):
-        excel_row = 3 + row_offset
-        for idx, (_, headings) in enumerate(domains_data):
-            start_col = idx * len(heading_keys) + 1
-            for offset, key in enumerate(heading_keys):
-                col = start_col + offset
-                values = headings.get(key, [])
-                value = values[row_offset] if row_offset < len(values) else ""
-                cell = ws.cell(row=excel_row, column=col, value=value)
-                cell.alignment = Alignment(
-                    horizontal="left", vertical="center", wrap_text=False
-                )
-
-    ws.freeze_panes = "B3"
+def rows_to_headings_xlsx_bytes(
+    rows: Iterable[dict],
+    separator: str = " => ",
+    enabled_headings: List[str] | None = None,
+) -> bytes:
+    """Экспортирует только выбранные заголовки H1-H6 в группировке по доменам.
 
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer.getvalue()
+    Args:
+        rows: Итерируемые данные результатов
+        separator: Разделитель между несколькими заголовками в одной ячейке
+        enabled_headings: Список выбранных заголовков (например, ['H2', 'H3']).
+                         Если None, используются все.
+    """
+    with tempfile.TemporaryFile() as fh:
+        write_headings_xlsx(
+            rows, fh, enabled_headings=enabled_headings, separator=separator
+        )
+        fh.seek(0)
+        return fh.read()
@@ -0,0 +1,187 @@
+"""
+История аудитов: именованные сохранения результатов задач и сравнение.
+
+Каждое сохранение — два файла в history/: описание (JSON: имя, время,
+задача, число строк) и gzip со строкой на URL:
+"хэш<TAB>URL строкой JSON<TAB>JSON непустых колонок". Хэш (BLAKE2b)
+считается по парам колонка=значение, поэтому порядок и набор пустых колонок
+на него не влияют. Колонки, зависящие от прогона, а не от содержимого
+страниц (замеры времени, фоновые сетевые проверки), не сохраняются.
+
+Сравнение — один проход hash join: старое сохранение загружается в словарь
+(URL, номер повтора) -> (хэш, JSON без разбора), новое читается потоком.
+Строки с равным хэшем пропускаются без разбора JSON; только у изменённых
+сравниваются колонки. 100 тыс. строк сравниваются за секунды.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .image_audit import IMAGE_COLUMNS
+from .timings import TIMING_COLUMNS
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+HISTORY_DIR = PROJECT_ROOT / "history"
+
+# Имя сохранения: буквы, цифры, пробел, точка, дефис, подчёркивание
+HISTORY_NAME_RE = re.compile(r"^[\w][\w .-]{0,99}$")
+
+DIFF_COLUMNS = ["URL", "Изменение", "Колонка", "Было", "Стало"]
+
+# Колонки прогона: меняются от запуска к запуску на тех же страницах
+# (время ответа, доступность ссылок и изображений в момент проверки)
+RUN_COLUMNS = frozenset(TIMING_COLUMNS + ["Битых ссылок"] + IMAGE_COLUMNS)
+
+
+def row_hash(values: Dict[str, str]) -> str:
+    """Хэш содержимого строки по непустым колонкам (кроме URL)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for column in sorted(values):
+        digest.update(column.encode("utf-8"))
+        digest.update(b"\x1e")
+        digest.update(values[column].encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def _row_values(row: Dict[str, str]) -> Dict[str, str]:
+    """Непустые колонки содержимого (без URL и колонок прогона)."""
+    return {
+        column: str(value)
+        for column, value in row.items()
+        if column != "URL" and column not in RUN_COLUMNS and value not in ("", None)
+    }
+
+
+class HistoryStore:
+    """Именованные сохранения результатов задач на диске."""
+
+    def __init__(self, history_dir: Path = HISTORY_DIR):
+        self._dir = history_dir
+        self._dir.mkdir(exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def valid_name(name: str) -> bool:
+        return bool(HISTORY_NAME_RE.match(name))
+
+    def _paths(self, name: str) -> Tuple[Path, Path]:
+        """(описание, строки) сохранения; имя файла — хэш имени."""
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:16]
+        return self._dir / f"{digest}.json", self._dir / f"{digest}.audit.gz"
+
+    def save(self, name: str, rows: Iterable[Dict[str, str]], job_id: str = "") -> Dict:
+        """Сохраняет строки под именем (существующее сохранение заменяется)."""
+        meta_path, rows_path = self._paths(name)
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir, suffix=".part")
+        os.close(fd)
+        count = 0
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as fh:
+                for row in rows:
+                    values = _row_values(row)
+                    # URL строкой JSON: табуляция и перевод строки экранируются
+                    fh.write(
+                        f"{row_hash(values)}\t"
+                        f"{json.dumps(row.get('URL', ''), ensure_ascii=False)}\t"
+                        f"{json.dumps(values, ensure_ascii=False)}\n"
+                    )
+                    count += 1
+            meta = {
+                "name": name,
+                "created_at": time.time(),
+                "job_id": job_id,
+                "rows": count,
+            }
+            with self._lock:
+                os.replace(tmp_path, rows_path)
+                meta_path.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return meta
+
+    def list(self) -> List[Dict]:
+        """Описания сохранений, новые первыми."""
+        items = []
+        for path in self._dir.glob("*.json"):
+            try:
+                items.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        return sorted(items, key=lambda meta: -meta["created_at"])
+
+    def get(self, name: str) -> Optional[Dict]:
+        try:
+            return json.loads(self._paths(name)[0].read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            deleted = False
+            for path in self._paths(name):
+                try:
+                    path.unlink()
+                    deleted = True
+                except OSError:
+                    pass
+            return deleted
+
+    def _iter_rows(self, name: str) -> Iterator[Tuple[str, Tuple[str, int], str]]:
+        """(хэш, (URL, номер повтора URL), JSON колонок) по строкам сохранения.
+
+        Повторы одного URL в списке задачи сопоставляются по порядку.
+        """
+        seen: Dict[str, int] = {}
+        with gzip.open(self._paths(name)[1], "rt", encoding="utf-8") as fh:
+            for line in fh:
+                digest, url, values = line.rstrip("\n").split("\t", 2)
+                if url.startswith('"'):
+                    url = json.loads(url)
+                # иначе — сохранение старого формата, URL как есть
+                occurrence = seen.get(url, 0)
+                seen[url] = occurrence + 1
+                yield digest, (url, occurrence), values
+
+    def diff(self, old: str, new: str) -> Iterator[Dict[str, str]]:
+        """Изменённые URL и колонки между сохранениями old и new."""
+        previous: Dict[Tuple[str, int], Tuple[str, str]] = {
+            key: (digest, values) for digest, key, values in self._iter_rows(old)
+        }
+        for digest, key, values in self._iter_rows(new):
+            url = key[0]
+            before = previous.pop(key, None)
+            if before is None:
+                yield {"URL": url, "Изменение": "новый URL"}
+                continue
+            if before[0] == digest:
+                continue
+            old_values = json.loads(before[1])
+            new_values = json.loads(values)
+            for column in sorted(old_values.keys() | new_values.keys()):
+                if column in RUN_COLUMNS:
+                    continue  # сохранения, сделанные до исключения колонок прогона
+                was = old_values.get(column, "")
+                now = new_values.get(column, "")
+                if was != now:
+                    yield {
+                        "URL": url,
+                        "Изменение": "изменено",
+                        "Колонка": column,
+                        "Было": was,
+                        "Стало": now,
+                    }
+        for url, _ in previous:
+            yield {"URL": url, "Изменение": "URL удалён"}
@@ -0,0 +1,243 @@
+"""
+Аудит веса и размеров изображений страниц.
+
+Адреса из src / srcset / <source srcset> / data-src приводятся к абсолютным
+и проверяются один раз на задачу фоновой очередью (ProbeQueue, как у битых
+ссылок): хук страницы только записывает id её изображений и не ждёт
+проверок. Для каждого изображения делается один GET с Range на первые
+байты: из Content-Range (или Content-Length) берётся вес, из заголовка
+файла — формат и размеры. Изображение целиком не скачивается. Колонки
+веса заполняются в finish, после опустошения очереди (drain).
+"""
+
+import asyncio
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import httpx
+
+from .checks import CheckHook
+from .config import RuntimeOptions
+from .context import CheckContext
+from .network.probe import ProbeQueue
+from .parsers.image_header import LEGACY_IMAGE_FORMATS, parse_image_header
+from .parsers.links import normalize_link
+from .reports import JobAnalysis, Report
+from .results import ResultStore
+
+# Одновременных запросов изображений на задачу
+IMAGE_CHECK_CONCURRENCY = 8
+# Сколько первых байт читать для определения формата и размеров
+IMAGE_HEADER_BYTES = 64 * 1024
+# Пробельные символы ASCII в грамматике HTML
+_HTML_WHITESPACE = " \t\n\r\f"
+
+IMAGE_COLUMNS = [
+    "Изображения, байт",
+    "Макс. изображение, байт",
+    "Макс. изображение",
+    "Изображений в старых форматах",
+]
+
+
+@dataclass
+class ImageInfo:
+    """Результат проверки одного изображения."""
+
+    status: str
+    size: Optional[int] = None
+    format: str = ""
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+def _total_size(resp: httpx.Response) -> Optional[int]:
+    if resp.status_code == 206:
+        # Content-Range: bytes 0-65535/123456
+        total = resp.headers.get("content-range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get("content-length", "")
+    return int(length) if length.isdigit() else None
+
+
+async def probe_image(
+    client: httpx.AsyncClient, url: str, runtime: RuntimeOptions
+) -> ImageInfo:
+    """Вес, формат и размеры изображения по первым IMAGE_HEADER_BYTES байтам."""
+    headers = {"Range": f"bytes=0-{IMAGE_HEADER_BYTES - 1}"}
+    for attempt in range(runtime.retries + 1):
+        try:
+            async with client.stream(
+                "GET", url, headers=headers, follow_redirects=True
+            ) as resp:
+                if resp.status_code >= 400:
+                    return ImageInfo(status=str(resp.status_code))
+                info = ImageInfo(status=str(resp.status_code), size=_total_size(resp))
+                data = b""
+                async for chunk in resp.aiter_bytes():
+                    data += chunk
+                    if len(data) >= IMAGE_HEADER_BYTES:
+                        break
+            header = parse_image_header(data)
+            if header:
+                info.format, info.width, info.height = header
+            elif "svg" in resp.headers.get("content-type", ""):
+                info.format = "svg"
+            if info.size is None and resp.status_code == 200 and len(data) < IMAGE_HEADER_BYTES:
+                info.size = len(data)  # файл прочитан целиком
+            return info
+        except httpx.InvalidURL:
+            return ImageInfo(status="ошибка: некорректный адрес")
+        except httpx.HTTPError as exc:
+            if attempt == runtime.retries:
+                return ImageInfo(status=f"ошибка: {type(exc).__name__}")
+            await asyncio.sleep(0.25)
+    return ImageInfo(status="нет ответа")
+
+
+def parse_srcset(value: str) -> List[str]:
+    """URL кандидатов srcset по алгоритму разбора HTML.
+
+    URL — строка без пробелов: запятые внутри него (data:, параметры CDN
+    вида w_300,h_200) не разделяют кандидаты. Кандидат заканчивается
+    запятыми в конце URL или запятой после дескрипторов; запятая в скобках
+    дескриптора — не разделитель.
+    """
+    urls: List[str] = []
+    pos, end = 0, len(value)
+    while pos < end:
+        while pos < end and (value[pos] in _HTML_WHITESPACE or value[pos] == ","):
+            pos += 1
+        start = pos
+        while pos < end and value[pos] not in _HTML_WHITESPACE:
+            pos += 1
+        url = value[start:pos]
+        if url.endswith(","):
+            url = url.rstrip(",")  # кандидат без дескрипторов
+        else:
+            in_parens = False
+            while pos < end:
+                char = value[pos]
+                pos += 1
+                if char == "(":
+                    in_parens = True
+                elif char == ")":
+                    in_parens = False
+                elif char == "," and not in_parens:
+                    break
+        if url:
+            urls.append(url)
+    return urls
+
+
+def extract_image_urls(ctx: CheckContext) -> List[str]:
+    """Абсолютные адреса изображений страницы (без дублей и data:)."""
+    soup = ctx.soup
+    if not soup or not soup.body:
+        return []
+    base_url = ctx.final_url or ctx.normalized_url
+    base_tag = soup.find("base", href=True)
+    if base_tag:
+        base_url = urljoin(base_url, base_tag["href"].strip())
+
+    candidates: List[str] = []
+    for tag in soup.body.find_all(["img", "source"]):
+        if tag.name == "source" and (tag.parent is None or tag.parent.name != "picture"):
+            continue  # <source> у <video>/<audio>
+        for attr in ("src", "data-src"):
+            if tag.get(attr):
+                candidates.append(tag[attr])
+        for attr in ("srcset", "data-srcset"):
+            candidates.extend(parse_srcset(tag.get(attr) or ""))
+
+    urls: Dict[str, None] = {}
+    for candidate in candidates:
+        candidate = candidate.strip()
+        if not candidate or candidate[:5].lower() == "data:":
+            continue
+        url = normalize_link(urljoin(base_url, candidate))
+        if url:
+            urls.setdefault(url)
+    return list(urls)
+
+
+class ImageAnalysis(JobAnalysis):
+    """Вес и размеры изображений: итоги по странице и отчёт по изображениям."""
+
+    name = "images"
+
+    def __init__(self, runtime: RuntimeOptions, concurrency: int = IMAGE_CHECK_CONCURRENCY):
+        self._images: ProbeQueue[ImageInfo] = ProbeQueue(
+            probe_image,
+            runtime,
+            concurrency,
+            on_error=lambda exc: ImageInfo(status=f"ошибка: {type(exc).__name__}"),
+        )
+        self._pages: List[Tuple[int, array]] = []  # (idx страницы, id изображений)
+
+    def page_hook(self, idx: int) -> CheckHook:
+        async def hook(ctx: CheckContext) -> Optional[Dict[str, str]]:
+            urls = extract_image_urls(ctx)
+            if urls:
+                self._pages.append((idx, array("I", (self._images.add(url) for url in urls))))
+            return None
+
+        return hook
+
+    async def drain(self, is_cancelled: Callable[[], bool]):
+        await self._images.drain(is_cancelled)
+
+    async def aclose(self):
+        await self._images.aclose()
+
+    def finish(self, results: ResultStore) -> Report:
+        results.add_columns(IMAGE_COLUMNS)
+        infos = self._images.results
+        urls = self._images.urls
+        usage = [0] * len(urls)  # id -> на скольких страницах
+        for idx, image_ids in self._pages:
+            total = 0
+            largest: Tuple[int, str] = (0, "")
+            legacy = 0
+            for image_id in image_ids:
+                usage[image_id] += 1
+                info = infos[image_id]
+                if info is None:
+                    continue  # не проверено (задачу остановили)
+                if info.size:
+                    total += info.size
+                    largest = max(largest, (info.size, urls[image_id]))
+                if info.format in LEGACY_IMAGE_FORMATS:
+                    legacy += 1
+            results.update(
+                idx,
+                {
+                    "Изображения, байт": str(total),
+                    "Макс. изображение, байт": str(largest[0]) if largest[1] else "",
+                    "Макс. изображение": largest[1],
+                    "Изображений в старых форматах": str(legacy),
+                },
+            )
+
+        report = Report(
+            ["Изображение", "Код ответа", "Формат", "Байт", "Ширина", "Высота", "Страниц"]
+        )
+        checked = [
+            (image_id, info) for image_id, info in enumerate(infos) if info is not None
+        ]
+        # Тяжёлые изображения — первыми
+        for image_id, info in sorted(checked, key=lambda item: -(item[1].size or 0)):
+            report.rows.append(
+                (
+                    urls[image_id],
+                    info.status,
+                    info.format,
+                    "" if info.size is None else info.size,
+                    "" if info.width is None else info.width,
+                    "" if info.height is None else info.height,
+                    usage[image_id],
+                )
+            )
+        return report
@@ -3,18 +3,78 @@ import logging
 import threading
 import time
 import uuid
-from typing import Dict, List, Optional, Tuple
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple, TypeVar
 
 import httpx
 
-from . import checks
+from concurrent.futures import Future
+
+from . import checks, memory, metrics
+from .artifacts import EXPORT_DIR, ExportStore
+from .checkers.seo.robots import fetch_robots
 from .config import CheckOptions, RuntimeOptions
+from .context import JobCache
+from .crawl.crawler import Crawler, link_collector
+from .crawl.sitemaps import SitemapStats, discover_sitemap_urls
+from .duplicates import DuplicateAnalysis
+from .image_audit import IMAGE_COLUMNS, ImageAnalysis
+from .link_checker import LinkAnalysis
+from .history import DIFF_COLUMNS, HISTORY_DIR, HistoryStore
+from .link_graph import LinkGraphAnalysis
+from .exporters import (
+    HAS_OPENPYXL,
+    gzip_chunks,
+    iter_csv_chunks,
+    write_headings_xlsx,
+    write_rows_xlsx,
+)
+from .parsers.links import normalize_link, site_key
+from .profiling import JobProfiler
+from .reports import JobAnalysis, Report
+from .resources import ResourceSampler
+from .results import ResultStore
+from .snapshots import SNAPSHOT_DIR, RecordingTransport, ReplayTransport, SnapshotStore
+from .timings import PageTimings, TimingStats
+from .typed_exporters import TYPED_EXPORT_FORMATS, TYPED_WRITERS
+from .warc import WarcPages, iter_warc_responses, write_warc
 
 # Импорт из корневого модуля (два уровня вверх)
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from logging_config import create_job_logger, cleanup_job_logger, mask_sensitive_url
+from logging_config import (
+    create_job_logger,
+    cleanup_job_logger,
+    get_job_profile_base,
+)
+
+FINISHED_STATUSES = ("completed", "stopped", "error")
+
+# Колонки, которые повторный анализ без сети не пересчитывает (обход,
+# проверки ссылок и изображений): переносятся из строк исходной задачи
+REPLAY_CARRIED_COLUMNS = ["Глубина", "Ссылок", "Битых ссылок"] + IMAGE_COLUMNS
+# Отчёты тех же анализов переносятся целиком
+REPLAY_CARRIED_REPORTS = ("links", "images")
+
+T = TypeVar("T")
+
+
+def build_analyses(
+    check_options: CheckOptions, runtime: RuntimeOptions
+) -> List[JobAnalysis]:
+    """Анализы по всем страницам задачи, включённые в опциях."""
+    analyses: List[JobAnalysis] = []
+    if check_options.check_near_duplicates:
+        analyses.append(DuplicateAnalysis())
+    if check_options.check_links:
+        analyses.append(LinkAnalysis(runtime))
+    if check_options.check_image_weight:
+        analyses.append(ImageAnalysis(runtime))
+    if check_options.check_link_graph:
+        analyses.append(LinkGraphAnalysis())
+    return analyses
 
 
 class Job:
@@ -24,6 +84,11 @@ class Job:
         check_options: CheckOptions,
         runtime: RuntimeOptions,
         on_complete_callback=None,
+        on_progress_callback=None,
+        snapshots: Optional[SnapshotStore] = None,
+        replay_from: Optional[str] = None,
+        warc_path: Optional[str] = None,
+        carried: Optional[List[Dict[str, str]]] = None,
     ):
         self.id = uuid.uuid4().hex
         self.urls = urls
@@ -31,15 +96,31 @@ class Job:
         self.runtime = runtime
         self.status: str = "queued"  # Изменено с "pending" на "queued"
         self.created_at = time.time()
-        self.results: List[tuple[int, Dict[str, str]]] = []
+        self.results = ResultStore(len(urls))
         self.error: Optional[str] = None
         self.total = len(urls)
         self.completed = 0
+        self.sitemap_stats: List[Dict] = []  # статистика разобранных sitemap
+        self.reports: Dict[str, Report] = {}  # отчёты анализов после обхода
+        self.timings = TimingStats()  # перцентили времени по страницам
+        self.counters = metrics.JobCounters()  # запросы, повторы, таймауты, байты
+        self.profile_formats: List[str] = []  # сохранённые профили (runtime.profile)
+        self.memory = memory.JobMemory(runtime.memory_budget_mb * 1024 * 1024)
+        self._analyses = build_analyses(check_options, runtime)
         self.queue_position: int = 0  # Позиция в очереди
         self._lock = threading.Lock()
         self._cancel = threading.Event()
         self._thread: Optional[threading.Thread] = None
+        self.thread_id: Optional[int] = None  # native id потока (CPU задачи)
         self._on_complete = on_complete_callback
+        self._on_progress = on_progress_callback
+        self._cache: Optional[JobCache] = None
+        # Снимки ответов: запись (обычная задача) или чтение (повторный анализ)
+        self._snapshots = snapshots
+        self.replay_from = replay_from
+        self.warc_path = warc_path  # импорт: страницы берутся из WARC-файла
+        # Повторный анализ: значения исходной задачи по индексу URL
+        self.carried = carried
 
     def start(self):
         self._thread = threading.Thread(target=self._run, daemon=True)
@@ -51,21 +132,47 @@ class Job:
     def is_cancelled(self) -> bool:
         return self._cancel.is_set()
 
+    def _notify_progress(self):
+        """Сообщает менеджеру об изменении состояния (для потока событий)."""
+        if self._on_progress:
+            self._on_progress()
+
     def _run(self):
+        self.thread_id = threading.get_native_id()
         # Создать job-specific logger
-        job_logger = create_job_logger(self.id)
+        job_logger = create_job_logger(self.id, json_lines=bool(self.runtime.json_log))
 
         # Логируем старт job с параметрами
         enabled_checks = [k for k, v in self.check_options.to_dict().items() if v]
         job_logger.info(f"Job started: {self.total} URLs")
         job_logger.info(f"Runtime options: timeout={self.runtime.timeout_seconds}s, retries={self.runtime.retries}, concurrency={self.runtime.concurrency}")
+        if self.runtime.crawl_depth or self.runtime.sitemap_discovery:
+            job_logger.info(f"Crawl mode: depth={self.runtime.crawl_depth}, sitemaps={'on' if self.runtime.sitemap_discovery else 'off'}, max pages per site={self.runtime.crawl_max_pages}")
         job_logger.info(f"Enabled checks ({len(enabled_checks)}): {', '.join(enabled_checks)}")
+        if self.replay_from:
+            job_logger.info(f"Re-analysis from snapshot of job {self.replay_from} (no network)")
+        elif self._recording():
+            self._snapshots.begin(self.id)
+            job_logger.info("Recording response snapshot")
 
         start_time = time.time()
         self.status = "running"
+        self._notify_progress()
+
+        profiler: Optional[JobProfiler] = None
+        if self.runtime.profile:
+            profiler = JobProfiler()
+            profiler.start()
+            job_logger.info("Profiling enabled (cProfile + stack sampling)")
+        if self.runtime.trace_memory:
+            memory.trace_start()
 
         try:
+            if self.warc_path:
+                self._import_warc(job_logger)
             asyncio.run(self._run_async())
+            if not self.error:
+                self._finish_analyses(job_logger)
             if self.is_cancelled():
                 self.status = "stopped"
                 job_logger.warning("Job stopped by user")
@@ -83,28 +190,270 @@ class Job:
             self.status = "error"
             job_logger.exception(f"Job failed with exception: {exc}")
         finally:
+            if profiler:
+                self._save_profile(profiler, job_logger)
+            self._log_memory(job_logger)
+            self._cache = None  # задачи кэша привязаны к завершённому event loop
+            if self.replay_from:
+                self._snapshots.unpin(self.replay_from)
+            elif self._recording():
+                self._snapshots.finish(self.id)
             # Закрыть job logger
             cleanup_job_logger(self.id)
+            self._notify_progress()
 
             # Вызвать callback после завершения
             if self._on_complete:
                 self._on_complete(self.id)
 
+    def _recording(self) -> bool:
+        """Ответы обычной задачи пишутся в снимок (runtime-опция snapshot)."""
+        return bool(
+            self._snapshots
+            and self.runtime.snapshot
+            and not self.replay_from
+            and not self.warc_path
+        )
+
+    def _log_memory(self, job_logger: logging.Logger):
+        stats = self.memory.to_dict(self.results.approx_bytes)
+        job_logger.info(
+            f"Memory: results={memory.format_bytes(stats['results_bytes'])} "
+            f"peak in-flight bodies={memory.format_bytes(stats['peak_inflight_bytes'])} "
+            f"budget={memory.format_bytes(stats['budget_bytes'] or None)} "
+            f"paused={stats['paused_seconds']}s "
+            f"traced peak={memory.format_bytes(stats['traced_peak_bytes'])}"
+        )
+        if self.runtime.trace_memory:
+            for line in memory.trace_stop():
+                job_logger.info(f"Traced allocations: {line}")
+
+    def _save_profile(self, profiler: JobProfiler, job_logger: logging.Logger):
+        profiler.stop()
+        try:
+            paths = profiler.save(get_job_profile_base(self.id))
+        except OSError as exc:
+            job_logger.error(f"Profile not saved: {exc}")
+            return
+        self.profile_formats = list(paths)
+        job_logger.info(f"Profile saved: {profiler.samples} stack samples")
+
+    def _import_warc(self, job_logger: logging.Logger):
+        """Переносит ответы из WARC в снимок задачи и проверяет его как
+        повторный анализ: страницы — список из экспорта lime-frog, для
+        чужих архивов — HTML-ответы и редиректы без вспомогательных."""
+        started = time.time()
+        store = self._snapshots
+        store.begin(self.id)
+        pages = WarcPages()
+        records = 0
+        try:
+            for response in iter_warc_responses(self.warc_path, pages.add_listed):
+                if self.is_cancelled():
+                    break
+                records += 1
+                store.record(
+                    self.id,
+                    response.url,
+                    response.status_code,
+                    response.headers,
+                    response.body,
+                    response.date,
+                )
+                pages.add_response(response)
+        finally:
+            store.finish(self.id)
+            try:
+                os.unlink(self.warc_path)
+            except OSError:
+                pass
+        self.urls = pages.pages()
+        self.total = len(self.urls)
+        if store.pin(self.id):
+            self.replay_from = self.id
+        job_logger.info(
+            f"WARC imported: {records} responses, {self.total} pages "
+            f"({'page list from export' if pages.listed else 'pages guessed'}) "
+            f"in {time.time() - started:.2f}s"
+        )
+        self._notify_progress()
+
+    def _finish_analyses(self, job_logger: logging.Logger):
+        """Дописывает в строки результаты анализов и сохраняет их отчёты."""
+        for analysis in self._analyses:
+            started = time.time()
+            try:
+                report = analysis.finish(self.results)
+            except Exception:
+                job_logger.exception(f"Analysis '{analysis.name}' failed")
+                continue
+            if report is not None:
+                self.reports[analysis.name] = report
+                job_logger.info(
+                    f"Analysis '{analysis.name}': {len(report)} report rows "
+                    f"in {time.time() - started:.2f}s"
+                )
+        self._analyses = []
+
     async def _run_async(self):
+        # Задачи asyncio наследуют контекст: fetch_with_retries видит счётчики задачи
+        metrics.JOB_COUNTERS.set(self.counters)
+        sampler: Optional[asyncio.Task] = None
+        if self.runtime.trace_memory:
+            sampler = asyncio.create_task(memory.sample_traced(self.memory))
+        try:
+            await self._run_client()
+        finally:
+            if sampler:
+                sampler.cancel()
+
+    async def _run_client(self):
         limits = httpx.Limits(
             max_keepalive_connections=self.runtime.concurrency,
             max_connections=self.runtime.concurrency * 2,
         )
         timeout = httpx.Timeout(self.runtime.timeout_seconds)
+        transport: Optional[httpx.AsyncBaseTransport] = None
+        if self._snapshots and self.replay_from:
+            transport = ReplayTransport(self._snapshots, self.replay_from)
+        elif self._recording():
+            transport = RecordingTransport(
+                httpx.AsyncHTTPTransport(limits=limits), self._snapshots, self.id
+            )
         async with httpx.AsyncClient(
-            headers=checks.BROWSER_HEADERS, limits=limits, timeout=timeout
+            headers=checks.BROWSER_HEADERS,
+            limits=limits,
+            timeout=timeout,
+            transport=transport,
         ) as client:
-            sem = asyncio.Semaphore(self.runtime.concurrency)
-            tasks = [
-                asyncio.create_task(self._process_single(idx, url, client, sem))
-                for idx, url in enumerate(self.urls)
-            ]
+            self._cache = JobCache()
+            try:
+                if self.runtime.crawl_depth or self.runtime.sitemap_discovery:
+                    await self._run_crawl(client)
+                else:
+                    sem = asyncio.Semaphore(self.runtime.concurrency)
+                    tasks = [
+                        asyncio.create_task(self._process_single(idx, url, client, sem))
+                        for idx, url in enumerate(self.urls)
+                    ]
+                    await asyncio.gather(*tasks)
+                await self._drain_analyses()
+            finally:
+                for analysis in self._analyses:
+                    await analysis.aclose()
+
+    async def _drain_analyses(self):
+        """Ждёт фоновые проверки анализов (ссылки, изображения), начатые страницами."""
+        job_logger = logging.getLogger(f"lime_frog.job.{self.id}")
+        for analysis in self._analyses:
+            started = time.time()
+            await analysis.drain(self.is_cancelled)
+            elapsed = time.time() - started
+            if elapsed >= 1:
+                job_logger.info(
+                    f"Analysis '{analysis.name}': background work finished "
+                    f"{elapsed:.1f}s after the last page"
+                )
+
+    async def _run_crawl(self, client: httpx.AsyncClient):
+        """Обход сайтов в ширину от введённых URL по внутренним ссылкам
+        и (опционально) по sitemap.
+
+        concurrency воркеров берут страницы из очереди на диске; воркер
+        ждёт, пока очередь пуста, но другие страницы ещё проверяются или
+        идёт разбор sitemap (они могут добавить новые URL).
+        """
+        crawler = Crawler(
+            self.urls, self.runtime.crawl_depth, self.runtime.crawl_max_pages
+        )
+        self.total = crawler.enqueued
+        # Все изменения очереди происходят в одном event loop без await
+        # между проверкой и изменением, поэтому достаточно события "пробуждения"
+        wake = asyncio.Event()
+        in_flight = 0
+
+        async def worker():
+            nonlocal in_flight
+            while not self.is_cancelled():
+                item = crawler.pop()
+                if item is None:
+                    if not in_flight:
+                        break
+                    wake.clear()
+                    await wake.wait()
+                    continue
+                in_flight += 1
+
+                idx, depth, url = item
+                links: List[str] = []
+                try:
+                    row = await self._check_url(
+                        idx, url, client, hooks=[link_collector(links)]
+                    )
+                    row["Глубина"] = str(depth)
+                    with self._lock:
+                        self.results.add(idx, row)
+                        self.completed += 1
+                finally:
+                    crawler.discover(url, links, depth)
+                    self.total = crawler.enqueued
+                    in_flight -= 1
+                    wake.set()
+                self._notify_progress()
+            wake.set()
+
+        async def discover_sitemaps():
+            nonlocal in_flight
+            job_logger = logging.getLogger(f"lime_frog.job.{self.id}")
+            try:
+                for root in crawler.sites():
+                    if self.is_cancelled():
+                        break
+                    site = site_key(root)
+
+                    def on_url(loc: str) -> bool:
+                        if self.is_cancelled():
+                            return False
+                        link = normalize_link(loc)
+                        if link and site_key(link) == site and crawler.enqueue(link, 0, site):
+                            self.total = crawler.enqueued
+                            wake.set()
+                        return not crawler.is_full(site)
+
+                    def on_stats(stats: SitemapStats):
+                        self.sitemap_stats.append(stats.to_dict())
+                        job_logger.info(
+                            f"Sitemap {stats.url}: {stats.kind or '-'} "
+                            f"status={stats.status or '-'} urls={stats.url_count} "
+                            f"sitemaps={stats.sitemap_count} "
+                            f"lastmod={stats.lastmod_min or '-'}..{stats.lastmod_max or '-'} "
+                            f"in {stats.parse_seconds:.2f}s"
+                            + (f" | {stats.error}" if stats.error else "")
+                        )
+                        self._notify_progress()
+
+                    await discover_sitemap_urls(
+                        client,
+                        root,
+                        self.runtime,
+                        on_url,
+                        on_stats,
+                        load_robots=lambda origin: fetch_robots(
+                            client, self.runtime, origin, self._cache
+                        ),
+                    )
+            finally:
+                in_flight -= 1
+                wake.set()
+
+        tasks = [worker() for _ in range(self.runtime.concurrency)]
+        if self.runtime.sitemap_discovery:
+            in_flight += 1  # разбор sitemap считается незавершённой работой
+            tasks.append(discover_sitemaps())
+        try:
             await asyncio.gather(*tasks)
+        finally:
+            crawler.close()
 
     async def _process_single(
         self, idx: int, url: str, client: httpx.AsyncClient, sem: asyncio.Semaphore
@@ -112,72 +461,364 @@ class Job:
         if self.is_cancelled():
             return
 
-        job_logger = logging.getLogger(f"lime_frog.job.{self.id}")
-
         async with sem:
             if self.is_cancelled():
                 return
 
-            start_time = time.time()
-            try:
-                row = await checks.run_all_checks(
-                    url, client, self.check_options, self.runtime
-                )
-                elapsed_ms = (time.time() - start_time) * 1000
+            row = await self._check_url(idx, url, client)
+            if self.carried:
+                for column, value in self.carried[idx].items():
+                    row.setdefault(column, value)
 
-                # Логируем успешную обработку
-                status_code = row.get("Код ответа", "unknown")
-                final_url = row.get("Редирект", url) if row.get("Редирект") else url
-                job_logger.info(
-                    f"[{idx + 1}/{self.total}] {mask_sensitive_url(url)} → {status_code} | "
-                    f"{elapsed_ms:.0f}ms | final: {mask_sensitive_url(final_url)[:50]}"
-                )
+            with self._lock:
+                self.results.add(idx, row)
+                self.completed += 1
+            self._notify_progress()
 
-            except Exception as exc:  # pragma: no cover - defensive
-                elapsed_ms = (time.time() - start_time) * 1000
-                error_type = type(exc).__name__
+    async def _check_url(
+        self,
+        idx: int,
+        url: str,
+        client: httpx.AsyncClient,
+        hooks: Optional[List[checks.CheckHook]] = None,
+    ) -> Dict[str, str]:
+        """Проверяет один URL; ошибка превращается в строку с текстом ошибки."""
+        job_logger = logging.getLogger(f"lime_frog.job.{self.id}")
+        hooks = list(hooks or [])
+        for analysis in self._analyses:
+            hook = analysis.page_hook(idx)
+            if hook:
+                hooks.append(hook)
+
+        if await self.memory.wait_for_budget(lambda: self.results.approx_bytes):
+            job_logger.info(
+                f"[{idx + 1}/{self.total}] paused for memory budget "
+                f"({memory.format_bytes(self.memory.budget_bytes)})"
+            )
+        page_memory = self.memory.page_started()
+        start_time = time.time()
+        timings = PageTimings()
+        try:
+            row = await checks.run_all_checks(
+                url,
+                client,
+                self.check_options,
+                self.runtime,
+                hooks=hooks,
+                cache=self._cache,
+                timings=timings,
+            )
+            elapsed_ms = (time.time() - start_time) * 1000
+            self.timings.add(timings, elapsed_ms)
+
+            # Логируем успешную обработку
+            status_code = row.get("Код ответа", "unknown")
+            final_url = row.get("Редирект", url) if row.get("Редирект") else url
+            job_logger.info(
+                f"[{idx + 1}/{self.total}] {url} → {status_code} | "
+                f"{elapsed_ms:.0f}ms | final: {final_url[:50]} | "
+                f"{timings.brief()}"
+            )
 
-                # Логируем ошибку
-                job_logger.error(
-                    f"[{idx + 1}/{self.total}] {mask_sensitive_url(url)} → ERROR ({error_type}) | "
-                    f"{elapsed_ms:.0f}ms | {str(exc)[:100]}"
-                )
+        except Exception as exc:  # pragma: no cover - defensive
+            elapsed_ms = (time.time() - start_time) * 1000
+            error_type = type(exc).__name__
 
-                row = {col: "" for col in checks.CSV_COLUMNS}
-                row["URL"] = url
-                row["Код ответа"] = f"ошибка: {exc}"[:200]
+            # Логируем ошибку
+            job_logger.error(
+                f"[{idx + 1}/{self.total}] {url} → ERROR ({error_type}) | "
+                f"{elapsed_ms:.0f}ms | {str(exc)[:100]}"
+            )
 
-            with self._lock:
-                self.results.append((idx, row))
-                self.completed += 1
+            row = {col: "" for col in checks.get_active_columns(self.check_options)}
+            row["URL"] = url
+            row["Код ответа"] = f"ошибка: {exc}"[:200]
+        finally:
+            self.memory.page_finished(page_memory)
+
+        return row
+
+    def results_since(
+        self, cursor: int, limit: int
+    ) -> Tuple[List[Tuple[int, Dict[str, str]]], int]:
+        """Возвращает строки, завершённые после cursor (в порядке завершения)."""
+        return self.results.since(cursor, limit)
 
 
 class JobManager:
-    def __init__(self, max_concurrent_jobs: int = 1):
+    def __init__(self, max_concurrent_jobs: int = 1, data_dir: Optional[Path] = None):
+        """data_dir — корень exports/, snapshots/, history/ (по умолчанию
+        каталог проекта; бенчмарк передаёт временный, чтобы не трогать
+        данные работающего сервиса)."""
         self._jobs: Dict[str, Job] = {}
         self._lock = threading.Lock()
         self._max_concurrent = max_concurrent_jobs
         self._queue: List[str] = []  # Очередь job_id
         self._sessions: Dict[str, float] = {}  # session_id -> last_heartbeat_time
         self._session_timeout = 10  # Таймаут сессии в секундах
+        self._stream_sessions: Dict[str, int] = {}  # session_id -> открытых потоков
+        self._stream_count = 0
+        # Версия состояния: растёт при любом изменении, потоки событий ждут её
+        self._version = 0
+        self._changed = threading.Condition()
+        # Общие для всех потоков событий значения текущей версии
+        self._shared_version = -1
+        self._shared: Dict[Hashable, Any] = {}
+        self._shared_lock = threading.Lock()
+        self.exports = ExportStore(
+            data_dir / "exports" if data_dir else EXPORT_DIR,
+            on_change=self._notify_change,
+        )
+        self.snapshots = SnapshotStore(data_dir / "snapshots" if data_dir else SNAPSHOT_DIR)
+        self.history = HistoryStore(data_dir / "history" if data_dir else HISTORY_DIR)
+        self.resources = ResourceSampler(self._running_job_stats)
 
     def create_job(
         self, urls: List[str], check_options: CheckOptions, runtime: RuntimeOptions
     ) -> Job:
         job = Job(
-            urls, check_options, runtime, on_complete_callback=self._on_job_complete
+            urls,
+            check_options,
+            runtime,
+            on_complete_callback=self._on_job_complete,
+            on_progress_callback=self._notify_change,
+            snapshots=self.snapshots,
+        )
+        return self._enqueue(job)
+
+    def reanalyze(self, source: Job, check_options: CheckOptions) -> Optional[Job]:
+        """Повторный анализ страниц завершённой задачи по её снимку, без сети.
+
+        Проверяются те же страницы (включая найденные обходом); анализы,
+        которым нужны новые запросы (битые ссылки, вес изображений),
+        отключаются, а их колонки, отчёты и глубина обхода переносятся из
+        исходной задачи. None — снимок задачи недоступен (вытеснен).
+        """
+        # Повторный анализ повторного анализа читает тот же исходный снимок
+        snapshot_id = source.replay_from or source.id
+        if not self.snapshots.has(snapshot_id) or not self.snapshots.pin(snapshot_id):
+            return None
+        check_options = replace(check_options, check_links=False, check_image_weight=False)
+        runtime = replace(
+            source.runtime, crawl_depth=0, sitemap_discovery=0, retries=0
+        )
+        urls: List[str] = []
+        carried: List[Dict[str, str]] = []
+        for row in source.results.iter_ordered():
+            urls.append(row["URL"])
+            carried.append(
+                {
+                    column: row[column]
+                    for column in REPLAY_CARRIED_COLUMNS
+                    if row.get(column, "") != ""
+                }
+            )
+        job = Job(
+            urls,
+            check_options,
+            runtime,
+            on_complete_callback=self._on_job_complete,
+            on_progress_callback=self._notify_change,
+            snapshots=self.snapshots,
+            replay_from=snapshot_id,
+            carried=carried,
+        )
+        for name in REPLAY_CARRIED_REPORTS:
+            if name in source.reports:
+                job.reports[name] = source.reports[name]
+        return self._enqueue(job)
+
+    def import_warc(
+        self, path: str, check_options: CheckOptions, runtime: RuntimeOptions
+    ) -> Job:
+        """Задача по ответам из WARC-файла (файл удаляется после разбора)."""
+        check_options = replace(check_options, check_links=False, check_image_weight=False)
+        runtime = replace(runtime, crawl_depth=0, sitemap_discovery=0, retries=0)
+        job = Job(
+            [],
+            check_options,
+            runtime,
+            on_complete_callback=self._on_job_complete,
+            on_progress_callback=self._notify_change,
+            snapshots=self.snapshots,
+            warc_path=path,
         )
+        return self._enqueue(job)
+
+    def _enqueue(self, job: Job) -> Job:
         with self._lock:
             self._jobs[job.id] = job
             self._queue.append(job.id)
             self._update_queue_positions()
             self._process_queue()
+        self._notify_change()
         return job
 
     def _on_job_complete(self, job_id: str):
         """Обработчик завершения задачи - запускает следующую из очереди."""
         with self._lock:
             self._process_queue()
+            job = self._jobs.get(job_id)
+        # XLSX собирается заранее, чтобы скачивание отдавало готовый файл
+        if job and len(job.results) and HAS_OPENPYXL:
+            self.submit_xlsx(job)
+        self._notify_change()
+
+    @staticmethod
+    def _export_rows(job: Job, rows: Optional[int]) -> Iterator[Dict[str, str]]:
+        """Строки экспорта: все или срез работающей задачи (первые rows)."""
+        if rows is None:
+            return job.results.iter_ordered()
+        return job.results.iter_first(rows)
+
+    def submit_xlsx(self, job: Job, rows: Optional[int] = None) -> Future:
+        """Ставит в очередь фоновую сборку XLSX по результатам задачи.
+
+        rows — срез работающей задачи: ключ артефакта по числу строк.
+        """
+        return self.exports.submit(
+            job.id,
+            "xlsx",
+            lambda path: write_rows_xlsx(
+                self._export_rows(job, rows), job.results.columns(), path
+            ),
+            options={"rows": rows} if rows is not None else None,
+        )
+
+    def submit_csv(self, job: Job, compress: bool = False) -> Future:
+        """Ставит в очередь фоновую сборку CSV (или CSV.gz)."""
+
+        def build(path: str):
+            chunks = iter_csv_chunks(job.results.iter_ordered(), job.results.columns())
+            if compress:
+                chunks = gzip_chunks(chunks)
+            with open(path, "wb") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+
+        return self.exports.submit(
+            job.id,
+            "csv",
+            build,
+            options={"gzip": True} if compress else None,
+            ext="csv.gz" if compress else "csv",
+        )
+
+    def submit_headings_xlsx(
+        self,
+        job: Job,
+        enabled_headings: Optional[List[str]] = None,
+        layout: str = "grouped",
+        rows: Optional[int] = None,
+    ) -> Future:
+        """Ставит в очередь фоновую сборку XLSX с заголовками H1-H6."""
+        options: Dict[str, Any] = {"headings": enabled_headings, "layout": layout}
+        if rows is not None:
+            options["rows"] = rows
+        return self.exports.submit(
+            job.id,
+            "headings",
+            lambda path: write_headings_xlsx(
+                self._export_rows(job, rows),
+                path,
+                enabled_headings=enabled_headings,
+                layout=layout,
+            ),
+            options=options,
+            ext="xlsx",
+        )
+
+    def submit_typed(self, job: Job, fmt: str, rows: Optional[int] = None) -> Future:
+        """Ставит в очередь фоновую сборку NDJSON / SQLite / Parquet."""
+        writer = TYPED_WRITERS[fmt]
+        return self.exports.submit(
+            job.id,
+            fmt,
+            lambda path: writer(self._export_rows(job, rows), job.results.columns(), path),
+            options={"rows": rows} if rows is not None else None,
+            ext=TYPED_EXPORT_FORMATS[fmt][0],
+        )
+
+    def submit_warc(self, job: Job) -> Future:
+        """Ставит в очередь сборку WARC из снимка ответов задачи."""
+        snapshot_id = job.replay_from or job.id
+        return self.exports.submit(
+            job.id,
+            "warc",
+            lambda path: write_warc(
+                self.snapshots,
+                snapshot_id,
+                path,
+                pages=[row["URL"] for row in job.results.iter_ordered()],
+            ),
+            ext="warc.gz",
+        )
+
+    def submit_history_diff(self, old: Dict, new: Dict) -> Future:
+        """Ставит в очередь сборку CSV с различиями двух сохранений истории."""
+
+        def build(path: str):
+            with open(path, "wb") as fh:
+                for chunk in iter_csv_chunks(
+                    self.history.diff(old["name"], new["name"]), DIFF_COLUMNS
+                ):
+                    fh.write(chunk)
+
+        # Время сохранений в ключе: пересохранение под тем же именем — новый файл
+        return self.exports.submit(
+            "history",
+            "diff",
+            build,
+            options={
+                "old": [old["name"], old["created_at"]],
+                "new": [new["name"], new["created_at"]],
+            },
+            ext="csv",
+        )
+
+    def submit_report(self, job: Job, name: str) -> Future:
+        """Ставит в очередь сборку CSV-отчёта анализа (дубли, ссылки и т.п.)."""
+        report = job.reports[name]
+
+        def build(path: str):
+            with open(path, "wb") as fh:
+                for chunk in iter_csv_chunks(report.iter_dicts(), report.columns):
+                    fh.write(chunk)
+
+        return self.exports.submit(job.id, f"report-{name}", build, ext="csv")
+
+    def _notify_change(self):
+        """Увеличивает версию состояния и будит ожидающие потоки событий."""
+        with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """Ждёт, пока версия состояния станет отличной от version.
+
+        Возвращает текущую версию (равную version, если истёк таймаут).
+        """
+        with self._changed:
+            if self._version == version:
+                self._changed.wait(timeout)
+            return self._version
+
+    def shared_event(self, version: int, key: Hashable, build: Callable[[], T]) -> T:
+        """Значение версии version, общее для всех потоков событий.
+
+        Снимки и пачки строк строятся один раз на версию первым потоком,
+        остальные берут готовое: стоимость изменения не растёт с числом
+        открытых вкладок. Поток, отставший на версию, строит сам, без кэша.
+        """
+        with self._shared_lock:
+            if version > self._shared_version:
+                self._shared_version = version
+                self._shared = {}
+            elif version < self._shared_version:
+                return build()
+            if key not in self._shared:
+                self._shared[key] = build()
+            return self._shared[key]
 
     def _update_queue_positions(self):
         """Обновляет позиции в очереди для всех задач."""
@@ -220,7 +861,16 @@ class JobManager:
             if job_id in self._queue:
                 self._queue.remove(job_id)
                 self._update_queue_positions()
+                if job.replay_from:
+                    # Задача так и не запустится — снимаем защиту снимка
+                    self.snapshots.unpin(job.replay_from)
+                if job.warc_path:
+                    try:
+                        os.unlink(job.warc_path)
+                    except OSError:
+                        pass
             self._process_queue()
+        self._notify_change()
 
         return True
 
@@ -233,8 +883,37 @@ class JobManager:
             "completed": job.completed,
             "error": job.error,
             "has_results": bool(job.results),
+            "exports": self.exports.describe(job.id),
+            "reports": list(job.reports),
+            "snapshot": self.snapshots.describe(job.replay_from or job.id),
+            "timings": job.timings.summary(),
+            "fetch": job.counters.to_dict(),
+            "profile": job.profile_formats,
+            "memory": job.memory.to_dict(job.results.approx_bytes),
         }
 
+    def render_metrics(self) -> str:
+        """Метрики процесса и очереди задач для /metrics."""
+        with self._lock:
+            running = [job for job in self._jobs.values() if job.status == "running"]
+            queue_depth = len(self._queue)
+        return metrics.render_metrics(
+            queue_depth=queue_depth,
+            running_jobs=len(running),
+            max_concurrent_jobs=self._max_concurrent,
+            concurrency_limit=sum(job.runtime.concurrency for job in running),
+            job_counters={job.id: job.counters for job in running},
+        )
+
+    def _running_job_stats(self) -> Dict[str, Tuple[Optional[int], metrics.JobCounters]]:
+        """Поток и счётчики выполняемых задач (для сбора загрузки)."""
+        with self._lock:
+            return {
+                job.id: (job.thread_id, job.counters)
+                for job in self._jobs.values()
+                if job.status == "running"
+            }
+
     def get_stats(self) -> Dict:
         """Возвращает статистику: количество активных пользователей и очередь."""
         with self._lock:
@@ -249,8 +928,9 @@ class JobManager:
             )
             queued_jobs = len(self._queue)
 
-            # Количество активных пользователей = количество активных сессий
-            active_users = len(self._sessions)
+            # Количество активных пользователей = сессии с heartbeat
+            # плюс вкладки, держащие открытый поток событий
+            active_users = len(self._sessions.keys() | self._stream_sessions.keys())
 
             return {
                 "active_users": active_users,
@@ -264,6 +944,32 @@ class JobManager:
         with self._lock:
             self._sessions[session_id] = time.time()
 
+    def try_open_stream(self, session_id: Optional[str], limit: int) -> bool:
+        """Занимает слот потока событий (заменяет heartbeat вкладки).
+
+        Проверка лимита и занятие слота — под одним lock: одновременные
+        подключения не превысят limit. False — слотов нет.
+        """
+        with self._lock:
+            if self._stream_count >= limit:
+                return False
+            self._stream_count += 1
+            if session_id:
+                self._stream_sessions[session_id] = (
+                    self._stream_sessions.get(session_id, 0) + 1
+                )
+        self._notify_change()
+        return True
+
+    def close_stream(self, session_id: Optional[str]):
+        with self._lock:
+            self._stream_count = max(0, self._stream_count - 1)
+            if session_id and session_id in self._stream_sessions:
+                self._stream_sessions[session_id] -= 1
+                if self._stream_sessions[session_id] <= 0:
+                    del self._stream_sessions[session_id]
+        self._notify_change()
+
     def _cleanup_sessions(self):
         """Удаляет устаревшие сессии."""
         current_time = time.time()
@@ -279,4 +985,4 @@ class JobManager:
         job = self.get(job_id)
         if not job:
             return None
-        return [row for _, row in sorted(job.results, key=lambda item: item[0])]
+        return job.results.ordered()
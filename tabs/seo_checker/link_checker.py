@@ -0,0 +1,110 @@
+"""
+Проверка битых ссылок на страницах задачи.
+
+Хук страницы только собирает ссылки <a href>: ссылки интернируются в id
+на всю задачу, и в очередь проверки попадает каждая уникальная ссылка
+один раз (меню и футер не проверяются заново на каждой странице). Страница
+не ждёт проверок и сразу отдаёт слот параллельности задачи следующей.
+
+Очередь (ProbeQueue) разбирают LINK_CHECK_CONCURRENCY воркеров в отдельном
+клиенте, чтобы не занимать пул соединений основных проверок. Проверка —
+HEAD-запрос (GET без чтения тела, если сервер не поддерживает HEAD). После
+прохода по страницам задача ждёт опустошения очереди (drain), а число
+битых ссылок в строках и отчёт заполняются в finish.
+"""
+
+import asyncio
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .checks import CheckHook
+from .config import RuntimeOptions
+from .context import CheckContext
+from .network.probe import ProbeQueue
+from .parsers.links import extract_links, site_key
+from .reports import JobAnalysis, Report
+from .results import ResultStore
+
+# Одновременных проверок ссылок на задачу
+LINK_CHECK_CONCURRENCY = 8
+# Ответы HEAD, после которых ссылка перепроверяется через GET
+HEAD_FALLBACK_STATUSES = (403, 405, 501)
+
+
+def is_broken(status: str) -> bool:
+    """Битая ссылка: код 4xx/5xx или нет ответа."""
+    return not status.isdigit() or int(status) >= 400
+
+
+async def probe_link(
+    client: httpx.AsyncClient, url: str, runtime: RuntimeOptions
+) -> str:
+    """Код ответа ссылки (после редиректов) или текст ошибки."""
+    for attempt in range(runtime.retries + 1):
+        try:
+            resp = await client.head(url, follow_redirects=True)
+            status = resp.status_code
+            if status in HEAD_FALLBACK_STATUSES:
+                async with client.stream("GET", url, follow_redirects=True) as resp:
+                    status = resp.status_code  # тело не читаем
+            return str(status)
+        except httpx.InvalidURL:
+            return "ошибка: некорректный адрес"
+        except httpx.HTTPError as exc:
+            if attempt == runtime.retries:
+                return f"ошибка: {type(exc).__name__}"
+            await asyncio.sleep(0.25)
+    return "нет ответа"
+
+
+class LinkAnalysis(JobAnalysis):
+    """Битые ссылки: счётчики в строке страницы и отчёт по всем находкам."""
+
+    name = "links"
+
+    def __init__(self, runtime: RuntimeOptions, concurrency: int = LINK_CHECK_CONCURRENCY):
+        self._probes: ProbeQueue[str] = ProbeQueue(
+            probe_link,
+            runtime,
+            concurrency,
+            on_error=lambda exc: f"ошибка: {type(exc).__name__}",
+        )
+        self._pages: List[Tuple[int, array]] = []  # (idx страницы, id её ссылок)
+
+    def page_hook(self, idx: int) -> CheckHook:
+        async def hook(ctx: CheckContext) -> Optional[Dict[str, str]]:
+            if ctx.soup is None:
+                return None
+            links = extract_links(ctx.soup, ctx.final_url or ctx.normalized_url)
+            self._pages.append((idx, array("I", (self._probes.add(link) for link in links))))
+            return {"Ссылок": str(len(links))}
+
+        return hook
+
+    async def drain(self, is_cancelled: Callable[[], bool]):
+        await self._probes.drain(is_cancelled)
+
+    async def aclose(self):
+        await self._probes.aclose()
+
+    def finish(self, results: ResultStore) -> Report:
+        results.add_columns(["Ссылок", "Битых ссылок"])
+        report = Report(["Страница", "Ссылка", "Код ответа", "Тип"])
+        statuses = self._probes.results
+        for idx, link_ids in sorted(self._pages):
+            row = results.get(idx)
+            page_url = row.get("URL", "") if row else ""
+            # Непроверенные ссылки (задачу остановили) битыми не считаются
+            broken = [
+                link_id
+                for link_id in link_ids
+                if statuses[link_id] is not None and is_broken(statuses[link_id])
+            ]
+            results.update(idx, {"Битых ссылок": str(len(broken))})
+            for link_id in broken:
+                link = self._probes.urls[link_id]
+                kind = "внутренняя" if site_key(link) == site_key(page_url) else "внешняя"
+                report.rows.append((page_url, link, statuses[link_id], kind))
+        return report
@@ -0,0 +1,210 @@
+"""
+Граф внутренних ссылок задачи: PageRank, входящие/исходящие, страницы-сироты.
+
+URL интернируются в целочисленные id, рёбра копятся в компактных массивах
+array('I') (источник, цель). После обхода строится CSR-представление
+(indptr + indices), и PageRank считается векторно на NumPy; без NumPy —
+тем же алгоритмом на чистом Python (медленнее, но без зависимостей).
+"""
+
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from .checks import CheckHook
+from .context import CheckContext
+from .parsers.links import extract_links, is_page_link, normalize_link, site_key
+from .reports import JobAnalysis, Report
+from .results import ResultStore
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_MAX_ITERATIONS = 100
+PAGERANK_TOLERANCE = 1e-6
+
+GRAPH_COLUMNS = ["PageRank", "Входящих ссылок", "Исходящих ссылок", "Сирота"]
+
+
+class LinkGraph:
+    """Ориентированный граф: интернированные URL и рёбра в массивах."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.urls: List[str] = []
+        self.sources = array("I")
+        self.targets = array("I")
+
+    def node(self, url: str) -> int:
+        node_id = self._ids.get(url)
+        if node_id is None:
+            node_id = len(self.urls)
+            self._ids[url] = node_id
+            self.urls.append(url)
+        return node_id
+
+    def add_edges(self, source: int, targets: List[int]):
+        for target in targets:
+            self.sources.append(source)
+            self.targets.append(target)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.sources)
+
+    def to_csr(self) -> Tuple[array, array]:
+        """CSR по источникам: рёбра узла i — indices[indptr[i]:indptr[i + 1]]."""
+        n = len(self.urls)
+        if HAS_NUMPY:
+            sources = np.frombuffer(self.sources, dtype=np.uint32)
+            targets = np.frombuffer(self.targets, dtype=np.uint32)
+            order = np.argsort(sources, kind="stable")
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+            return indptr, targets[order]
+        # Сортировка подсчётом без NumPy
+        counts = [0] * (n + 1)
+        for source in self.sources:
+            counts[source + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        indptr = array("q", counts)
+        position = list(counts[:n])
+        indices = array("I", bytes(4 * len(self.targets)))
+        for source, target in zip(self.sources, self.targets):
+            indices[position[source]] = target
+            position[source] += 1
+        return indptr, indices
+
+
+def pagerank(indptr, indices, n: int) -> Tuple[list, list, list]:
+    """PageRank по CSR. Возвращает (ранги, входящие, исходящие) для всех узлов.
+
+    Висячие узлы (без исходящих) раздают ранг равномерно всем узлам.
+    """
+    if n == 0:
+        return [], [], []
+    if HAS_NUMPY:
+        indptr = np.asarray(indptr)
+        indices = np.asarray(indices, dtype=np.int64)
+        out_degree = np.diff(indptr)
+        in_degree = np.bincount(indices, minlength=n)
+        sources = np.repeat(np.arange(n), out_degree)
+        dangling = out_degree == 0
+        inv_out = np.zeros(n)
+        inv_out[~dangling] = 1.0 / out_degree[~dangling]
+        rank = np.full(n, 1.0 / n)
+        for _ in range(PAGERANK_MAX_ITERATIONS):
+            share = rank * inv_out
+            new_rank = np.bincount(indices, weights=share[sources], minlength=n)
+            new_rank = PAGERANK_DAMPING * (new_rank + rank[dangling].sum() / n)
+            new_rank += (1.0 - PAGERANK_DAMPING) / n
+            delta = np.abs(new_rank - rank).sum()
+            rank = new_rank
+            if delta < PAGERANK_TOLERANCE:
+                break
+        return rank.tolist(), in_degree.tolist(), out_degree.tolist()
+
+    out_degree = [indptr[i + 1] - indptr[i] for i in range(n)]
+    in_degree = [0] * n
+    for target in indices:
+        in_degree[target] += 1
+    rank = [1.0 / n] * n
+    for _ in range(PAGERANK_MAX_ITERATIONS):
+        new_rank = [0.0] * n
+        dangling_sum = 0.0
+        for node in range(n):
+            degree = out_degree[node]
+            if not degree:
+                dangling_sum += rank[node]
+                continue
+            share = rank[node] / degree
+            for pos in range(indptr[node], indptr[node + 1]):
+                new_rank[indices[pos]] += share
+        base = (1.0 - PAGERANK_DAMPING) / n + PAGERANK_DAMPING * dangling_sum / n
+        new_rank = [PAGERANK_DAMPING * value + base for value in new_rank]
+        delta = sum(abs(a - b) for a, b in zip(new_rank, rank))
+        rank = new_rank
+        if delta < PAGERANK_TOLERANCE:
+            break
+    return rank, in_degree, out_degree
+
+
+class LinkGraphAnalysis(JobAnalysis):
+    """Граф внутренних ссылок по страницам задачи."""
+
+    name = "graph"
+
+    def __init__(self):
+        self._graph = LinkGraph()
+        self._pages: Dict[int, int] = {}  # idx строки -> id узла
+
+    def page_hook(self, idx: int) -> CheckHook:
+        def hook(ctx: CheckContext) -> None:
+            page_url = normalize_link(ctx.normalized_url)
+            if not page_url:
+                return None
+            graph = self._graph
+            source = graph.node(page_url)
+            self._pages[idx] = source
+            if ctx.soup is None:
+                return None
+            site = site_key(page_url)
+            targets: Dict[int, None] = {}
+            for link in extract_links(ctx.soup, ctx.final_url or ctx.normalized_url):
+                if site_key(link) != site or not is_page_link(link):
+                    continue
+                target = graph.node(link)
+                if target != source:
+                    targets.setdefault(target)
+            graph.add_edges(source, list(targets))
+            return None
+
+        return hook
+
+    def finish(self, results: ResultStore) -> Optional[Report]:
+        graph = self._graph
+        n = len(graph)
+        results.add_columns(GRAPH_COLUMNS)
+        if not n:
+            return None
+        indptr, indices = graph.to_csr()
+        rank, in_degree, out_degree = pagerank(indptr, indices, n)
+
+        # Нормировка: средний PageRank узла = 1
+        scale = float(n)
+        audited = set(self._pages.values())
+        for idx, node in self._pages.items():
+            results.update(
+                idx,
+                {
+                    "PageRank": f"{rank[node] * scale:.4f}",
+                    "Входящих ссылок": str(in_degree[node]),
+                    "Исходящих ссылок": str(out_degree[node]),
+                    "Сирота": "да" if not in_degree[node] else "нет",
+                },
+            )
+
+        report = Report(
+            ["URL", "Проверен", "PageRank", "Входящих ссылок", "Исходящих ссылок", "Сирота"]
+        )
+        for node in sorted(range(n), key=lambda i: -rank[i]):
+            checked = node in audited
+            report.rows.append(
+                (
+                    graph.urls[node],
+                    "да" if checked else "нет",
+                    f"{rank[node] * scale:.4f}",
+                    in_degree[node],
+                    out_degree[node] if checked else "",
+                    ("да" if not in_degree[node] else "нет") if checked else "",
+                )
+            )
+        return report
@@ -0,0 +1,167 @@
+"""
+Учёт памяти задачи.
+
+Все задачи живут в одном процессе, поэтому RSS не говорит, какая из них
+занимает память. Задача считает сама (приблизительно):
+
+- результаты — размер строк в ResultStore (sys.getsizeof словаря и значений)
+- тела ответов в работе — тела, полученные при проверке страниц, которые
+  ещё не завершены: fetch_with_retries добавляет размер тела в счётчик
+  текущей страницы (contextvar, как счётчики запросов), по завершении
+  страницы её тела вычитаются
+- tracemalloc (runtime-опция trace_memory): раз в секунду снимается объём
+  отслеживаемых аллокаций и копится пик; tracemalloc общий на процесс,
+  поэтому при параллельных задачах в пик попадают и чужие аллокации
+
+Бюджет памяти (runtime-опция memory_budget_mb): пока результаты плюс тела
+в работе больше бюджета, новые страницы ждут завершения начатых. Если в
+работе ничего нет, а бюджет превышен результатами, задача продолжает по
+одной странице: пауза память уже не освободит.
+"""
+
+import asyncio
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+TRACE_SAMPLE_INTERVAL_SECONDS = 1.0
+TRACE_TOP_FILES = 5
+
+
+class PageMemory:
+    """Тела ответов, полученные при проверке одной страницы."""
+
+    __slots__ = ("bytes", "job")
+
+    def __init__(self, job: "JobMemory"):
+        self.bytes = 0
+        self.job = job
+
+
+# Страница, которую проверяет текущая задача asyncio
+PAGE_MEMORY: ContextVar[Optional[PageMemory]] = ContextVar("page_memory", default=None)
+
+
+def response_received(num_bytes: int):
+    """Тело ответа прочитано (вызывает fetch_with_retries)."""
+    page = PAGE_MEMORY.get()
+    if page is None:
+        return
+    page.bytes += num_bytes
+    job = page.job
+    job.inflight_bytes += num_bytes
+    if job.inflight_bytes > job.peak_inflight_bytes:
+        job.peak_inflight_bytes = job.inflight_bytes
+
+
+class JobMemory:
+    """Счётчики памяти задачи и ожидание бюджета."""
+
+    def __init__(self, budget_bytes: int = 0):
+        self.budget_bytes = budget_bytes
+        self.inflight_bytes = 0
+        self.inflight_pages = 0
+        self.peak_inflight_bytes = 0
+        self.paused_seconds = 0.0
+        self.traced_bytes: Optional[int] = None
+        self.traced_peak_bytes: Optional[int] = None
+        self._released: Optional[asyncio.Event] = None
+
+    def page_started(self) -> PageMemory:
+        page = PageMemory(self)
+        PAGE_MEMORY.set(page)
+        self.inflight_pages += 1
+        return page
+
+    def page_finished(self, page: PageMemory):
+        self.inflight_pages -= 1
+        self.inflight_bytes -= page.bytes
+        PAGE_MEMORY.set(None)
+        if self._released is not None:
+            self._released.set()
+
+    async def wait_for_budget(self, results_bytes) -> bool:
+        """Ждёт, пока память задачи не уложится в бюджет.
+
+        results_bytes — функция, возвращающая текущий размер результатов.
+        True — пришлось ждать.
+        """
+        if not self.budget_bytes:
+            return False
+        waited = False
+        started = time.monotonic()
+        while (
+            self.inflight_pages
+            and results_bytes() + self.inflight_bytes > self.budget_bytes
+        ):
+            if self._released is None:
+                self._released = asyncio.Event()
+            self._released.clear()
+            waited = True
+            await self._released.wait()
+        if waited:
+            self.paused_seconds += time.monotonic() - started
+        return waited
+
+    def to_dict(self, results_bytes: int) -> Dict:
+        return {
+            "results_bytes": results_bytes,
+            "inflight_bytes": self.inflight_bytes,
+            "peak_inflight_bytes": self.peak_inflight_bytes,
+            "budget_bytes": self.budget_bytes,
+            "paused_seconds": round(self.paused_seconds, 1),
+            "traced_bytes": self.traced_bytes,
+            "traced_peak_bytes": self.traced_peak_bytes,
+        }
+
+
+# tracemalloc включён, пока идёт хотя бы одна задача с trace_memory
+_trace_users = 0
+_trace_lock = threading.Lock()
+
+
+def trace_start():
+    global _trace_users
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _trace_users += 1
+
+
+def trace_stop() -> List[str]:
+    """Отпускает tracemalloc; возвращает строки топа аллокаций по файлам."""
+    global _trace_users
+    with _trace_lock:
+        top: List[str] = []
+        if tracemalloc.is_tracing():
+            stats = tracemalloc.take_snapshot().statistics("filename")
+            top = [
+                f"{stat.traceback[0].filename}: {format_bytes(stat.size)} in {stat.count} blocks"
+                for stat in stats[:TRACE_TOP_FILES]
+            ]
+        _trace_users -= 1
+        if _trace_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return top
+
+
+async def sample_traced(memory: JobMemory):
+    """Копит текущий объём и пик отслеживаемых аллокаций, пока задача идёт."""
+    while True:
+        if tracemalloc.is_tracing():
+            current = tracemalloc.get_traced_memory()[0]
+            memory.traced_bytes = current
+            memory.traced_peak_bytes = max(memory.traced_peak_bytes or 0, current)
+        await asyncio.sleep(TRACE_SAMPLE_INTERVAL_SECONDS)
+
+
+def format_bytes(num_bytes: Optional[int]) -> str:
+    if num_bytes is None:
+        return "-"
+    for unit in ("B", "KB", "MB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.0f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}GB"
@@ -0,0 +1,227 @@
+"""
+Метрики процесса в текстовом формате Prometheus (/metrics).
+
+Счётчики и гистограммы заведены заранее с фиксированными корзинами:
+запись в горячем пути — bisect по кортежу границ и инкремент элемента
+списка под lock, без создания объектов на запрос. Счётчики задачи
+(запросы, повторы, таймауты, байты) передаются в fetch_with_retries через
+contextvar: задачи asyncio наследуют его от _run_async своей задачи.
+
+Итоги по процессу — счётчики *_total без меток. С меткой job выводятся
+только повторы и таймауты выполняемых задач (JOB_SERIES): число серий
+ограничено лимитом одновременных задач, серия пропадает с концом задачи.
+"""
+
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Границы корзин, секунды
+FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PARSE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Классы ответов: индекс = код // 100; 0 — нет ответа (ошибка сети)
+STATUS_CLASSES = ("error", "1xx", "2xx", "3xx", "4xx", "5xx")
+
+# Счётчики выполняемых задач с меткой job: поле JobCounters -> описание
+JOB_SERIES = {
+    "retries": "Повторные попытки запросов выполняемой задачи",
+    "timeouts": "Таймауты запросов выполняемой задачи",
+}
+
+
+class Counter:
+    """Счётчик; labels — фиксированные значения метки class (по индексу)."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self._labels = labels
+        self._values: List[float] = [0] * max(1, len(labels))
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, index: int = 0):
+        with self._lock:
+            self._values[index] += amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        if not self._labels:
+            yield f"{self.name} {self._values[0]}"
+            return
+        for label, value in zip(self._labels, self._values):
+            yield f'{self.name}{{class="{label}"}} {value}'
+
+
+class Histogram:
+    """Гистограмма с заранее заданными границами корзин (секунды)."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self._bounds = buckets
+        self._counts: List[int] = [0] * (len(buckets) + 1)  # последняя — +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect_left(self._bounds, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+
+    def render(self) -> Iterable[str]:
+        with self._lock:
+            counts = self._counts[:]
+            total = self._sum
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        cumulative = 0
+        for bound, count in zip(self._bounds, counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{le="{bound}"}} {cumulative}'
+        cumulative += counts[-1]
+        yield f'{self.name}_bucket{{le="+Inf"}} {cumulative}'
+        yield f"{self.name}_sum {total}"
+        yield f"{self.name}_count {cumulative}"
+
+
+class JobCounters:
+    """Счётчики запросов одной задачи."""
+
+    __slots__ = ("requests", "retries", "timeouts", "bytes")
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.bytes = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# Счётчики задачи, в event loop которой выполняется запрос
+JOB_COUNTERS: ContextVar[Optional[JobCounters]] = ContextVar("job_counters", default=None)
+
+HTTP_REQUESTS = Counter(
+    "limefrog_http_requests_total",
+    "HTTP-запросы проверок по классу ответа",
+    STATUS_CLASSES,
+)
+FETCH_RETRIES = Counter("limefrog_fetch_retries_total", "Повторные попытки запросов")
+FETCH_TIMEOUTS = Counter("limefrog_fetch_timeouts_total", "Таймауты запросов")
+BYTES_DOWNLOADED = Counter(
+    "limefrog_downloaded_bytes_total", "Скачано байт (как передано по сети)"
+)
+FETCH_SECONDS = Histogram(
+    "limefrog_fetch_duration_seconds", "Время одного HTTP-запроса", FETCH_BUCKETS
+)
+PARSE_SECONDS = Histogram(
+    "limefrog_parse_duration_seconds", "Время разбора HTML страницы", PARSE_BUCKETS
+)
+
+_in_flight = [0]
+_in_flight_lock = threading.Lock()
+
+
+def request_started():
+    with _in_flight_lock:
+        _in_flight[0] += 1
+
+
+def request_done():
+    with _in_flight_lock:
+        _in_flight[0] -= 1
+
+
+def request_finished(status_code: Optional[int], seconds: float, num_bytes: int):
+    """Итог одной попытки запроса; status_code=None — ошибка сети."""
+    index = status_code // 100 if status_code and 100 <= status_code < 600 else 0
+    HTTP_REQUESTS.inc(index=index)
+    FETCH_SECONDS.observe(seconds)
+    if num_bytes:
+        BYTES_DOWNLOADED.inc(num_bytes)
+    counters = JOB_COUNTERS.get()
+    if counters is not None:
+        counters.requests += 1
+        counters.bytes += num_bytes
+
+
+def request_retried(timeout: bool):
+    FETCH_RETRIES.inc()
+    counters = JOB_COUNTERS.get()
+    if counters is not None:
+        counters.retries += 1
+        if timeout:
+            counters.timeouts += 1
+    if timeout:
+        FETCH_TIMEOUTS.inc()
+
+
+def request_timed_out():
+    """Таймаут последней попытки (без повтора)."""
+    FETCH_TIMEOUTS.inc()
+    counters = JOB_COUNTERS.get()
+    if counters is not None:
+        counters.timeouts += 1
+
+
+def _family(
+    name: str, help_text: str, samples: Iterable[Tuple[str, float]], kind: str = "gauge"
+) -> Iterable[str]:
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} {kind}"
+    for labels, value in samples:
+        yield f"{name}{labels} {value}"
+
+
+def _gauge(name: str, help_text: str, samples: Iterable[Tuple[str, float]]) -> Iterable[str]:
+    return _family(name, help_text, samples)
+
+
+def render_metrics(
+    queue_depth: int,
+    running_jobs: int,
+    max_concurrent_jobs: int,
+    concurrency_limit: int,
+    job_counters: Dict[str, JobCounters],
+) -> str:
+    """Все метрики в текстовом формате Prometheus 0.0.4."""
+    lines: List[str] = []
+    for metric in (HTTP_REQUESTS, FETCH_RETRIES, FETCH_TIMEOUTS, BYTES_DOWNLOADED):
+        lines.extend(metric.render())
+    lines.extend(FETCH_SECONDS.render())
+    lines.extend(PARSE_SECONDS.render())
+    with _in_flight_lock:
+        in_flight = _in_flight[0]
+    lines.extend(_gauge("limefrog_http_in_flight", "Запросы в процессе", [("", in_flight)]))
+    lines.extend(_gauge("limefrog_queue_depth", "Задач в очереди", [("", queue_depth)]))
+    lines.extend(_gauge("limefrog_jobs_running", "Выполняемых задач", [("", running_jobs)]))
+    lines.extend(
+        _gauge(
+            "limefrog_jobs_max_concurrent",
+            "Лимит одновременно выполняемых задач",
+            [("", max_concurrent_jobs)],
+        )
+    )
+    lines.extend(
+        _gauge(
+            "limefrog_fetch_concurrency_limit",
+            "Сумма лимитов параллельных запросов выполняемых задач",
+            [("", concurrency_limit)],
+        )
+    )
+    # job_counters — только выполняемые задачи
+    for field, help_text in JOB_SERIES.items():
+        lines.extend(
+            _family(
+                f"limefrog_job_{field}_total",
+                help_text,
+                [(f'{{job="{job_id}"}}', getattr(c, field)) for job_id, c in job_counters.items()],
+                kind="counter",
+            )
+        )
+    return "\n".join(lines) + "\n"
@@ -1,17 +1,15 @@
 import asyncio
 import logging
-import sys
 import time
-from pathlib import Path
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 
 import httpx
 
+from .. import memory, metrics
 from ..config import RuntimeOptions
-
-# Импорт из корневого модуля (три уровня вверх)
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
-from logging_config import mask_sensitive_url
+from ..snapshots import REPLAY_EXTENSION, SnapshotMiss
+from ..timings import PageTimings
 
 logger = logging.getLogger("lime_frog")
 
@@ -29,21 +27,37 @@ async def fetch_with_retries(
     url: str,
     runtime: RuntimeOptions,
     follow_redirects: bool = True,
+    timings: Optional[PageTimings] = None,
 ) -> Optional[httpx.Response]:
     """
     Выполняет HTTP запрос с повторными попытками при ошибках.
 
     Логирует все попытки, таймауты, DNS/SSL ошибки и финальный статус.
+    timings — куда добавить фазы запроса (соединение, TLS, TTFB, загрузка).
+    Ответы из снимка задачи (повторный анализ) и промахи снимка не
+    считаются сетевыми запросами в метриках и счётчиках задачи.
     """
+    extensions = {"trace": timings.trace()} if timings else None
     for attempt in range(runtime.retries + 1):
         start_time = time.time()
         try:
-            response = await client.get(url, follow_redirects=follow_redirects)
+            metrics.request_started()
+            try:
+                response = await client.get(
+                    url, follow_redirects=follow_redirects, extensions=extensions
+                )
+            finally:
+                metrics.request_done()
             elapsed_ms = (time.time() - start_time) * 1000
+            if not response.extensions.get(REPLAY_EXTENSION):
+                metrics.request_finished(
+                    response.status_code, elapsed_ms / 1000, response.num_bytes_downloaded
+                )
+            memory.response_received(len(response.content))
 
             # Логируем успешный запрос
             logger.debug(
-                f"HTTP {response.status_code} {mask_sensitive_url(url)} | {elapsed_ms:.0f}ms | "
+                f"HTTP {response.status_code} {url} | {elapsed_ms:.0f}ms | "
                 f"attempt {attempt + 1}/{runtime.retries + 1}"
             )
 
@@ -51,38 +65,83 @@ async def fetch_with_retries(
 
         except httpx.TimeoutException as e:
             elapsed_ms = (time.time() - start_time) * 1000
+            metrics.request_finished(None, elapsed_ms / 1000, 0)
             logger.warning(
-                f"Timeout: {mask_sensitive_url(url)} | {elapsed_ms:.0f}ms | "
+                f"Timeout: {url} | {elapsed_ms:.0f}ms | "
                 f"attempt {attempt + 1}/{runtime.retries + 1}"
             )
             if attempt == runtime.retries:
-                logger.error(f"Max retries reached for {mask_sensitive_url(url)} (timeout)")
+                metrics.request_timed_out()
+                logger.error(f"Max retries reached for {url} (timeout)")
                 return None
+            metrics.request_retried(timeout=True)
             await asyncio.sleep(0.25)
 
         except httpx.ConnectError as e:
             elapsed_ms = (time.time() - start_time) * 1000
+            if not isinstance(e, SnapshotMiss):
+                metrics.request_finished(None, elapsed_ms / 1000, 0)
             error_detail = str(e)[:100]
             logger.warning(
-                f"Connection error: {mask_sensitive_url(url)} | {elapsed_ms:.0f}ms | {error_detail} | "
+                f"Connection error: {url} | {elapsed_ms:.0f}ms | {error_detail} | "
                 f"attempt {attempt + 1}/{runtime.retries + 1}"
             )
             if attempt == runtime.retries:
-                logger.error(f"Max retries reached for {mask_sensitive_url(url)} (connection)")
+                logger.error(f"Max retries reached for {url} (connection)")
                 return None
+            metrics.request_retried(timeout=False)
             await asyncio.sleep(0.25)
 
         except httpx.HTTPError as e:
             elapsed_ms = (time.time() - start_time) * 1000
+            metrics.request_finished(None, elapsed_ms / 1000, 0)
             error_type = type(e).__name__
             error_detail = str(e)[:100]
             logger.warning(
-                f"{error_type}: {mask_sensitive_url(url)} | {elapsed_ms:.0f}ms | {error_detail} | "
+                f"{error_type}: {url} | {elapsed_ms:.0f}ms | {error_detail} | "
                 f"attempt {attempt + 1}/{runtime.retries + 1}"
             )
             if attempt == runtime.retries:
-                logger.error(f"Max retries reached for {mask_sensitive_url(url)} ({error_type})")
+                logger.error(f"Max retries reached for {url} ({error_type})")
                 return None
+            metrics.request_retried(timeout=False)
             await asyncio.sleep(0.25)
 
     return None
+
+
+@asynccontextmanager
+async def stream_attempt(
+    client: httpx.AsyncClient, url: str, follow_redirects: bool = True
+) -> AsyncIterator[httpx.Response]:
+    """
+    Одна попытка потокового GET (тело читает вызывающий) с тем же учётом,
+    что у fetch_with_retries: метрики процесса и счётчики задачи.
+
+    Байты считаются по прочитанному к закрытию ответа; ошибка сети при
+    чтении тела учитывается как запрос без ответа. Повторы и их учёт
+    (metrics.request_retried / request_timed_out) — у вызывающего.
+    """
+    start_time = time.time()
+    status: Optional[int] = None
+    num_bytes = 0
+    counted = True
+    metrics.request_started()
+    try:
+        async with client.stream("GET", url, follow_redirects=follow_redirects) as response:
+            status = response.status_code
+            counted = not response.extensions.get(REPLAY_EXTENSION)
+            try:
+                yield response
+            except httpx.HTTPError:
+                status = None
+                raise
+            finally:
+                num_bytes = response.num_bytes_downloaded
+    except SnapshotMiss:
+        counted = False
+        raise
+    finally:
+        metrics.request_done()
+        if counted:
+            metrics.request_finished(status, time.time() - start_time, num_bytes)
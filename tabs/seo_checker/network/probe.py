@@ -0,0 +1,100 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, TypeVar
+
+import httpx
+
+from ..config import RuntimeOptions
+from .fetcher import BROWSER_HEADERS
+
+T = TypeVar("T")
+
+# Как часто drain проверяет остановку задачи
+DRAIN_POLL_SECONDS = 0.5
+
+
+class ProbeQueue(Generic[T]):
+    """
+    Фоновая очередь лёгких проверок URL (ссылки, изображения) на всю задачу.
+
+    - URL интернируются в id: каждый проверяется один раз, страница хранит
+      только массив id и не ждёт проверок (слот страницы сразу свободен)
+    - очередь разбирают concurrency воркеров со своим HTTP-клиентом, чтобы
+      не занимать пул соединений основных проверок
+    - после прохода по страницам задача ждёт опустошения очереди (drain),
+      итоги по страницам собираются в finish анализа
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[httpx.AsyncClient, str, RuntimeOptions], Awaitable[T]],
+        runtime: RuntimeOptions,
+        concurrency: int,
+        on_error: Callable[[Exception], T],
+    ):
+        self._probe = probe
+        self._runtime = runtime
+        self._concurrency = concurrency
+        self._on_error = on_error
+        self._ids: Dict[str, int] = {}  # url -> id
+        self.urls: List[str] = []
+        self.results: List[Optional[T]] = []  # по id; None — ещё не проверен
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _start(self):
+        """Клиент и воркеры создаются в event loop задачи при первом URL."""
+        self._client = httpx.AsyncClient(
+            headers=BROWSER_HEADERS,
+            timeout=httpx.Timeout(self._runtime.timeout_seconds),
+            limits=httpx.Limits(max_connections=self._concurrency),
+        )
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self._concurrency)
+        ]
+
+    async def _worker(self):
+        while True:
+            url_id = await self._queue.get()
+            try:
+                self.results[url_id] = await self._probe(
+                    self._client, self.urls[url_id], self._runtime
+                )
+            except Exception as exc:  # воркер не должен останавливаться
+                self.results[url_id] = self._on_error(exc)
+            finally:
+                self._queue.task_done()
+
+    def add(self, url: str) -> int:
+        """id URL; новый URL ставится в очередь проверки."""
+        url_id = self._ids.get(url)
+        if url_id is None:
+            if self._queue is None:
+                self._start()
+            url_id = len(self.urls)
+            self._ids[url] = url_id
+            self.urls.append(url)
+            self.results.append(None)
+            self._queue.put_nowait(url_id)
+        return url_id
+
+    async def drain(self, is_cancelled: Callable[[], bool]):
+        """Ждёт, пока очередь опустеет (или задачу остановят)."""
+        if self._queue is None:
+            return
+        joined = asyncio.ensure_future(self._queue.join())
+        while not joined.done():
+            if is_cancelled():
+                joined.cancel()
+                return
+            await asyncio.wait({joined}, timeout=DRAIN_POLL_SECONDS)
+
+    async def aclose(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
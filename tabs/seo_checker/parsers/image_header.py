@@ -0,0 +1,83 @@
+"""
+Формат и размеры изображения по первым байтам файла (без загрузки целиком).
+
+Поддерживаются JPEG, PNG, GIF, WebP, AVIF, BMP; SVG определяется без размеров.
+"""
+
+import struct
+from typing import Optional, Tuple
+
+# Форматы, для которых есть более лёгкая современная замена
+LEGACY_IMAGE_FORMATS = ("jpeg", "png", "gif", "bmp")
+
+ImageHeader = Tuple[str, Optional[int], Optional[int]]  # (формат, ширина, высота)
+
+
+def _jpeg_size(data: bytes) -> Tuple[Optional[int], Optional[int]]:
+    # Идём по сегментам до маркера SOFn (кадр), в нём высота и ширина
+    pos = 2
+    while pos + 9 < len(data):
+        if data[pos] != 0xFF:
+            pos += 1
+            continue
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        (length,) = struct.unpack(">H", data[pos + 2 : pos + 4])
+        if marker in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                      0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+            height, width = struct.unpack(">HH", data[pos + 5 : pos + 9])
+            return width, height
+        pos += 2 + length
+    return None, None
+
+
+def _webp_size(data: bytes) -> Tuple[Optional[int], Optional[int]]:
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30:
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    return None, None
+
+
+def _avif_size(data: bytes) -> Tuple[Optional[int], Optional[int]]:
+    # Свойство ispe: 4 байта version/flags, затем ширина и высота (uint32)
+    pos = data.find(b"ispe")
+    if pos < 0 or pos + 16 > len(data):
+        return None, None
+    width, height = struct.unpack(">II", data[pos + 8 : pos + 16])
+    return width, height
+
+
+def parse_image_header(data: bytes) -> Optional[ImageHeader]:
+    """Формат и размеры по началу файла; None, если формат не распознан."""
+    if data.startswith(b"\xff\xd8"):
+        return ("jpeg", *_jpeg_size(data))
+    if data.startswith(b"\x89PNG\r\n\x1a\n") and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return "png", width, height
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        width, height = struct.unpack("<HH", data[6:10])
+        return "gif", width, height
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return ("webp", *_webp_size(data))
+    if data[4:8] == b"ftyp" and data[8:12] in (b"avif", b"avis"):
+        return ("avif", *_avif_size(data))
+    if data.startswith(b"BM") and len(data) >= 26:
+        width, height = struct.unpack("<ii", data[18:26])
+        return "bmp", width, abs(height)
+    head = data[:512].lstrip().lower()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head):
+        return "svg", None, None
+    return None
@@ -0,0 +1,67 @@
+from typing import List, Optional
+from urllib.parse import urldefrag, urljoin, urlparse, urlunparse
+
+from bs4 import BeautifulSoup
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# Ссылки на файлы, которые не являются страницами
+NON_PAGE_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".bmp",
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+    ".zip", ".rar", ".7z", ".gz", ".tar",
+    ".mp3", ".mp4", ".avi", ".mov", ".webm",
+    ".css", ".js", ".xml", ".json", ".woff", ".woff2", ".ttf",
+)
+
+
+def normalize_link(url: str) -> Optional[str]:
+    """Канонизирует абсолютную ссылку: без фрагмента, хост в нижнем регистре,
+    без порта по умолчанию. Возвращает None для не-HTTP(S) ссылок."""
+    url = "".join(url.split())  # переводы строк/табы внутри href
+    url, _ = urldefrag(url)
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    if scheme not in ("http", "https") or not parsed.hostname:
+        return None
+    host = parsed.hostname.lower()
+    if ":" in host:  # IPv6
+        host = f"[{host}]"
+    try:
+        port = parsed.port
+    except ValueError:
+        return None
+    netloc = host if not port or str(port) == DEFAULT_PORTS[scheme] else f"{host}:{port}"
+    return urlunparse(parsed._replace(scheme=scheme, netloc=netloc, path=parsed.path or "/"))
+
+
+def site_key(url: str) -> str:
+    """Ключ сайта для определения внутренних ссылок: хост без www."""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def is_page_link(url: str) -> bool:
+    """Ссылка ведёт на страницу, а не на файл (изображение, PDF, архив...)."""
+    return not urlparse(url).path.lower().endswith(NON_PAGE_EXTENSIONS)
+
+
+def extract_links(soup: Optional[BeautifulSoup], base_url: str) -> List[str]:
+    """Возвращает абсолютные канонизированные ссылки из <a href> (без дублей)."""
+    if not soup:
+        return []
+
+    # Учитываем <base href>, если он задан
+    base_tag = soup.find("base", href=True)
+    if base_tag:
+        base_url = urljoin(base_url, base_tag["href"].strip())
+
+    links = {}
+    for tag in soup.find_all("a", href=True):
+        href = tag["href"].strip()
+        if not href or href.startswith(("#", "javascript:", "mailto:", "tel:")):
+            continue
+        link = normalize_link(urljoin(base_url, href))
+        if link:
+            links.setdefault(link)
+    return list(links)
@@ -0,0 +1,132 @@
+"""
+Разбор robots.txt (RFC 9309, семантика Google).
+
+- группы User-agent с правилами Allow / Disallow
+- подстановки "*" и якорь "$" в конце правила
+- выбор группы: User-agent, равный токену продукта краулера без учёта
+  регистра (не подстрока: "googlebot-news" не относится к "googlebot"),
+  иначе "*"
+- решение: правило с самым длинным шаблоном; при равной длине — Allow
+
+Правила компилируются один раз: шаблоны без "*"/"$" сравниваются через
+startswith, остальные — заранее скомпилированным регулярным выражением.
+"""
+
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+from urllib.parse import quote, unquote, urlparse
+
+# Токен нашего краулера в robots.txt (без группы — действуют правила "*")
+ROBOTS_USER_AGENT = "limefrog"
+GOOGLEBOT_USER_AGENT = "googlebot"
+
+
+def _product_token(value: str) -> str:
+    """Токен продукта в нижнем регистре: "Googlebot/2.1" -> "googlebot"."""
+    value = value.split("/", 1)[0].strip()
+    return value.split()[0].lower() if value else ""
+
+
+def _normalize_path(path: str) -> str:
+    # Единое процентное кодирование для пути и шаблона
+    return quote(unquote(path), safe="/?=&*$%:@!,;+~-._")
+
+
+class RobotsRule:
+    """Одно правило Allow/Disallow."""
+
+    __slots__ = ("allow", "pattern", "length", "_prefix", "_regex")
+
+    def __init__(self, allow: bool, pattern: str):
+        self.allow = allow
+        self.pattern = pattern
+        self.length = len(pattern)
+        self._prefix: Optional[str] = None
+        self._regex: Optional[Pattern] = None
+        if "*" in pattern or pattern.endswith("$"):
+            anchored = pattern.endswith("$")
+            body = pattern[:-1] if anchored else pattern
+            regex = ".*".join(re.escape(part) for part in body.split("*"))
+            self._regex = re.compile(regex + (r"\Z" if anchored else ""), re.S)
+        else:
+            self._prefix = pattern
+
+    def matches(self, path: str) -> bool:
+        if self._prefix is not None:
+            return path.startswith(self._prefix)
+        return self._regex.match(path) is not None
+
+    def __str__(self) -> str:
+        return f"{'Allow' if self.allow else 'Disallow'}: {self.pattern}"
+
+
+class RobotsTxt:
+    """Разобранный robots.txt одного origin."""
+
+    def __init__(self, text: str = ""):
+        self.sitemaps: List[str] = []
+        self.disallows: List[str] = []  # все Disallow в порядке появления
+        self._groups: Dict[str, List[RobotsRule]] = {}
+        self._parse(text)
+
+    def _parse(self, text: str):
+        agents: List[str] = []
+        in_rules = False
+        for raw_line in text.splitlines():
+            line = raw_line.split("#", 1)[0].strip()
+            if ":" not in line:
+                continue
+            field, value = line.split(":", 1)
+            field = field.strip().lower()
+            value = value.strip()
+
+            if field == "user-agent":
+                # Новая группа начинается после правил предыдущей
+                if in_rules:
+                    agents = []
+                    in_rules = False
+                agents.append(_product_token(value))
+                for agent in agents:
+                    self._groups.setdefault(agent, [])
+            elif field in ("allow", "disallow"):
+                in_rules = True
+                if field == "disallow" and value:
+                    self.disallows.append(value)
+                if not value or not agents:
+                    continue  # пустой Disallow ничего не запрещает
+                rule = RobotsRule(field == "allow", _normalize_path(value))
+                for agent in agents:
+                    self._groups[agent].append(rule)
+            elif field == "sitemap":
+                if value:
+                    self.sitemaps.append(value)
+            else:
+                # Прочие директивы (crawl-delay и т.п.) не разрывают группу
+                continue
+
+        # Длинные шаблоны первыми, при равной длине — Allow
+        for rules in self._groups.values():
+            rules.sort(key=lambda rule: (-rule.length, not rule.allow))
+
+    def _rules_for(self, user_agent: str) -> List[RobotsRule]:
+        rules = self._groups.get(_product_token(user_agent))
+        if rules is None:
+            rules = self._groups.get("*", [])
+        return rules
+
+    def verdict(self, url: str, user_agent: str) -> Tuple[bool, Optional[RobotsRule]]:
+        """(разрешено, сработавшее правило) для URL и user-agent."""
+        parsed = urlparse(url)
+        path = parsed.path or "/"
+        if path == "/robots.txt":
+            return True, None
+        if parsed.query:
+            path += "?" + parsed.query
+        path = _normalize_path(path)
+        for rule in self._rules_for(user_agent):
+            if rule.matches(path):
+                return rule.allow, rule
+        return True, None
+
+    def allowed(self, url: str, user_agent: str) -> bool:
+        return self.verdict(url, user_agent)[0]
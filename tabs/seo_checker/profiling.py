@@ -0,0 +1,103 @@
+"""
+Профилирование одной задачи (runtime-опция profile).
+
+Вся работа задачи — event loop с запросами, разбор HTML, проверки,
+анализы после обхода — идёт в одном потоке, поэтому профилируется только
+он; остальные задачи и потоки gunicorn не замедляются. Без опции
+профилировщик не создаётся вовсе.
+
+- cProfile (детерминированный) даёт файл pstats: число вызовов и время
+  каждой функции, смотреть в snakeviz / python -m pstats
+- сэмплер раз в SAMPLE_INTERVAL_SECONDS снимает стек потока задачи через
+  sys._current_frames() и копит счётчики одинаковых стеков; результат —
+  collapsed stacks ("f1;f2;f3 N"), вход flamegraph.pl / speedscope.
+  Стеки с ожиданием сети (select/epoll в event loop) тоже попадают в
+  выборку: на графике видно, сколько задача ждала ответов
+
+Профили сохраняются рядом с логом задачи: logs/seo_<id>.prof и
+logs/seo_<id>.collapsed.
+"""
+
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Dict, Optional
+
+SAMPLE_INTERVAL_SECONDS = 0.005
+# Стеки глубже лимита обрезаются со стороны корня
+MAX_STACK_DEPTH = 128
+
+PROFILE_FORMATS = {
+    # формат -> (суффикс файла, mimetype)
+    "pstats": (".prof", "application/octet-stream"),
+    "collapsed": (".collapsed", "text/plain; charset=utf-8"),
+}
+
+
+def _frame_label(code: CodeType) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class JobProfiler:
+    """cProfile и сэмплер стеков для потока, вызвавшего start()."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self._interval = interval
+        self._profile = cProfile.Profile()
+        self._stacks: Counter = Counter()  # кортеж code-объектов от корня -> выборок
+        self._thread_ident: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.samples = 0
+
+    def start(self):
+        self._thread_ident = threading.get_ident()
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name="job-profiler", daemon=True
+        )
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+
+    def _sample_loop(self):
+        ident = self._thread_ident
+        while not self._stop.wait(self._interval):
+            frame: Optional[FrameType] = sys._current_frames().get(ident)
+            if frame is None:
+                continue
+            codes = []
+            while frame is not None and len(codes) < MAX_STACK_DEPTH:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            self._stacks[tuple(codes)] += 1
+            self.samples += 1
+
+    def save(self, base_path: Path) -> Dict[str, Path]:
+        """Записывает профили: base_path + суффикс формата."""
+        paths = {
+            fmt: base_path.with_name(base_path.name + suffix)
+            for fmt, (suffix, _) in PROFILE_FORMATS.items()
+        }
+        self._profile.dump_stats(str(paths["pstats"]))
+
+        labels: Dict[CodeType, str] = {}
+        collapsed: Counter = Counter()
+        for codes, count in self._stacks.items():
+            for code in codes:
+                if code not in labels:
+                    labels[code] = _frame_label(code)
+            collapsed[";".join(labels[code] for code in codes)] += count
+        with open(paths["collapsed"], "w", encoding="utf-8") as fh:
+            for stack, count in collapsed.most_common():
+                fh.write(f"{stack} {count}\n")
+        return paths
@@ -0,0 +1,54 @@
+"""
+Отчёты по задаче целиком (дубли, ссылки, изображения, граф ссылок).
+
+Анализ задачи (JobAnalysis) работает в два этапа:
+- page_hook(idx) — хук run_all_checks: во время разбора страницы
+  сохраняет компактные данные (отпечатки, id ссылок и т.п.)
+- finish(results) — после обхода: дописывает колонки в строки
+  результатов и возвращает табличный отчёт для скачивания в CSV
+
+drain(is_cancelled) вызывается в event loop задачи после прохода по
+страницам — дождаться фоновой работы анализа (например, очереди проверок
+ссылок); aclose() — после обхода, в том числе остановленного, для
+закрытия собственных HTTP-клиентов и воркеров анализа.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from .checks import CheckHook
+from .results import ResultStore
+
+
+@dataclass
+class Report:
+    """Табличный отчёт: колонки и строки (кортежи в порядке колонок)."""
+
+    columns: List[str]
+    rows: List[Sequence] = field(default_factory=list)
+
+    def iter_dicts(self) -> Iterator[Dict[str, object]]:
+        for row in self.rows:
+            yield dict(zip(self.columns, row))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class JobAnalysis:
+    """Базовый класс анализа по всем страницам задачи."""
+
+    # Имя отчёта: /api/job/<id>/report/<name>
+    name = ""
+
+    def page_hook(self, idx: int) -> Optional[CheckHook]:
+        return None
+
+    async def drain(self, is_cancelled: Callable[[], bool]):
+        pass
+
+    async def aclose(self):
+        pass
+
+    def finish(self, results: ResultStore) -> Optional[Report]:
+        return None
@@ -0,0 +1,158 @@
+"""
+Фоновый сбор загрузки системы для /api/resource.
+
+Раньше каждый запрос /api/resource вызывал psutil.cpu_percent(interval=0.2)
+и на 200 мс занимал поток gunicorn; при нескольких открытых вкладках
+(опрос раз в 5 секунд) заметная доля потоков просто спала. Теперь один
+фоновый поток раз в SAMPLE_INTERVAL_SECONDS снимает CPU, память, сетевой
+обмен и статистику выполняемых задач и кладёт снимок в кольцевой буфер;
+эндпоинт отдаёт последний снимок и короткую историю без ожидания.
+
+CPU задачи — процессорное время её потока (проверки идут в одном потоке
+с event loop), запросы и байты — приросты счётчиков задачи за интервал.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .metrics import JobCounters
+
+try:
+    import psutil
+
+    HAS_PSUTIL = True
+except ImportError:  # pragma: no cover - optional
+    psutil = None
+    HAS_PSUTIL = False
+
+SAMPLE_INTERVAL_SECONDS = 2.0
+# 5 минут истории при интервале 2 секунды
+HISTORY_SIZE = 150
+
+logger = logging.getLogger("lime_frog")
+
+# job_id -> (native id потока задачи, счётчики задачи)
+JobSource = Callable[[], Dict[str, Tuple[Optional[int], JobCounters]]]
+
+
+class ResourceSampler:
+    """Фоновый поток со снимками загрузки в кольцевом буфере."""
+
+    def __init__(
+        self,
+        job_source: JobSource,
+        interval: float = SAMPLE_INTERVAL_SECONDS,
+        history_size: int = HISTORY_SIZE,
+    ):
+        self._job_source = job_source
+        self._interval = interval
+        self._samples: Deque[Dict] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._process = psutil.Process() if HAS_PSUTIL else None
+        # Предыдущие значения для приростов за интервал
+        self._prev_time = 0.0
+        self._prev_net: Optional[Tuple[int, int]] = None
+        self._prev_threads: Dict[int, float] = {}
+        self._prev_jobs: Dict[str, Tuple[int, int]] = {}
+
+    @property
+    def available(self) -> bool:
+        return HAS_PSUTIL
+
+    def start(self):
+        """Запускает сбор (повторный вызов ничего не делает)."""
+        if not HAS_PSUTIL or self._thread is not None:
+            return
+        # Первый вызов cpu_percent(None) задаёт точку отсчёта и даёт 0
+        psutil.cpu_percent(interval=None)
+        self._prev_time = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._loop, name="resource-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self._interval):
+            try:
+                sample = self._sample()
+            except Exception as exc:  # сбор не должен останавливаться
+                logger.warning(f"Resource sampling failed: {exc}")
+                continue
+            with self._lock:
+                self._samples.append(sample)
+
+    def _sample(self) -> Dict:
+        now = time.monotonic()
+        elapsed = max(now - self._prev_time, 1e-6)
+        self._prev_time = now
+
+        memory = psutil.virtual_memory()
+        net = psutil.net_io_counters()
+        net_now = (net.bytes_recv, net.bytes_sent) if net else (0, 0)
+        prev_net = self._prev_net or net_now
+        self._prev_net = net_now
+
+        sample = {
+            "time": round(time.time(), 3),
+            "cpu": psutil.cpu_percent(interval=None),
+            "memory_percent": memory.percent,
+            "process_rss": self._process.memory_info().rss,
+            "net_recv_per_sec": round((net_now[0] - prev_net[0]) / elapsed),
+            "net_sent_per_sec": round((net_now[1] - prev_net[1]) / elapsed),
+            "jobs": self._sample_jobs(elapsed),
+        }
+        return sample
+
+    def _sample_jobs(self, elapsed: float) -> Dict[str, Dict]:
+        jobs = self._job_source()
+        thread_times: Dict[int, float] = {}
+        if jobs:
+            try:
+                thread_times = {
+                    thread.id: thread.user_time + thread.system_time
+                    for thread in self._process.threads()
+                }
+            except (psutil.Error, OSError):
+                thread_times = {}
+
+        result: Dict[str, Dict] = {}
+        prev_jobs: Dict[str, Tuple[int, int]] = {}
+        for job_id, (thread_id, counters) in jobs.items():
+            cpu = None
+            if thread_id in thread_times and thread_id in self._prev_threads:
+                cpu_seconds = thread_times[thread_id] - self._prev_threads[thread_id]
+                cpu = round(max(cpu_seconds, 0.0) / elapsed * 100, 1)
+            requests, num_bytes = counters.requests, counters.bytes
+            prev_requests, prev_bytes = self._prev_jobs.get(job_id, (requests, num_bytes))
+            prev_jobs[job_id] = (requests, num_bytes)
+            result[job_id] = {
+                "cpu": cpu,
+                "requests_per_sec": round((requests - prev_requests) / elapsed, 1),
+                "bytes_per_sec": round((num_bytes - prev_bytes) / elapsed),
+                "requests": requests,
+                "bytes": num_bytes,
+            }
+        self._prev_threads = thread_times
+        self._prev_jobs = prev_jobs
+        return result
+
+    def latest(self) -> Optional[Dict]:
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def history(self, limit: int) -> List[Dict]:
+        """Последние limit снимков, старые первыми (без статистики задач)."""
+        with self._lock:
+            samples = list(self._samples)[-limit:] if limit > 0 else []
+        return [
+            {key: value for key, value in sample.items() if key != "jobs"}
+            for sample in samples
+        ]
@@ -0,0 +1,114 @@
+import sys
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .exporters import order_columns
+
+# Размер страницы для /api/job/<id>/results
+RESULTS_PAGE_DEFAULT = 200
+RESULTS_PAGE_MAX = 1000
+
+
+def _row_bytes(row: Dict[str, str]) -> int:
+    """Приблизительный размер строки: словарь и значения (ключи общие)."""
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+
+
+class ResultStore:
+    """
+    Хранилище строк результатов одной задачи.
+
+    - слоты по индексу URL: порядок исходного списка без сортировки
+    - журнал завершения (append-only): курсор = позиция в журнале,
+      поэтому выборка "новых строк после курсора" стоит O(размер страницы)
+    - в режиме обхода сайта слоты растут по мере обнаружения страниц
+    """
+
+    def __init__(self, total: int):
+        self._slots: List[Optional[Dict[str, str]]] = [None] * total
+        self._order: List[int] = []  # индексы URL в порядке завершения
+        self._columns: Dict[str, None] = {}  # объединение ключей всех строк
+        self._lock = threading.Lock()
+        self.approx_bytes = 0  # учёт памяти задачи
+
+    def add(self, idx: int, row: Dict[str, str]) -> int:
+        """Добавляет строку и возвращает курсор после неё."""
+        with self._lock:
+            if idx >= len(self._slots):
+                self._slots.extend([None] * (idx + 1 - len(self._slots)))
+            self._slots[idx] = row
+            self.approx_bytes += _row_bytes(row)
+            self._order.append(idx)
+            for key in row:
+                self._columns.setdefault(key)
+            return len(self._order)
+
+    def get(self, idx: int) -> Optional[Dict[str, str]]:
+        with self._lock:
+            return self._slots[idx] if idx < len(self._slots) else None
+
+    def update(self, idx: int, values: Dict[str, str]):
+        """Дописывает значения в готовую строку (анализ после обхода)."""
+        with self._lock:
+            row = self._slots[idx] if idx < len(self._slots) else None
+            if row is None:
+                return
+            self.approx_bytes -= _row_bytes(row)
+            row.update(values)
+            self.approx_bytes += _row_bytes(row)
+            for key in values:
+                self._columns.setdefault(key)
+
+    def add_columns(self, keys: Iterable[str]):
+        """Регистрирует колонки, даже если ни в одной строке нет значения."""
+        with self._lock:
+            for key in keys:
+                self._columns.setdefault(key)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """Пары (индекс, строка) в порядке завершения."""
+        with self._lock:
+            order = self._order[:]
+        for idx in order:
+            yield idx, self._slots[idx]
+
+    def since(
+        self, cursor: int, limit: int
+    ) -> Tuple[List[Tuple[int, Dict[str, str]]], int]:
+        """Возвращает строки, завершённые после cursor, и новый курсор."""
+        with self._lock:
+            cursor = max(0, min(cursor, len(self._order)))
+            indexes = self._order[cursor : cursor + limit]
+            chunk = [(idx, self._slots[idx]) for idx in indexes]
+        return chunk, cursor + len(chunk)
+
+    def columns(self) -> List[str]:
+        """Схема колонок, накопленная по мере добавления строк."""
+        with self._lock:
+            keys = list(self._columns)
+        return order_columns(keys)
+
+    def iter_ordered(self) -> Iterator[Dict[str, str]]:
+        """Лениво перебирает завершённые строки в порядке исходного списка URL."""
+        for row in self._slots:
+            if row is not None:
+                yield row
+
+    def iter_first(self, count: int) -> Iterator[Dict[str, str]]:
+        """Первые count завершённых строк в порядке исходного списка URL.
+
+        Журнал завершения только растёт, поэтому срез работающей задачи по
+        числу строк не меняется от вызова к вызову.
+        """
+        with self._lock:
+            indexes = sorted(self._order[:count])
+        for idx in indexes:
+            yield self._slots[idx]
+
+    def ordered(self) -> List[Dict[str, str]]:
+        """Все завершённые строки в порядке исходного списка URL."""
+        with self._lock:
+            return [row for row in self._slots if row is not None]
@@ -0,0 +1,437 @@
+"""
+Снимки ответов задачи для повторного анализа без сети.
+
+Запись включается runtime-опцией snapshot. Тогда HTTP-транспорт задачи
+(RecordingTransport) сохраняет каждый полностью прочитанный GET-ответ:
+код, заголовки и тело. Хэширование, сжатие и запись на диск идут в
+фоновых потоках хранилища, а не в event loop задачи; снимок считается
+дописанным, когда finish() дождётся всех записей. Тела хранятся по SHA-256
+содержимого (сжатые zlib): одинаковые страницы и ресурсы (robots.txt, 404)
+лежат на диске один раз. Манифест задачи (URL -> код, заголовки, хэш тела)
+живёт в памяти, как и сами задачи.
+
+Каждый процесс пишет в свой подкаталог snapshots/<pid>/ (создаётся при
+первой записи); каталоги завершившихся процессов недостижимы без
+манифестов и удаляются тогда же.
+
+Повторный анализ подменяет транспорт на ReplayTransport: проверки
+выполняются теми же функциями, но ответы берутся из снимка (чтение и
+распаковка — в потоке), а URL без снимка сразу дают SnapshotMiss. Ответы
+из снимка помечены расширением REPLAY_EXTENSION, fetch_with_retries не
+считает их сетевыми запросами. При превышении лимита размера вытесняются
+снимки задач, к которым дольше всего не обращались.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import httpx
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SNAPSHOT_DIR = PROJECT_ROOT / "snapshots"
+
+# Лимит каталога снимков (сжатые тела)
+SNAPSHOT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+# Тела больше лимита не сохраняются (снимок URL помечается как неполный)
+SNAPSHOT_MAX_BODY_BYTES = 10 * 1024 * 1024
+# Снимки, к которым обращались недавно, не вытесняются
+SNAPSHOT_EVICT_GRACE_SECONDS = 120
+# Потоков записи снимков на процесс
+SNAPSHOT_WRITERS = 2
+
+# Расширение httpx-ответа, отданного из снимка (не из сети)
+REPLAY_EXTENSION = "lime_frog.replayed"
+
+logger = logging.getLogger("lime_frog")
+
+
+@dataclass
+class SnapshotEntry:
+    """Сохранённый ответ на GET одного URL."""
+
+    status_code: int
+    headers: List[Tuple[str, str]]
+    digest: str
+    fetched_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class JobSnapshot:
+    """Манифест снимка задачи."""
+
+    job_id: str
+    entries: Dict[str, SnapshotEntry] = field(default_factory=dict)
+    digests: Set[str] = field(default_factory=set)
+    last_access: float = field(default_factory=time.time)
+    recording: bool = True
+    truncated: bool = False  # часть ответов не сохранена (лимиты)
+
+    def to_dict(self) -> Dict:
+        return {
+            "urls": len(self.entries),
+            "bodies": len(self.digests),
+            "recording": self.recording,
+            "truncated": self.truncated,
+        }
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:  # процесс есть, но чужой
+        return True
+    return True
+
+
+class SnapshotStore:
+    """Тела ответов по хэшу содержимого + манифесты снимков задач."""
+
+    def __init__(
+        self,
+        snapshot_dir: Path = SNAPSHOT_DIR,
+        max_bytes: int = SNAPSHOT_MAX_BYTES,
+        max_body_bytes: int = SNAPSHOT_MAX_BODY_BYTES,
+    ):
+        self._root = snapshot_dir
+        self._dir = snapshot_dir / str(os.getpid())
+        self._dir_ready = False
+        self._max_bytes = max_bytes
+        self.max_body_bytes = max_body_bytes
+        self._snapshots: Dict[str, JobSnapshot] = {}
+        self._blob_sizes: Dict[str, int] = {}  # хэш -> размер сжатого файла
+        self._blob_refs: Counter = Counter()  # хэш -> снимков, ссылающихся на тело
+        self._pins: Counter = Counter()  # job_id -> идущих повторных анализов
+        self._pending: Dict[str, List[Future]] = {}  # job_id -> фоновые записи
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._dir / f"{digest}.z"
+
+    def _prepare_dir(self):
+        """Создаёт каталог процесса и удаляет каталоги завершившихся процессов
+        (под lock, один раз)."""
+        if self._dir_ready:
+            return
+        self._root.mkdir(exist_ok=True)
+        for leftover in self._root.iterdir():
+            if leftover == self._dir:
+                continue
+            if leftover.is_dir():
+                if leftover.name.isdigit() and _process_alive(int(leftover.name)):
+                    continue
+                shutil.rmtree(leftover, ignore_errors=True)
+            else:  # тела из общего каталога прежних версий
+                try:
+                    leftover.unlink()
+                except OSError:
+                    pass
+        self._dir.mkdir(exist_ok=True)
+        self._dir_ready = True
+
+    def begin(self, job_id: str):
+        """Начинает снимок задачи (ответы добавляют record / record_later)."""
+        with self._lock:
+            self._prepare_dir()
+            self._snapshots[job_id] = JobSnapshot(job_id)
+
+    def finish(self, job_id: str):
+        """Дожидается фоновых записей задачи; снимок дописан и его можно вытеснять."""
+        with self._lock:
+            pending = self._pending.pop(job_id, [])
+        wait(pending)
+        with self._lock:
+            snapshot = self._snapshots.get(job_id)
+            if snapshot:
+                snapshot.recording = False
+                snapshot.last_access = time.time()
+            evicted = self._evict()
+        _unlink_all(evicted)
+
+    def record_later(
+        self,
+        job_id: str,
+        url: str,
+        status_code: int,
+        headers: List[Tuple[str, str]],
+        chunks: List[bytes],
+    ):
+        """Ставит сохранение ответа в фоновый поток (вызывается из event loop)."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=SNAPSHOT_WRITERS, thread_name_prefix="snapshot-writer"
+                )
+            future = self._executor.submit(
+                self._record_chunks, job_id, url, status_code, headers, chunks, time.time()
+            )
+            self._pending.setdefault(job_id, []).append(future)
+
+    def _record_chunks(self, job_id, url, status_code, headers, chunks, fetched_at):
+        try:
+            self.record(job_id, url, status_code, headers, b"".join(chunks), fetched_at)
+        except Exception as exc:  # запись снимка не должна ронять задачу
+            logger.warning(f"Snapshot write failed: {url} | {exc}")
+
+    def record(
+        self,
+        job_id: str,
+        url: str,
+        status_code: int,
+        headers: List[Tuple[str, str]],
+        body: bytes,
+        fetched_at: Optional[float] = None,
+    ):
+        """Сохраняет ответ в снимок задачи (тело — один раз на содержимое).
+
+        Хэширование, сжатие и запись файла идут без lock; под lock только
+        учёт тел и манифест.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        entry = SnapshotEntry(status_code, headers, digest, fetched_at or time.time())
+        with self._lock:
+            snapshot = self._snapshots.get(job_id)
+            if snapshot is None or not snapshot.recording:
+                return
+            if digest in self._blob_sizes:
+                self._add_entry(snapshot, url, entry)
+                return
+
+        data = zlib.compress(body, 6)
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir, suffix=".part")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+
+        evicted: List[Path] = []
+        with self._lock:
+            # То же тело мог успеть записать другой поток
+            keep = digest not in self._blob_sizes
+            if keep:
+                if self._total_bytes + len(data) > self._max_bytes:
+                    evicted = self._evict(extra=len(data))
+                keep = self._total_bytes + len(data) <= self._max_bytes
+                if keep:
+                    # Файл переименуется после lock; вытеснить тело до этого
+                    # нельзя — на него ссылается записываемый снимок
+                    self._blob_sizes[digest] = len(data)
+                    self._total_bytes += len(data)
+                else:
+                    snapshot.truncated = True
+            if digest in self._blob_sizes:
+                self._add_entry(snapshot, url, entry)
+        _unlink_all(evicted)
+        if keep:
+            os.replace(tmp_path, self._blob_path(digest))
+        else:
+            _unlink_all([Path(tmp_path)])
+
+    def _add_entry(self, snapshot: JobSnapshot, url: str, entry: SnapshotEntry):
+        """Добавляет ответ в манифест (под lock)."""
+        if entry.digest not in snapshot.digests:
+            snapshot.digests.add(entry.digest)
+            self._blob_refs[entry.digest] += 1
+        snapshot.entries[url] = entry
+
+    def lookup(self, job_id: str, url: str) -> Optional[Tuple[SnapshotEntry, bytes]]:
+        """Сохранённый ответ и тело; None, если URL нет в снимке (читает диск —
+        из event loop вызывать через поток)."""
+        with self._lock:
+            snapshot = self._snapshots.get(job_id)
+            entry = snapshot.entries.get(url) if snapshot else None
+            if entry is None:
+                return None
+            snapshot.last_access = time.time()
+        try:
+            data = self._blob_path(entry.digest).read_bytes()
+        except OSError:
+            return None
+        return entry, zlib.decompress(data)
+
+    def iter_entries(self, job_id: str) -> Iterator[Tuple[str, SnapshotEntry, bytes]]:
+        """Все ответы снимка: (URL, ответ, тело); вытесненные тела пропускаются."""
+        with self._lock:
+            snapshot = self._snapshots.get(job_id)
+            entries = list(snapshot.entries.items()) if snapshot else []
+        for url, entry in entries:
+            try:
+                data = self._blob_path(entry.digest).read_bytes()
+            except OSError:
+                continue
+            yield url, entry, zlib.decompress(data)
+
+    def describe(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            snapshot = self._snapshots.get(job_id)
+            return snapshot.to_dict() if snapshot else None
+
+    def has(self, job_id: str) -> bool:
+        with self._lock:
+            snapshot = self._snapshots.get(job_id)
+            return bool(snapshot and snapshot.entries and not snapshot.recording)
+
+    def pin(self, job_id: str) -> bool:
+        """Защищает снимок от вытеснения на время повторного анализа."""
+        with self._lock:
+            if job_id not in self._snapshots:
+                return False
+            self._pins[job_id] += 1
+            return True
+
+    def unpin(self, job_id: str):
+        with self._lock:
+            self._pins[job_id] -= 1
+            if self._pins[job_id] <= 0:
+                del self._pins[job_id]
+            snapshot = self._snapshots.get(job_id)
+            if snapshot:
+                snapshot.last_access = time.time()
+            evicted = self._evict()
+        _unlink_all(evicted)
+
+    def _evict(self, extra: int = 0) -> List[Path]:
+        """Вытесняет давно не использованные снимки сверх лимита (под lock).
+
+        Возвращает файлы вытесненных тел: их удаляют после снятия lock.
+        """
+        evicted: List[Path] = []
+        grace_cutoff = time.time() - SNAPSHOT_EVICT_GRACE_SECONDS
+        candidates = sorted(
+            (
+                s
+                for s in self._snapshots.values()
+                if not s.recording and not self._pins[s.job_id]
+            ),
+            key=lambda s: s.last_access,
+        )
+        for snapshot in candidates:
+            if self._total_bytes + extra <= self._max_bytes:
+                break
+            if snapshot.last_access > grace_cutoff:
+                break
+            del self._snapshots[snapshot.job_id]
+            for digest in snapshot.digests:
+                self._blob_refs[digest] -= 1
+                if self._blob_refs[digest] > 0:
+                    continue
+                del self._blob_refs[digest]
+                self._total_bytes -= self._blob_sizes.pop(digest)
+                evicted.append(self._blob_path(digest))
+            logger.info(f"Snapshot evicted: job={snapshot.job_id}")
+        return evicted
+
+
+def _unlink_all(paths: List[Path]):
+    for path in paths:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+class SnapshotMiss(httpx.ConnectError):
+    """URL нет в снимке задачи (повторный анализ не ходит в сеть)."""
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Отдаёт тело как есть и сохраняет его, если оно прочитано до конца."""
+
+    def __init__(
+        self,
+        stream: httpx.AsyncByteStream,
+        on_complete: Callable[[List[bytes]], None],
+        max_bytes: int,
+    ):
+        self._stream = stream
+        self._on_complete = on_complete
+        self._max_bytes = max_bytes
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks: Optional[List[bytes]] = []
+        size = 0
+        async for chunk in self._stream:
+            if chunks is not None:
+                size += len(chunk)
+                if size > self._max_bytes:
+                    chunks = None
+                else:
+                    chunks.append(chunk)
+            yield chunk
+        # Досюда доходим, только если тело прочитано полностью;
+        # склейка и запись — в потоке хранилища
+        if chunks is not None:
+            self._on_complete(chunks)
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Транспорт задачи: запросы в сеть, GET-ответы — в снимок."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, store: SnapshotStore, job_id: str):
+        self._inner = inner
+        self._store = store
+        self._job_id = job_id
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._inner.handle_async_request(request)
+        if request.method != "GET":
+            return response
+        url = str(request.url)
+        status_code = response.status_code
+        # Тело сохраняется как пришло по сети (с Content-Encoding)
+        headers = list(response.headers.multi_items())
+
+        def on_complete(chunks: List[bytes]):
+            self._store.record_later(self._job_id, url, status_code, headers, chunks)
+
+        return httpx.Response(
+            status_code,
+            headers=response.headers,
+            stream=_RecordingStream(
+                response.stream, on_complete, self._store.max_body_bytes
+            ),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Транспорт повторного анализа: ответы только из снимка задачи."""
+
+    def __init__(self, store: SnapshotStore, job_id: str):
+        self._store = store
+        self._job_id = job_id
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        saved = None
+        if request.method == "GET":
+            saved = await asyncio.to_thread(
+                self._store.lookup, self._job_id, str(request.url)
+            )
+        if saved is None:
+            raise SnapshotMiss("нет в снимке задачи", request=request)
+        entry, body = saved
+        return httpx.Response(
+            entry.status_code,
+            headers=entry.headers,
+            stream=httpx.ByteStream(body),
+            extensions={REPLAY_EXTENSION: True},
+        )
@@ -0,0 +1,180 @@
+"""
+Замеры времени проверки страниц.
+
+- фазы HTTP основных запросов страницы берутся из trace-расширения httpx
+  (события httpcore): соединение (DNS + TCP — httpcore не разделяет их),
+  TLS, TTFB (от отправки запроса до заголовков ответа), загрузка тела;
+  при редиректах и повторах фазы суммируются
+- шаги run_all_checks (разбор HTML, каждая проверка) замеряются таймером
+- по задаче копятся гистограммы с логарифмическими корзинами (~5% ширины):
+  память постоянна при любом числе страниц, перцентили — с точностью корзины
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+TIMING_COLUMNS = [
+    "Соединение, мс",
+    "TLS, мс",
+    "TTFB, мс",
+    "Загрузка, мс",
+    "Разбор HTML, мс",
+    "Проверки, мс",
+    "Самая долгая проверка",
+]
+
+# Событие httpcore (без префикса соединения) -> фаза
+_TRACE_PHASES = {
+    "connect_tcp": "connect",
+    "start_tls": "tls",
+    "receive_response_body": "download",
+}
+
+# Ширина корзины гистограммы: соседние границы отличаются на 5%
+_BUCKET_STEP = math.log(1.05)
+PERCENTILES = (50, 90, 99)
+
+
+class PageTimings:
+    """Замеры одной страницы: фазы HTTP и шаги проверки, в миллисекундах."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.steps: Dict[str, float] = {}
+
+    def _add(self, target: Dict[str, float], name: str, ms: float):
+        target[name] = target.get(name, 0.0) + ms
+
+    def trace(self) -> Callable[[str, Dict[str, Any]], Awaitable[None]]:
+        """Колбэк для extensions={"trace": ...} одного запроса httpx."""
+        started: Dict[str, float] = {}
+
+        async def callback(event: str, info: Dict[str, Any]):
+            # event: "connection.connect_tcp.started", "http11.receive_response_headers.complete"...
+            name, _, state = event.partition(".")[2].rpartition(".")
+            now = time.perf_counter()
+            if state == "started":
+                started[name] = now
+                return
+            begin = started.pop(name, None)
+            if begin is None:
+                return
+            phase = _TRACE_PHASES.get(name)
+            if phase:
+                self._add(self.phases, phase, (now - begin) * 1000)
+            elif name == "receive_response_headers":
+                # TTFB: от начала отправки запроса до заголовков ответа
+                sent = started.pop("send_request_headers_at", begin)
+                self._add(self.phases, "ttfb", (now - sent) * 1000)
+            if name == "send_request_headers":
+                started["send_request_headers_at"] = begin
+
+        return callback
+
+    @contextmanager
+    def measure(self, step: str) -> Iterator[None]:
+        """Замеряет шаг проверки (включая ожидание сети внутри)."""
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(self.steps, step, (time.perf_counter() - begin) * 1000)
+
+    def brief(self) -> str:
+        """Краткая строка для лога: фаза=мс ..."""
+        items = list(self.phases.items()) + list(self.steps.items())
+        return " ".join(f"{name}={round(ms)}" for name, ms in items)
+
+    def columns(self) -> Dict[str, str]:
+        """Значения колонок TIMING_COLUMNS."""
+        checks = {k: v for k, v in self.steps.items() if k != "parse"}
+        slowest = max(checks.items(), key=lambda item: item[1]) if checks else None
+
+        def ms(value: Optional[float]) -> str:
+            return "" if value is None else str(round(value))
+
+        return {
+            "Соединение, мс": ms(self.phases.get("connect")),
+            "TLS, мс": ms(self.phases.get("tls")),
+            "TTFB, мс": ms(self.phases.get("ttfb")),
+            "Загрузка, мс": ms(self.phases.get("download")),
+            "Разбор HTML, мс": ms(self.steps.get("parse")),
+            "Проверки, мс": ms(sum(checks.values()) if checks else None),
+            "Самая долгая проверка": (
+                f"{slowest[0]} ({round(slowest[1])} мс)" if slowest else ""
+            ),
+        }
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с логарифмическими корзинами."""
+
+    def __init__(self):
+        self.buckets: List[int] = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        index = int(math.log1p(max(ms, 0.0)) / _BUCKET_STEP)
+        if index >= len(self.buckets):
+            self.buckets.extend([0] * (index + 1 - len(self.buckets)))
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, pct: float) -> float:
+        """Верхняя граница корзины, в которую попадает перцентиль."""
+        rank = math.ceil(self.count * pct / 100)
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(math.expm1((index + 1) * _BUCKET_STEP), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        result = {"count": self.count, "mean": round(self.total / self.count, 1)}
+        for pct in PERCENTILES:
+            result[f"p{pct}"] = round(self.percentile(pct), 1)
+        result["max"] = round(self.max, 1)
+        return result
+
+
+class TimingStats:
+    """Гистограммы замеров по всем страницам задачи."""
+
+    def __init__(self):
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, name: str, ms: float):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = LatencyHistogram()
+        histogram.add(ms)
+
+    def add(self, timings: PageTimings, total_ms: float):
+        with self._lock:
+            self._add("total", total_ms)
+            for phase, ms in timings.phases.items():
+                self._add(phase, ms)
+            for step, ms in timings.steps.items():
+                self._add(step if step == "parse" else f"check.{step}", ms)
+
+    def histogram(self, name: str) -> Optional[LatencyHistogram]:
+        """Гистограмма метрики ("total", "ttfb", "parse", "check.h1"...)."""
+        with self._lock:
+            return self._histograms.get(name)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Метрика -> count, mean, p50, p90, p99, max (мс)."""
+        with self._lock:
+            return {
+                name: histogram.summary()
+                for name, histogram in sorted(self._histograms.items())
+            }
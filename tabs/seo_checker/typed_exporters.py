@@ -0,0 +1,290 @@
+"""
+Типизированные форматы экспорта для аналитики: NDJSON, SQLite, Parquet.
+
+В отличие от CSV/XLSX:
+- поля имеют латинские имена и типы (коды и длины — числа, да/нет — bool)
+- Alt-N и заголовки H1-H6 хранятся списками, а не отдельными колонками
+- запись идёт потоково, без сборки всего файла в памяти
+"""
+
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+HEADING_SEPARATOR = " => "
+DISALLOW_SEPARATOR = " | "
+
+# Колонка результата -> (поле, тип). Типы: str, int, float, bool, list
+TYPED_FIELDS: Dict[str, Tuple[str, str]] = {
+    "URL": ("url", "str"),
+    "Код ответа": ("status_code", "int"),
+    "Редирект": ("redirect", "str"),
+    "Язык сайта": ("lang", "str"),
+    "Noindex": ("noindex", "bool"),
+    "Nofollow": ("nofollow", "bool"),
+    "Canonical": ("canonical", "str"),
+    "Title": ("title", "str"),
+    "Title Длина": ("title_length", "int"),
+    "Description": ("description", "str"),
+    "Description Длина": ("description_length", "int"),
+    "Sitemap 200": ("sitemap_status", "int"),
+    "Robots 200": ("robots_status", "int"),
+    "Robots Disallow": ("robots_disallow", "list"),
+    "Robots Sitemap": ("robots_has_sitemap", "bool"),
+    "Robots доступ": ("robots_allowed", "bool"),
+    "Robots Googlebot": ("robots_googlebot_allowed", "bool"),
+    "Ссылка на стр.404": ("page_404_url", "str"),
+    "Код стр.404": ("page_404_status", "int"),
+    "Корректность 404": ("page_404_correct", "bool"),
+    "Кол-во H1": ("h1_count", "int"),
+    "H1": ("h1", "list"),
+    "H2": ("h2", "list"),
+    "H3": ("h3", "list"),
+    "H4": ("h4", "list"),
+    "H5": ("h5", "list"),
+    "H6": ("h6", "list"),
+    "HTML структура": ("html_structure", "str"),
+    "Дубли H1/H2/H3": ("heading_duplicates", "str"),
+    "Кол-во img": ("img_count", "int"),
+    "Кол-во alt": ("alt_count", "int"),
+    "CMS": ("cms", "str"),
+    "Глубина": ("crawl_depth", "int"),
+    "Дубли Title": ("title_cluster", "str"),
+    "Дубли Description": ("description_cluster", "str"),
+    "Дубли контента": ("content_cluster", "str"),
+    "Ссылок": ("links_count", "int"),
+    "Битых ссылок": ("broken_links_count", "int"),
+    "Изображения, байт": ("images_bytes", "int"),
+    "Макс. изображение, байт": ("largest_image_bytes", "int"),
+    "Макс. изображение": ("largest_image_url", "str"),
+    "Изображений в старых форматах": ("legacy_images_count", "int"),
+    "PageRank": ("pagerank", "float"),
+    "Входящих ссылок": ("inlinks", "int"),
+    "Исходящих ссылок": ("outlinks", "int"),
+    "Сирота": ("orphan", "bool"),
+    "Соединение, мс": ("connect_ms", "int"),
+    "TLS, мс": ("tls_ms", "int"),
+    "TTFB, мс": ("ttfb_ms", "int"),
+    "Загрузка, мс": ("download_ms", "int"),
+    "Разбор HTML, мс": ("parse_ms", "int"),
+    "Проверки, мс": ("checks_ms", "int"),
+    "Самая долгая проверка": ("slowest_check", "str"),
+}
+
+# Текстовое значение "Код ответа", если это не число (ошибка, нет ответа)
+STATUS_ERROR_FIELD = ("status_error", "str")
+ALTS_FIELD = ("alts", "list")
+
+# Формат -> (расширение файла, mimetype)
+TYPED_EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "sqlite": ("sqlite", "application/vnd.sqlite3"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+NDJSON_CHUNK_ROWS = 500
+SQLITE_BATCH_ROWS = 1000
+PARQUET_BATCH_ROWS = 5000
+
+
+def _is_alt_column(column: str) -> bool:
+    return column.startswith("Alt-") and column[4:].isdigit()
+
+
+class TypedSchema:
+    """Схема типизированной записи, построенная по колонкам задачи."""
+
+    def __init__(self, columns: Iterable[str]):
+        columns = list(columns)
+        self.fields: List[Tuple[str, str]] = []
+        self._columns: List[Tuple[str, str, str]] = []  # (колонка, поле, тип)
+        self._alt_columns: List[str] = []
+        for column in columns:
+            if _is_alt_column(column):
+                self._alt_columns.append(column)
+                continue
+            name, kind = TYPED_FIELDS.get(column, (column, "str"))
+            self._columns.append((column, name, kind))
+            self.fields.append((name, kind))
+            if column == "Код ответа":
+                self.fields.append(STATUS_ERROR_FIELD)
+        self.has_alts = bool(self._alt_columns) or "Кол-во alt" in columns
+        if self.has_alts:
+            self._alt_columns.sort(key=lambda column: int(column[4:]))
+            self.fields.append(ALTS_FIELD)
+
+    def convert(self, row: Dict[str, str]) -> Dict[str, Any]:
+        """Переводит строку результата в типизированную запись."""
+        record: Dict[str, Any] = {}
+        for column, name, kind in self._columns:
+            raw = row.get(column, "")
+            if column == "Код ответа":
+                code = _to_int(raw)
+                record[name] = code
+                record[STATUS_ERROR_FIELD[0]] = raw if code is None and raw else None
+            elif kind == "int":
+                record[name] = _to_int(raw)
+            elif kind == "float":
+                record[name] = _to_float(raw)
+            elif kind == "bool":
+                record[name] = _to_bool(raw)
+            elif kind == "list":
+                separator = (
+                    DISALLOW_SEPARATOR if column == "Robots Disallow" else HEADING_SEPARATOR
+                )
+                record[name] = [p.strip() for p in raw.split(separator) if p.strip()]
+            else:
+                record[name] = raw if raw != "" else None
+        if self.has_alts:
+            record[ALTS_FIELD[0]] = [
+                row[column] for column in self._alt_columns if column in row
+            ]
+        return record
+
+
+def _to_int(value: str) -> Optional[int]:
+    value = (value or "").strip()
+    return int(value) if value.isdigit() else None
+
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_bool(value: str) -> Optional[bool]:
+    value = (value or "").strip().lower()
+    if value == "да":
+        return True
+    if value == "нет":
+        return False
+    return None
+
+
+def iter_ndjson_chunks(
+    rows: Iterable[dict], columns: List[str], chunk_rows: int = NDJSON_CHUNK_ROWS
+) -> Iterator[bytes]:
+    """Лениво генерирует NDJSON: одна типизированная запись на строку."""
+    schema = TypedSchema(columns)
+    lines: List[str] = []
+    for row in rows:
+        lines.append(json.dumps(schema.convert(row), ensure_ascii=False))
+        if len(lines) >= chunk_rows:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def write_rows_ndjson(rows: Iterable[dict], columns: List[str], path: str) -> None:
+    """Пишет NDJSON в файл."""
+    with open(path, "wb") as fh:
+        for chunk in iter_ndjson_chunks(rows, columns):
+            fh.write(chunk)
+
+
+SQLITE_TYPES = {"str": "TEXT", "int": "INTEGER", "float": "REAL", "bool": "INTEGER"}
+
+
+def write_rows_sqlite(rows: Iterable[dict], columns: List[str], path: str) -> None:
+    """Пишет самодостаточный SQLite-файл.
+
+    Таблицы:
+    - results(id, <скалярные поля>)
+    - lists(result_id, field, position, value) — Alt-ы, заголовки H1-H6,
+      Disallow-правила; одна строка на элемент списка
+    """
+    schema = TypedSchema(columns)
+    scalar_fields = [(name, kind) for name, kind in schema.fields if kind != "list"]
+    list_fields = [name for name, kind in schema.fields if kind == "list"]
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        column_defs = ", ".join(
+            f'"{name}" {SQLITE_TYPES[kind]}' for name, kind in scalar_fields
+        )
+        conn.execute(
+            f"CREATE TABLE results (id INTEGER PRIMARY KEY"
+            f"{', ' + column_defs if column_defs else ''})"
+        )
+        conn.execute(
+            "CREATE TABLE lists (result_id INTEGER NOT NULL, field TEXT NOT NULL, "
+            "position INTEGER NOT NULL, value TEXT)"
+        )
+        placeholders = ", ".join("?" for _ in range(len(scalar_fields) + 1))
+        insert_result = (
+            "INSERT INTO results (id"
+            + "".join(f', "{name}"' for name, _ in scalar_fields)
+            + f") VALUES ({placeholders})"
+        )
+        insert_list = "INSERT INTO lists VALUES (?, ?, ?, ?)"
+
+        result_batch: List[tuple] = []
+        list_batch: List[tuple] = []
+        for result_id, row in enumerate(rows, start=1):
+            record = schema.convert(row)
+            result_batch.append(
+                (result_id, *(record[name] for name, _ in scalar_fields))
+            )
+            for name in list_fields:
+                for position, value in enumerate(record[name], start=1):
+                    list_batch.append((result_id, name, position, value))
+            if len(result_batch) >= SQLITE_BATCH_ROWS:
+                conn.executemany(insert_result, result_batch)
+                conn.executemany(insert_list, list_batch)
+                result_batch, list_batch = [], []
+        if result_batch:
+            conn.executemany(insert_result, result_batch)
+            conn.executemany(insert_list, list_batch)
+
+        conn.execute("CREATE INDEX lists_result ON lists (result_id, field)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def write_rows_parquet(rows: Iterable[dict], columns: List[str], path: str) -> None:
+    """Пишет Parquet пачками записей (нужен pyarrow)."""
+    if not HAS_PYARROW:
+        raise ImportError("pyarrow не установлена. Установите: pip install pyarrow")
+
+    schema = TypedSchema(columns)
+    arrow_types = {
+        "str": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "list": pa.list_(pa.string()),
+    }
+    arrow_schema = pa.schema(
+        [pa.field(name, arrow_types[kind]) for name, kind in schema.fields]
+    )
+
+    with pq.ParquetWriter(path, arrow_schema, compression="zstd") as writer:
+        batch: List[Dict[str, Any]] = []
+        for row in rows:
+            batch.append(schema.convert(row))
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, arrow_schema))
+                batch = []
+        if batch:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, arrow_schema))
+
+
+TYPED_WRITERS = {
+    "ndjson": write_rows_ndjson,
+    "sqlite": write_rows_sqlite,
+    "parquet": write_rows_parquet,
+}
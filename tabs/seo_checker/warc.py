@@ -0,0 +1,330 @@
+"""
+Импорт и экспорт WARC (ISO 28500, WARC/1.0 и 1.1).
+
+- чтение: записи идут потоком из .warc или .warc.gz (gzip по записям или
+  целиком); из response-записей с HTTP-ответом получаются код, заголовки
+  и тело, которые затем попадают в снимок задачи и проверяются без сети
+- запись: снимок задачи (все полностью прочитанные GET-ответы) сохраняется
+  в .warc.gz — каждая запись отдельным gzip-блоком, как принято для WARC
+
+В снимке, кроме страниц, лежат вспомогательные ответы: robots.txt, sitemap,
+проверка 404, промежуточные редиректы. Поэтому экспорт пишет список
+страниц задачи в metadata-запись (WARC-Target-URI = WARC_PAGES_URI), и
+импорт проверяет ровно эти страницы. Для WARC других краулеров (списка
+нет) страницы угадываются: HTML-ответы и редиректы без robots.txt,
+sitemap, проверок 404 и адресов, на которые вёл редирект.
+"""
+
+import base64
+import gzip
+import hashlib
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from .snapshots import SnapshotStore
+
+# Тела больше лимита пропускаются при импорте (как и при записи снимка)
+WARC_MAX_RECORD_BYTES = 10 * 1024 * 1024
+# Лимит metadata-записи со списком страниц (~1 млн URL)
+WARC_MAX_PAGES_BYTES = 64 * 1024 * 1024
+# WARC-Target-URI metadata-записи со списком страниц задачи
+WARC_PAGES_URI = "urn:x-lime-frog:pages"
+_READ_CHUNK = 1024 * 1024
+# Вспомогательные адреса проверок (не страницы задачи): robots.txt и
+# эндпоинты, которые запрашивает определение CMS
+_AUXILIARY_PATHS = ("/robots.txt", "/wp-login.php", "/wp-admin/", "/wp-json/")
+_SITEMAP_SUFFIXES = (".xml", ".xml.gz")
+
+
+@dataclass
+class WarcResponse:
+    """HTTP-ответ из response-записи WARC."""
+
+    url: str
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    date: Optional[float] = None
+
+    def header(self, name: str) -> str:
+        name = name.lower()
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value
+        return ""
+
+
+def _open(path: str) -> BinaryIO:
+    with open(path, "rb") as fh:
+        magic = fh.read(2)
+    if magic == b"\x1f\x8b":
+        return gzip.open(path, "rb")  # читает и многоблочный gzip
+    return open(path, "rb")
+
+
+def _read_headers(stream: BinaryIO) -> Optional[Dict[str, str]]:
+    """Заголовки записи WARC (имена в нижнем регистре); None — конец файла."""
+    line = stream.readline()
+    while line in (b"\r\n", b"\n"):  # пустые строки между записями
+        line = stream.readline()
+    if not line:
+        return None
+    if not line.startswith(b"WARC/"):
+        raise ValueError(f"ожидался заголовок записи WARC, получено: {line[:40]!r}")
+    headers: Dict[str, str] = {}
+    for line in iter(stream.readline, b""):
+        line = line.rstrip(b"\r\n")
+        if not line:
+            break
+        name, _, value = line.decode("utf-8", "replace").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _skip(stream: BinaryIO, length: int):
+    while length > 0:
+        chunk = stream.read(min(length, _READ_CHUNK))
+        if not chunk:
+            break
+        length -= len(chunk)
+
+
+def _dechunk(data: bytes) -> bytes:
+    """Снимает Transfer-Encoding: chunked (WARC хранит ответ как пришёл)."""
+    out = bytearray()
+    pos = 0
+    while pos < len(data):
+        line_end = data.find(b"\r\n", pos)
+        if line_end < 0:
+            break
+        size_text = data[pos:line_end].split(b";")[0].strip()
+        try:
+            size = int(size_text, 16)
+        except ValueError:
+            break
+        if size == 0:
+            break
+        start = line_end + 2
+        out += data[start : start + size]
+        pos = start + size + 2
+    return bytes(out)
+
+
+def parse_http_response(block: bytes) -> Optional[Tuple[int, List[Tuple[str, str]], bytes]]:
+    """Код, заголовки и тело HTTP-ответа из блока записи."""
+    head_end = block.find(b"\r\n\r\n")
+    separator = 4
+    if head_end < 0:
+        head_end = block.find(b"\n\n")
+        separator = 2
+    if head_end < 0:
+        return None
+    lines = block[:head_end].decode("latin-1").splitlines()
+    parts = lines[0].split(" ", 2) if lines else []
+    if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+        return None
+    headers: List[Tuple[str, str]] = []
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers.append((name.strip(), value.strip()))
+    body = block[head_end + separator :]
+    if any(
+        name.lower() == "transfer-encoding" and "chunked" in value.lower()
+        for name, value in headers
+    ):
+        body = _dechunk(body)
+        headers = [h for h in headers if h[0].lower() != "transfer-encoding"]
+    return int(parts[1]), headers, body
+
+
+def _parse_date(value: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _parse_pages(block: bytes) -> List[str]:
+    pages = []
+    for line in block.decode("utf-8", "replace").splitlines():
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "page" and value.strip():
+            pages.append(value.strip())
+    return pages
+
+
+def iter_warc_responses(
+    path: str, on_pages: Optional[Callable[[List[str]], None]] = None
+) -> Iterator[WarcResponse]:
+    """HTTP-ответы из WARC по одному (файл не читается в память целиком).
+
+    on_pages получает список страниц из metadata-записи экспорта lime-frog.
+    """
+    with _open(path) as stream:
+        while True:
+            headers = _read_headers(stream)
+            if headers is None:
+                return
+            length = int(headers.get("content-length", "0") or 0)
+            if (
+                on_pages
+                and headers.get("warc-type") == "metadata"
+                and headers.get("warc-target-uri", "").strip("<>") == WARC_PAGES_URI
+                and length <= WARC_MAX_PAGES_BYTES
+            ):
+                on_pages(_parse_pages(stream.read(length)))
+                continue
+            is_response = (
+                headers.get("warc-type") == "response"
+                and "application/http" in headers.get("content-type", "")
+                and headers.get("warc-target-uri")
+            )
+            if not is_response or length > WARC_MAX_RECORD_BYTES:
+                _skip(stream, length)
+                continue
+            parsed = parse_http_response(stream.read(length))
+            if parsed is None:
+                continue
+            status_code, http_headers, body = parsed
+            try:
+                url = str(httpx.URL(headers["warc-target-uri"].strip("<>")))
+            except httpx.InvalidURL:
+                continue
+            yield WarcResponse(
+                url=url,
+                status_code=status_code,
+                headers=http_headers,
+                body=body,
+                date=_parse_date(headers.get("warc-date", "")),
+            )
+
+
+def _is_auxiliary(url: str) -> bool:
+    """robots.txt, sitemap, запросы определения CMS или проверка 404
+    (путь из хэша адреса страницы)."""
+    path = urlparse(url).path.lower()
+    if path in _AUXILIARY_PATHS or path.endswith(_SITEMAP_SUFFIXES):
+        return True
+    parent, _, token = url.rpartition("/")
+    if len(token) != 10:
+        return False
+    # check_404: base_url.rstrip("/") + "/" + sha1(base_url)[:10]
+    return any(
+        hashlib.sha1(base.encode("utf-8")).hexdigest()[:10] == token
+        for base in (parent, parent + "/")
+    )
+
+
+class WarcPages:
+    """Страницы для проверки из WARC: список экспорта или эвристика."""
+
+    def __init__(self):
+        self.listed: Dict[str, None] = {}
+        self._guessed: Dict[str, None] = {}
+        self._redirect_targets: Set[str] = set()
+
+    def add_listed(self, urls: List[str]):
+        for url in urls:
+            self.listed.setdefault(url)
+
+    def add_response(self, response: WarcResponse):
+        status = response.status_code
+        if 300 <= status < 400:
+            location = response.header("location")
+            if location:
+                try:
+                    self._redirect_targets.add(str(httpx.URL(response.url).join(location)))
+                except httpx.InvalidURL:
+                    pass
+        elif not (status < 300 and "text/html" in response.header("content-type")):
+            return
+        if not _is_auxiliary(response.url):
+            self._guessed.setdefault(response.url)
+
+    def pages(self) -> List[str]:
+        if self.listed:
+            return list(self.listed)
+        # Конечные адреса редиректов проверяются вместе с исходной страницей
+        return [url for url in self._guessed if url not in self._redirect_targets]
+
+
+def _warc_date(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _write_record(fh: BinaryIO, headers: List[Tuple[str, str]], block: bytes):
+    head = "WARC/1.1\r\n" + "".join(f"{name}: {value}\r\n" for name, value in headers)
+    head += f"Content-Length: {len(block)}\r\n\r\n"
+    # Каждая запись — отдельный gzip-блок: читатели могут начинать с любой
+    fh.write(gzip.compress(head.encode("utf-8") + block + b"\r\n\r\n"))
+
+
+def _record_id() -> str:
+    return f"<urn:uuid:{uuid.uuid4()}>"
+
+
+def write_warc(
+    store: SnapshotStore,
+    job_id: str,
+    path: str,
+    pages: Optional[List[str]] = None,
+    software: str = "lime-frog",
+):
+    """Записывает снимок задачи в .warc.gz (warcinfo, список страниц pages
+    в metadata-записи, response-записи)."""
+    with open(path, "wb") as fh:
+        now = _warc_date(datetime.now(timezone.utc).timestamp())
+        info = f"software: {software}\r\nformat: WARC File Format 1.1\r\n".encode("utf-8")
+        _write_record(
+            fh,
+            [
+                ("WARC-Type", "warcinfo"),
+                ("WARC-Date", now),
+                ("WARC-Record-ID", _record_id()),
+                ("Content-Type", "application/warc-fields"),
+            ],
+            info,
+        )
+        if pages:
+            _write_record(
+                fh,
+                [
+                    ("WARC-Type", "metadata"),
+                    ("WARC-Target-URI", WARC_PAGES_URI),
+                    ("WARC-Date", now),
+                    ("WARC-Record-ID", _record_id()),
+                    ("Content-Type", "application/warc-fields"),
+                ],
+                "".join(f"page: {url}\r\n" for url in pages).encode("utf-8"),
+            )
+        for url, entry, body in store.iter_entries(job_id):
+            status_line = (
+                f"HTTP/1.1 {entry.status_code} "
+                f"{httpx.codes.get_reason_phrase(entry.status_code)}\r\n"
+            )
+            http_head = status_line + "".join(
+                f"{name}: {value}\r\n"
+                for name, value in entry.headers
+                # Тело в снимке уже без chunked-кодирования
+                if name.lower() != "transfer-encoding"
+            )
+            block = http_head.encode("latin-1", "replace") + b"\r\n" + body
+            payload_digest = base64.b32encode(hashlib.sha1(body).digest()).decode("ascii")
+            _write_record(
+                fh,
+                [
+                    ("WARC-Type", "response"),
+                    ("WARC-Target-URI", url),
+                    ("WARC-Date", _warc_date(entry.fetched_at)),
+                    ("WARC-Record-ID", _record_id()),
+                    ("WARC-Payload-Digest", f"sha1:{payload_digest}"),
+                    ("Content-Type", "application/http; msgtype=response"),
+                ],
+                block,
+            )